@@ -0,0 +1,185 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import sketch_cuantiles
+import tabla_productos
+import utils
+
+
+#======================Agregacion map-reduce sobre archivos por municipio==========================================================
+
+class EstadoParcial:
+    """
+    Resultado parcial (combinable) de procesar un subconjunto de tiendas, por ejemplo un archivo por municipio
+
+    Atributos:
+        n_tiendas (int): tiendas procesadas
+        disponibilidad (dict): {categoria: numero de tiendas con la categoria}
+        origenes (dict): {categoria: {'nacional': X, 'importado': Y}}
+        precios (dict): {categoria: np.ndarray de precios estandarizados} o, en modo aproximado,
+            {categoria: sketch_cuantiles.SketchKLL}
+
+    Dos estados se combinan sumando conteos y concatenando precios (o combinando sketches). Las categorias
+    conservan el orden de primera aparicion recorriendo los estados en el orden en que se combinan, de modo
+    que combinar los estados de los archivos en orden da los mismos diccionarios que procesar todas las
+    tiendas juntas. En modo aproximado la memoria del estado queda acotada por categoria sin importar cuantas
+    tiendas se combinen
+    """
+
+    def __init__(self, n_tiendas=0, disponibilidad=None, origenes=None, precios=None):
+        self.n_tiendas = n_tiendas
+        self.disponibilidad = disponibilidad or {}
+        self.origenes = origenes or {}
+        self.precios = precios or {}
+
+    def combinar(self, otro):
+        """
+        Returns:
+            EstadoParcial: un estado nuevo con los datos de ambos (no modifica ninguno de los dos)
+        """
+        disponibilidad = dict(self.disponibilidad)
+        for categoria, conteo in otro.disponibilidad.items():
+            disponibilidad[categoria] = disponibilidad.get(categoria, 0) + conteo
+
+        origenes = {categoria: dict(conteo) for categoria, conteo in self.origenes.items()}
+        for categoria, conteo in otro.origenes.items():
+            if categoria not in origenes:
+                origenes[categoria] = {'nacional': 0, 'importado': 0}
+            origenes[categoria]['nacional'] += conteo['nacional']
+            origenes[categoria]['importado'] += conteo['importado']
+
+        # Generadores de los sketches combinados, derivados de este paso del reduce (los de los estados no se consumen)
+        semillas = np.random.SeedSequence((self.n_tiendas, otro.n_tiendas))
+        precios = dict(self.precios)
+        for categoria, valores in otro.precios.items():
+            if categoria not in precios:
+                precios[categoria] = valores
+            elif isinstance(precios[categoria], sketch_cuantiles.SketchKLL):
+                semilla_sketch, semilla_combinado = semillas.spawn(2)
+                precios[categoria] = precios[categoria].combinar(
+                    _como_sketch(valores, precios[categoria].k, semilla_sketch), semilla=semilla_combinado)
+            elif isinstance(valores, sketch_cuantiles.SketchKLL):
+                semilla_sketch, semilla_combinado = semillas.spawn(2)
+                precios[categoria] = _como_sketch(precios[categoria], valores.k, semilla_sketch).combinar(
+                    valores, semilla=semilla_combinado)
+            else:
+                precios[categoria] = np.concatenate((precios[categoria], valores))
+
+        return EstadoParcial(self.n_tiendas + otro.n_tiendas, disponibilidad, origenes, precios)
+
+    def precio_mediano_por_categoria(self):
+        return utils.calcular_precio_mediano_por_categoria(self.precios)
+
+    def cuantiles_por_categoria(self, qs=(0.1, 0.5, 0.9)):
+        """
+        Cuantiles de los precios estandarizados de cada categoria (p10, mediana y p90 por defecto)
+
+        Returns:
+            dict: {categoria: {q: valor}}. Con precios exactos se usa la misma definicion que el sketch
+            (el menor precio cuyo rango acumulado alcanza q)
+        """
+        if any(isinstance(valores, sketch_cuantiles.SketchKLL) for valores in self.precios.values()):
+            sketches = {categoria: _como_sketch(valores, sketch_cuantiles.K_POR_DEFECTO, semilla=0)
+                        for categoria, valores in self.precios.items()}
+            return sketch_cuantiles.cuantiles_por_categoria(sketches, qs)
+        return {categoria: dict(zip(qs, np.quantile(valores, list(qs), method='inverted_cdf').tolist()))
+                for categoria, valores in self.precios.items() if len(valores)}
+
+    def resultados(self, canasta):
+        """
+        Returns:
+            dict: {'n_tiendas', 'conteo_disponibilidad', 'conteo_origen', 'precio_mediano', 'costo_total'}
+            con los mismos valores que las funciones de utils.py sobre todas las tiendas juntas
+        """
+        precio_mediano = self.precio_mediano_por_categoria()
+        return {
+            'n_tiendas': self.n_tiendas,
+            'conteo_disponibilidad': dict(self.disponibilidad),
+            'conteo_origen': {categoria: dict(conteo) for categoria, conteo in self.origenes.items()},
+            'precio_mediano': precio_mediano,
+            'costo_total': utils.costo_total_canasta(canasta, precio_mediano),
+        }
+
+
+def _como_sketch(valores, k, semilla):
+    if isinstance(valores, sketch_cuantiles.SketchKLL):
+        return valores
+    sketch = sketch_cuantiles.SketchKLL(k, semilla=semilla)
+    sketch.agregar_arreglo(valores)
+    return sketch
+
+
+def estado_de_tiendas(tiendas, canasta, k=None, semilla=0):
+    """
+    Etapa 'map': procesa una lista de tiendas con las versiones vectorizadas de tabla_productos
+
+    Args:
+        tiendas (list | TablaProductos): tiendas de un shard
+        canasta (dict): canasta definida para el proyecto
+        k (int): si se indica, los precios se guardan en sketches KLL con este parametro de precision
+            (modo aproximado, ver sketch_cuantiles.k_para_error)
+        semilla (int | tuple): semilla de los sketches del shard. Cada shard debe usar una distinta para que
+            sus compactaciones sean independientes (agregar_archivos usa (semilla, numero de archivo))
+
+    Returns:
+        EstadoParcial
+    """
+    if not isinstance(tiendas, tabla_productos.TablaProductos):
+        tiendas = tabla_productos.construir_tabla_productos(tiendas)
+    precios = tabla_productos.precios_estandarizados_por_categoria(tiendas, canasta)
+    if k is not None:
+        precios = sketch_cuantiles.sketches_por_categoria(precios, k, semilla)
+    return EstadoParcial(
+        tiendas.n_tiendas,
+        tabla_productos.conteo_disponibilidad_categorias(tiendas),
+        tabla_productos.conteo_origen(tiendas),
+        precios,
+    )
+
+
+def estado_de_archivo(path, canasta, k=None, semilla=0):
+    """Etapa 'map' para un archivo de tiendas (se ejecuta dentro de un proceso del pool)"""
+    return estado_de_tiendas(utils.cargar_tabla_productos(path), canasta, k, semilla)
+
+
+def combinar_estados(estados):
+    """
+    Etapa 'reduce': combina los estados parciales en orden
+
+    Returns:
+        EstadoParcial
+    """
+    total = EstadoParcial()
+    for estado in estados:
+        total = total.combinar(estado)
+    return total
+
+
+def agregar_archivos(paths, canasta, procesos=None, k=None, semilla=0):
+    """
+    Procesa muchos archivos de tiendas (por ejemplo uno por municipio) en un pool de procesos y combina los resultados
+
+    Cada proceso carga su archivo, construye la TablaProductos y devuelve un EstadoParcial pequeño
+    (conteos y precios estandarizados); el proceso principal solo combina esos estados
+
+    Args:
+        paths (list): rutas de los archivos con el formato de 'tiendas_privadas.json'
+        canasta (dict): canasta definida para el proyecto
+        procesos (int): procesos del pool (None = todos los nucleos, 1 = sin pool)
+        k (int): precision de los sketches para el modo aproximado (None = medianas exactas)
+        semilla (int): semilla base de los sketches; el archivo i usa (semilla, i)
+
+    Returns:
+        dict: ver EstadoParcial.resultados
+    """
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    semillas = [(semilla, i) for i in range(len(paths))]
+    if procesos == 1 or len(paths) <= 1:
+        estados = [estado_de_archivo(path, canasta, k, semilla_archivo) for path, semilla_archivo in zip(paths, semillas)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(paths))) as pool:
+            estados = list(pool.map(estado_de_archivo, paths, [canasta] * len(paths), [k] * len(paths), semillas))
+    return combinar_estados(estados).resultados(canasta)
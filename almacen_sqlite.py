@@ -0,0 +1,324 @@
+import sqlite3
+
+import lectura_streaming
+from tasas_cambio import a_fecha
+
+
+#======================Almacen persistente de las encuestas en SQLite==========================================================
+
+FUENTE_TIENDAS = 'mipymes'
+FUENTE_CATALOGO = 'supermarket23'
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tiendas (
+    id INTEGER PRIMARY KEY,
+    fuente TEXT NOT NULL,
+    store_id TEXT,
+    nombre TEXT,
+    fecha TEXT,
+    lat REAL,
+    lon REAL,
+    distancia REAL,
+    evidencia TEXT
+);
+CREATE TABLE IF NOT EXISTS categorias (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS productos (
+    id INTEGER PRIMARY KEY,
+    tienda_id INTEGER NOT NULL REFERENCES tiendas(id) ON DELETE CASCADE,
+    categoria_id INTEGER NOT NULL REFERENCES categorias(id),
+    nombre TEXT,
+    marca TEXT,
+    unidad TEXT,
+    origen TEXT,
+    precio_cup REAL,
+    precio_usd REAL,
+    peso_neto REAL
+);
+CREATE INDEX IF NOT EXISTS tiendas_fuente_fecha ON tiendas(fuente, fecha);
+CREATE INDEX IF NOT EXISTS tiendas_fecha ON tiendas(fecha);
+CREATE INDEX IF NOT EXISTS productos_categoria_origen ON productos(categoria_id, origen, tienda_id);
+CREATE INDEX IF NOT EXISTS productos_tienda ON productos(tienda_id);
+"""
+
+
+def _fecha_iso(fecha):
+    # 'collection_date' puede venir sin ceros ('2025-12-3'); se guarda como '2025-12-03' para que se pueda
+    # comparar y ordenar como texto
+    if not fecha:
+        return None
+    return str(a_fecha(fecha))
+
+
+class AlmacenSQLite:
+    """
+    Almacen de las tiendas encuestadas y del catalogo online en una base SQLite (un solo archivo, sin servidor)
+
+    Las fuentes se importan una vez a tablas normalizadas e indexadas (tiendas, categorias, productos) y
+    despues se consultan con filtros por categoria, origen, fuente y fecha de recogida. Los conteos y las
+    medianas se calculan dentro de SQLite, por lo que una pregunta puntual no necesita recargar los JSON
+
+    Ejemplo:
+        almacen = AlmacenSQLite('fuentes/encuestas.sqlite')
+        almacen.importar_archivo_tiendas('fuentes/tiendas_privadas.json')
+        almacen.consulta(categorias=['yogurt'], origen='nacional', desde='2025-11-01',
+                         hasta='2025-11-30').precio_mediano_por_categoria(canasta)
+    """
+
+    def __init__(self, path=':memory:'):
+        """
+        Args:
+            path (str): archivo de la base (se crea si no existe); ':memory:' para una base temporal
+        """
+        self.path = path
+        self.conexion = sqlite3.connect(path)
+        self.conexion.execute('PRAGMA foreign_keys = ON')
+        self.conexion.executescript(_ESQUEMA)
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    def _id_categorias(self, nombres):
+        # Las categorias reciben su id en orden de primera aparicion, que es el orden de los diccionarios devueltos
+        self.conexion.executemany('INSERT OR IGNORE INTO categorias (nombre) VALUES (?)', [(n,) for n in nombres])
+        return dict(self.conexion.execute('SELECT nombre, id FROM categorias'))
+
+    def _actualizar_estadisticas(self):
+        # Con las estadisticas de los indices el planificador elige bien el orden de los joins en las consultas filtradas
+        self.conexion.execute('ANALYZE')
+
+    def _borrar_fuente(self, fuente):
+        self.conexion.execute('DELETE FROM productos WHERE tienda_id IN (SELECT id FROM tiendas WHERE fuente = ?)',
+                              (fuente,))
+        self.conexion.execute('DELETE FROM tiendas WHERE fuente = ?', (fuente,))
+
+    def _insertar_productos(self, tienda_id, productos, categoria=None):
+        filas = [(categoria or producto['category'], producto) for producto in productos]
+        ids = self._id_categorias(dict.fromkeys(c for c, _ in filas))
+        self.conexion.executemany(
+            'INSERT INTO productos (tienda_id, categoria_id, nombre, marca, unidad, origen, precio_cup, precio_usd, '
+            'peso_neto) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(tienda_id, ids[c], p.get('name'), p.get('brand', ''), p.get('unit'), p.get('origin', ''),
+              p.get('price_cup'), p.get('price_usd'), p.get('net_weight')) for c, p in filas])
+
+    def importar_tiendas(self, tiendas, fuente=FUENTE_TIENDAS):
+        """
+        Importa tiendas con el formato de 'tiendas_privadas.json'. Los datos anteriores de la misma fuente se
+        reemplazan, en una sola transaccion
+
+        Args:
+            tiendas (iterable): lista de tiendas o generador (por ejemplo lectura_streaming.iterar_tiendas)
+            fuente (str): nombre de la fuente con el que se guardan las tiendas
+
+        Returns:
+            int: tiendas importadas
+        """
+        n = 0
+        with self.conexion:
+            self._borrar_fuente(fuente)
+            for tienda in tiendas:
+                coordenadas = tienda.get('coordinates') or {}
+                cursor = self.conexion.execute(
+                    'INSERT INTO tiendas (fuente, store_id, nombre, fecha, lat, lon, distancia, evidencia) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (fuente, tienda.get('store_id'), tienda.get('name'), _fecha_iso(tienda.get('collection_date')),
+                     coordenadas.get('lat'), coordenadas.get('lon'), tienda.get('distance_to_hospital'),
+                     tienda.get('evidence_path')))
+                self._insertar_productos(cursor.lastrowid, tienda['products'])
+                n += 1
+        self._actualizar_estadisticas()
+        return n
+
+    def importar_archivo_tiendas(self, path, fuente=FUENTE_TIENDAS):
+        """Importa un archivo de tiendas leyendolo en flujo, sin cargarlo completo en memoria"""
+        return self.importar_tiendas(lectura_streaming.iterar_tiendas(path), fuente)
+
+    def importar_catalogo(self, catalogo, nombre_tienda='SuperMarket23', fuente=FUENTE_CATALOGO, fecha=None):
+        """
+        Importa el catalogo de la tienda online ({categoria: [productos]}) como una sola tienda. Los precios
+        quedan en precio_usd (y en precio_cup si el catalogo ya paso por utils.convertir_usd_a_cup)
+
+        Returns:
+            int: productos importados
+        """
+        with self.conexion:
+            self._borrar_fuente(fuente)
+            cursor = self.conexion.execute('INSERT INTO tiendas (fuente, store_id, nombre, fecha) VALUES (?, ?, ?, ?)',
+                                           (fuente, nombre_tienda, nombre_tienda, _fecha_iso(fecha)))
+            for categoria, productos in catalogo.items():
+                self._insertar_productos(cursor.lastrowid, productos, categoria)
+        self._actualizar_estadisticas()
+        return sum(len(productos) for productos in catalogo.values())
+
+    def consulta(self, categorias=None, origen=None, fuente=FUENTE_TIENDAS, desde=None, hasta=None, tiendas=None,
+                 tasa_usd_cup=None):
+        """
+        Crea una consulta filtrada (no se ejecuta hasta pedir un resultado)
+
+        Args:
+            categorias (list): solo estas categorias
+            origen (str): 'nacional' o 'importado'
+            fuente (str): fuente de las tiendas (None = todas)
+            desde, hasta (str): rango de fechas de recogida, incluidos los extremos ('2025-11-01')
+            tiendas (list): solo estos store_id
+            tasa_usd_cup (float): tasa para convertir los precios que solo estan en USD (catalogo online)
+
+        Returns:
+            ConsultaSQLite
+        """
+        return ConsultaSQLite(self, categorias, origen, fuente, desde, hasta, tiendas, tasa_usd_cup)
+
+
+class ConsultaSQLite:
+    """
+    Subconjunto filtrado de un AlmacenSQLite. utils.conteo_disponibilidad_categorias, utils.conteo_origen,
+    utils.peso_minimo_por_categoria y utils.estandarizar_precios_unidad_modal la aceptan en lugar de la lista
+    de tiendas y resuelven el filtro y la agregacion en SQL. Los diccionarios devueltos siguen el orden de
+    primera aparicion de las categorias, igual que las funciones sobre listas
+    """
+
+    def __init__(self, almacen, categorias=None, origen=None, fuente=FUENTE_TIENDAS, desde=None, hasta=None,
+                 tiendas=None, tasa_usd_cup=None):
+        self.almacen = almacen
+        self.tasa_usd_cup = tasa_usd_cup
+        condiciones = []
+        parametros = []
+        if categorias is not None:
+            condiciones.append(f"c.nombre IN ({', '.join('?' * len(categorias))})")
+            parametros.extend(categorias)
+        if origen is not None:
+            condiciones.append('p.origen = ?')
+            parametros.append(origen)
+        if fuente is not None:
+            condiciones.append('t.fuente = ?')
+            parametros.append(fuente)
+        if desde is not None:
+            condiciones.append('t.fecha >= ?')
+            parametros.append(_fecha_iso(desde))
+        if hasta is not None:
+            condiciones.append('t.fecha <= ?')
+            parametros.append(_fecha_iso(hasta))
+        if tiendas is not None:
+            condiciones.append(f"t.store_id IN ({', '.join('?' * len(tiendas))})")
+            parametros.extend(tiendas)
+        self._where = ' AND '.join(condiciones) or '1'
+        self._parametros = parametros
+
+    def _ejecutar(self, columnas, agrupar=True, canasta=None, parametros=()):
+        sql = self._sql(columnas, canasta)
+        if agrupar:
+            sql += ' GROUP BY p.categoria_id ORDER BY MIN(p.id)'
+        else:
+            sql += ' ORDER BY p.id'
+        return self.almacen.conexion.execute(sql, self._con_parametros(canasta, parametros)).fetchall()
+
+    def _sql(self, columnas, canasta=None):
+        sql = ''
+        join = ''
+        if canasta is not None:
+            # El contenido neto de referencia de cada categoria entra como una tabla temporal de la consulta
+            valores = ', '.join(['(?, ?)'] * len(canasta))
+            sql = f"WITH contenidos (nombre, contenido_neto) AS (VALUES {valores}) "
+            join = ' JOIN contenidos u ON u.nombre = c.nombre'
+        return (sql + f"SELECT {columnas} FROM productos p JOIN tiendas t ON t.id = p.tienda_id "
+                f"JOIN categorias c ON c.id = p.categoria_id{join} WHERE {self._where}")
+
+    def _con_parametros(self, canasta, parametros=()):
+        contenidos = []
+        if canasta is not None:
+            for categoria, definicion in canasta.items():
+                contenidos.extend((categoria, definicion['contenido_neto']))
+        return contenidos + list(parametros) + self._parametros
+
+    def _verificar_canasta(self, canasta):
+        # Igual que utils.estandarizar_precios_unidad_modal: una categoria sin definicion en la canasta es un KeyError
+        for categoria in self.conteo_disponibilidad_categorias():
+            if categoria not in canasta:
+                raise KeyError(categoria)
+
+    def __len__(self):
+        return self._ejecutar('COUNT(*)', agrupar=False)[0][0]
+
+    def _precio_cup(self):
+        if self.tasa_usd_cup is None:
+            return 'p.precio_cup', ()
+        return 'COALESCE(p.precio_cup, p.precio_usd * ?)', (self.tasa_usd_cup,)
+
+    def conteo_disponibilidad_categorias(self):
+        """
+        Returns:
+            dict: {categoria: numero de tiendas con al menos un producto de la categoria}
+        """
+        return dict(self._ejecutar('c.nombre, COUNT(DISTINCT p.tienda_id)'))
+
+    def conteo_origen(self):
+        """
+        Returns:
+            dict: {categoria: {'nacional': X, 'importado': Y}}
+        """
+        filas = self._ejecutar("c.nombre, SUM(p.origen = 'nacional'), SUM(p.origen = 'importado')")
+        return {categoria: {'nacional': nacional, 'importado': importado} for categoria, nacional, importado in filas}
+
+    def peso_minimo_por_categoria(self):
+        """
+        Returns:
+            dict: {categoria: peso neto minimo}
+        """
+        return dict(self._ejecutar('c.nombre, MIN(p.peso_neto)'))
+
+    def _sql_precios_estandarizados(self):
+        # Misma formula que utils.estandarizar_precios_unidad_modal: precio / (peso / contenido_neto)
+        precio, parametros = self._precio_cup()
+        columnas = f"c.nombre AS categoria, {precio} / (p.peso_neto / u.contenido_neto) AS valor, p.id AS fila"
+        return columnas, parametros
+
+    def precios_estandarizados_por_categoria(self, canasta):
+        """
+        Precios llevados al contenido neto de referencia de la canasta
+
+        Args:
+            canasta (dict): canasta definida para el proyecto
+
+        Returns:
+            dict: {categoria: lista de precios estandarizados}, en el orden de los productos
+        """
+        self._verificar_canasta(canasta)
+        columnas, parametros = self._sql_precios_estandarizados()
+        resultado = {}
+        for categoria, valor, _ in self._ejecutar(columnas, agrupar=False, canasta=canasta, parametros=parametros):
+            resultado.setdefault(categoria, []).append(valor)
+        return resultado
+
+    def precio_mediano_por_categoria(self, canasta):
+        """
+        Mediana de los precios estandarizados de cada categoria, calculada en SQL con funciones de ventana
+        (promedio de los dos elementos centrales si la cantidad es par, como utils.calcular_precio_mediano_por_categoria).
+        Los productos sin peso neto o sin precio no se cuentan
+
+        Args:
+            canasta (dict): canasta definida para el proyecto
+
+        Returns:
+            dict: {categoria: precio mediano}
+        """
+        self._verificar_canasta(canasta)
+        columnas, parametros = self._sql_precios_estandarizados()
+        sql = (f"WITH precios AS ({self._sql(columnas, canasta)}), "
+               "validos AS (SELECT categoria, valor, fila FROM precios WHERE valor IS NOT NULL), "
+               "posiciones AS (SELECT categoria, valor, fila, "
+               "ROW_NUMBER() OVER (PARTITION BY categoria ORDER BY valor) AS posicion, "
+               "COUNT(*) OVER (PARTITION BY categoria) AS n, "
+               "MIN(fila) OVER (PARTITION BY categoria) AS primera FROM validos) "
+               "SELECT categoria, AVG(valor) FROM posiciones WHERE posicion IN ((n + 1) / 2, (n + 2) / 2) "
+               "GROUP BY categoria ORDER BY MIN(primera)")
+        filas = self.almacen.conexion.execute(sql, self._con_parametros(canasta, parametros)).fetchall()
+        return dict(filas)
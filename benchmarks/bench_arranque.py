@@ -0,0 +1,83 @@
+"""
+Benchmark del tiempo de arranque de la API de calculo (import utils)
+
+Mide en procesos nuevos cuanto tarda 'import utils' y verifica que no se carguen modulos fuera de la
+biblioteca estandar, NumPy y los modulos del proyecto (en particular plotly y matplotlib, que solo se
+deben cargar al pedir una visualizacion, ni los modulos opcionales de OPCIONALES como almacen_sqlite). Termina con codigo 1 si la verificacion falla o si la mediana
+del tiempo supera el limite, para poder usarlo como control en CI
+
+Uso:
+    python benchmarks/bench_arranque.py [--repeticiones N] [--limite-ms MS] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PERMITIDOS = {'numpy'} # paquetes de terceros que la API de calculo puede cargar
+OPCIONALES = {'almacen_sqlite', 'sqlite3', 'visualizaciones'} # solo se cargan cuando se usan
+
+_MEDICION = """
+import json, sys, time
+inicio = time.perf_counter()
+import utils
+duracion = time.perf_counter() - inicio
+modulos = sorted({nombre.split('.')[0] for nombre in sys.modules})
+print(json.dumps({'segundos': duracion, 'modulos': modulos}))
+"""
+
+
+def medir_arranque(repeticiones=5):
+    """
+    Importa utils en 'repeticiones' procesos nuevos
+
+    Returns:
+        dict: {'segundos': [duracion de cada import], 'modulos_externos': [modulos no permitidos cargados]}
+    """
+    duraciones = []
+    externos = set()
+    proyecto = {os.path.splitext(nombre)[0] for nombre in os.listdir(RAIZ) if nombre.endswith('.py')}
+
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', _MEDICION], cwd=RAIZ, check=True,
+                                capture_output=True, text=True).stdout
+        resultado = json.loads(salida)
+        duraciones.append(resultado['segundos'])
+        for modulo in resultado['modulos']:
+            if modulo in OPCIONALES or (modulo not in sys.stdlib_module_names and modulo not in proyecto
+                                        and modulo not in PERMITIDOS and not modulo.startswith('_')):
+                externos.add(modulo)
+
+    return {'segundos': duraciones, 'modulos_externos': sorted(externos)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--limite-ms', type=float, default=500.0,
+                        help='mediana maxima aceptada para import utils (milisegundos)')
+    parser.add_argument('--json', action='store_true', help='imprimir el resultado en JSON')
+    args = parser.parse_args()
+
+    resultado = medir_arranque(args.repeticiones)
+    mediana_ms = statistics.median(resultado['segundos']) * 1000
+    resultado['mediana_ms'] = mediana_ms
+    resultado['limite_ms'] = args.limite_ms
+    resultado['ok'] = not resultado['modulos_externos'] and mediana_ms <= args.limite_ms
+
+    if args.json:
+        print(json.dumps(resultado, indent=2))
+    else:
+        print(f"import utils: mediana {mediana_ms:.1f} ms en {args.repeticiones} procesos (limite {args.limite_ms:.0f} ms)")
+        if resultado['modulos_externos']:
+            print("Modulos externos u opcionales cargados al importar utils: " + ', '.join(resultado['modulos_externos']))
+
+    sys.exit(0 if resultado['ok'] else 1)
+
+
+if __name__ == '__main__':
+    main()
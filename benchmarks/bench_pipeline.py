@@ -0,0 +1,235 @@
+"""
+Benchmark de las funciones de utils.py y de la cadena completa del notebook
+
+    carga -> conversion USD/CUP -> agrupacion -> estandarizacion -> mediana -> costo
+
+Para cada tamaño de muestra se generan datos sinteticos (benchmarks/generador_sintetico.py), se escriben a
+JSON en un directorio temporal y se mide cada funcion publica de procesamiento: tiempo (mediana y minimo
+de varias repeticiones) y pico de memoria asignada (tracemalloc, en una ejecucion aparte). Se mide tanto
+el camino con diccionarios como el de TablaProductos
+
+El resultado se puede guardar en JSON (--salida) y comparar con una ejecucion anterior (--comparar) para
+detectar regresiones entre versiones
+
+Uso:
+    python benchmarks/bench_pipeline.py --tiendas 30 1000 10000 --salida resultados.json
+    python benchmarks/bench_pipeline.py --tiendas 30 1000 --comparar resultados.json --tolerancia 1.25
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np # noqa: E402
+
+import generador_sintetico # noqa: E402
+import utils # noqa: E402
+
+TASA_USD_CUP = 460
+
+
+def preparar_datos(n_tiendas, productos_por_tienda, semilla, directorio):
+    """Genera los datos sinteticos, los escribe a JSON y precalcula las entradas de cada etapa"""
+    canasta = generador_sintetico.cargar_canasta()
+    tiendas = generador_sintetico.generar_tiendas(n_tiendas, productos_por_tienda, semilla, canasta)
+    catalogo = generador_sintetico.generar_catalogo(max(n_tiendas * productos_por_tienda // 2, 15), semilla, canasta)
+
+    path_tiendas = os.path.join(directorio, f'tiendas_{n_tiendas}.json')
+    path_catalogo = os.path.join(directorio, f'catalogo_{n_tiendas}.json')
+    generador_sintetico.escribir_json(tiendas, path_tiendas)
+    generador_sintetico.escribir_json(catalogo, path_catalogo)
+
+    datos = {
+        'canasta': canasta,
+        'tiendas': tiendas,
+        'catalogo_cup': utils.convertir_usd_a_cup(copy.deepcopy(catalogo), TASA_USD_CUP),
+        'path_tiendas': path_tiendas,
+        'path_catalogo': path_catalogo,
+        'n_productos': sum(len(tienda['products']) for tienda in tiendas),
+    }
+    datos['agrupados'] = utils.agrupar_productos_por_categoria(tiendas)
+    datos['estandarizados'] = utils.estandarizar_precios_unidad_modal(datos['agrupados'], canasta)
+    datos['medianas'] = utils.calcular_precio_mediano_por_categoria(datos['estandarizados'])
+    datos['tabla'] = utils.cargar_tabla_productos(path_tiendas)
+    datos['estandarizados_tabla'] = utils.estandarizar_precios_unidad_modal(datos['tabla'], canasta)
+    return datos
+
+
+def cadena_completa(path_tiendas, path_catalogo, canasta):
+    """La cadena del notebook sobre diccionarios"""
+    tiendas = utils.cargar_datos(path_tiendas)
+    catalogo = utils.convertir_usd_a_cup(utils.cargar_datos(path_catalogo), TASA_USD_CUP)
+    costos = []
+    for productos_categoria in (utils.agrupar_productos_por_categoria(tiendas), catalogo):
+        estandarizados = utils.estandarizar_precios_unidad_modal(productos_categoria, canasta)
+        medianas = utils.calcular_precio_mediano_por_categoria(estandarizados)
+        costos.append(utils.costo_total_canasta(canasta, medianas))
+    return costos
+
+
+def cadena_completa_tabla(path_tiendas, canasta):
+    """La cadena de las tiendas sobre TablaProductos"""
+    tabla = utils.cargar_tabla_productos(path_tiendas)
+    estandarizados = utils.estandarizar_precios_unidad_modal(tabla, canasta)
+    medianas = utils.calcular_precio_mediano_por_categoria(estandarizados)
+    return utils.costo_total_canasta(canasta, medianas)
+
+
+def casos(datos):
+    """Lista de (nombre, funcion sin argumentos) a medir"""
+    canasta = datos['canasta']
+    tiendas = datos['tiendas']
+    tabla = datos['tabla']
+    return [
+        ('cargar_datos', lambda: utils.cargar_datos(datos['path_tiendas'])),
+        ('cargar_tabla_productos', lambda: utils.cargar_tabla_productos(datos['path_tiendas'])),
+        ('convertir_usd_a_cup', lambda: utils.convertir_usd_a_cup(datos['catalogo_cup'], TASA_USD_CUP)),
+        ('conteo_disponibilidad_categorias', lambda: utils.conteo_disponibilidad_categorias(tiendas)),
+        ('conteo_disponibilidad_categorias[tabla]', lambda: utils.conteo_disponibilidad_categorias(tabla)),
+        ('agrupar_productos_por_categoria', lambda: utils.agrupar_productos_por_categoria(tiendas)),
+        ('agrupar_productos_por_categoria[tabla]', lambda: utils.agrupar_productos_por_categoria(tabla)),
+        ('conteo_origen', lambda: utils.conteo_origen(tiendas)),
+        ('conteo_origen[tabla]', lambda: utils.conteo_origen(tabla)),
+        ('peso_minimo_por_categoria', lambda: utils.peso_minimo_por_categoria(datos['agrupados'])),
+        ('peso_minimo_por_categoria[tabla]', lambda: utils.peso_minimo_por_categoria(tabla)),
+        ('nombre_categorias', lambda: utils.nombre_categorias(canasta)),
+        ('estandarizar_precios_unidad_modal', lambda: utils.estandarizar_precios_unidad_modal(datos['agrupados'], canasta)),
+        ('estandarizar_precios_unidad_modal[tabla]', lambda: utils.estandarizar_precios_unidad_modal(tabla, canasta)),
+        ('calcular_precio_mediano_por_categoria', lambda: utils.calcular_precio_mediano_por_categoria(datos['estandarizados'])),
+        ('calcular_precio_mediano_por_categoria[tabla]',
+         lambda: utils.calcular_precio_mediano_por_categoria(datos['estandarizados_tabla'])),
+        ('estandarizar_jugos_a_200ml', lambda: utils.estandarizar_jugos_a_200ml(tiendas)),
+        ('estandarizar_jugos_a_200ml[tabla]', lambda: utils.estandarizar_jugos_a_200ml(tabla)),
+        ('calcular_costos_totales_por_categoria_canasta',
+         lambda: utils.calcular_costos_totales_por_categoria_canasta(canasta, datos['medianas'])),
+        ('costo_total_canasta', lambda: utils.costo_total_canasta(canasta, datos['medianas'])),
+        ('cadena_completa', lambda: cadena_completa(datos['path_tiendas'], datos['path_catalogo'], canasta)),
+        ('cadena_completa[tabla]', lambda: cadena_completa_tabla(datos['path_tiendas'], canasta)),
+    ]
+
+
+def medir(funcion, repeticiones, memoria=True):
+    """
+    Returns:
+        dict: tiempos en segundos (mediana y minimo) y pico de memoria en bytes (None si memoria=False)
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    pico = None
+    if memoria:
+        # tracemalloc hace mas lenta la ejecucion, por eso se mide en una corrida aparte
+        tracemalloc.start()
+        funcion()
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {'segundos_mediana': statistics.median(tiempos), 'segundos_min': min(tiempos), 'memoria_pico_bytes': pico}
+
+
+def metadatos():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+    }
+
+
+def ejecutar(tamanos, productos_por_tienda=12, repeticiones=5, semilla=0, memoria=True, funciones=None):
+    """
+    Ejecuta el benchmark para cada cantidad de tiendas en 'tamanos'
+
+    Returns:
+        dict: {'meta': {...}, 'resultados': [{'funcion', 'n_tiendas', 'n_productos', 'segundos_mediana', ...}]}
+    """
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for n_tiendas in tamanos:
+            datos = preparar_datos(n_tiendas, productos_por_tienda, semilla, directorio)
+            for nombre, funcion in casos(datos):
+                if funciones and nombre.split('[')[0] not in funciones:
+                    continue
+                medicion = medir(funcion, repeticiones, memoria)
+                medicion.update({'funcion': nombre, 'n_tiendas': n_tiendas, 'n_productos': datos['n_productos']})
+                resultados.append(medicion)
+                print(f"{nombre:50s} tiendas={n_tiendas:<9d} productos={datos['n_productos']:<10d} "
+                      f"{medicion['segundos_mediana'] * 1000:10.2f} ms", file=sys.stderr)
+    return {'meta': metadatos(), 'resultados': resultados}
+
+
+def comparar(actual, anterior, tolerancia):
+    """
+    Compara dos ejecuciones y devuelve las mediciones que empeoraron mas de 'tolerancia' veces
+
+    Returns:
+        list: (funcion, n_tiendas, segundos anteriores, segundos actuales, razon)
+    """
+    previos = {(r['funcion'], r['n_tiendas']): r for r in anterior['resultados']}
+    regresiones = []
+    for resultado in actual['resultados']:
+        previo = previos.get((resultado['funcion'], resultado['n_tiendas']))
+        if previo is None or previo['segundos_min'] == 0:
+            continue
+        razon = resultado['segundos_min'] / previo['segundos_min']
+        if razon > tolerancia:
+            regresiones.append((resultado['funcion'], resultado['n_tiendas'],
+                                previo['segundos_min'], resultado['segundos_min'], razon))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tiendas', type=int, nargs='+', default=[30, 1000, 10000],
+                        help='cantidades de tiendas a generar (12 productos por tienda en promedio)')
+    parser.add_argument('--productos-por-tienda', type=int, default=12)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--sin-memoria', action='store_true', help='no medir el pico de memoria')
+    parser.add_argument('--funciones', nargs='*', help='medir solo estas funciones')
+    parser.add_argument('--salida', help='archivo JSON donde guardar los resultados')
+    parser.add_argument('--comparar', help='resultados JSON de una ejecucion anterior')
+    parser.add_argument('--tolerancia', type=float, default=1.25,
+                        help='razon maxima de tiempo actual/anterior antes de marcar una regresion')
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.tiendas, args.productos_por_tienda, args.repeticiones, args.semilla,
+                         not args.sin_memoria, args.funciones)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as file:
+            json.dump(resultado, file, indent=2)
+    else:
+        print(json.dumps(resultado, indent=2))
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as file:
+            anterior = json.load(file)
+        regresiones = comparar(resultado, anterior, args.tolerancia)
+        for funcion, n_tiendas, antes, ahora, razon in regresiones:
+            print(f"REGRESION {funcion} (tiendas={n_tiendas}): {antes * 1000:.2f} ms -> {ahora * 1000:.2f} ms "
+                  f"(x{razon:.2f})", file=sys.stderr)
+        sys.exit(1 if regresiones else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Generador de datos sinteticos con el mismo esquema de las fuentes del proyecto
+
+    generar_tiendas  -> lista de tiendas como 'tiendas_privadas.json'
+    generar_catalogo -> catalogo por categoria como 'tienda_online_supermarket23.json'
+
+Los datos son reproducibles (dependen solo de la semilla) y usan las categorias y los contenidos netos de
+'canasta.json', de modo que toda la cadena de utils.py (conversion, agrupacion, estandarizacion, medianas y
+costo) funciona sobre ellos igual que sobre los datos reales
+"""
+import json
+import os
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Punto de referencia (hospital) alrededor del cual se ubican las tiendas sinteticas
+LAT_HOSPITAL = 23.1136
+LON_HOSPITAL = -82.3810
+
+_MULTIPLOS_ENVASE = np.array([0.25, 0.5, 1, 1, 1, 1.5, 2, 4]) # tamaños de envase respecto al contenido de referencia
+_ORIGENES = ['importado', 'nacional', '']
+_PROBABILIDAD_ORIGENES = [0.86, 0.13, 0.01]
+
+
+def cargar_canasta(path=None):
+    with open(path or os.path.join(RAIZ, 'fuentes', 'canasta.json'), 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _unidad(definicion):
+    # 'unidad' o 'unidad_minima_observada' tienen la forma '1000 ml', '590 g' o '1 u'
+    texto = definicion.get('unidad') or definicion.get('unidad_minima_observada') or ''
+    return texto.split()[-1] if texto else 'u'
+
+
+def _precios_referencia(rng, canasta):
+    # Precio en CUP de la presentacion de referencia de cada categoria
+    return rng.lognormal(mean=np.log(300), sigma=0.6, size=len(canasta))
+
+
+def generar_tiendas(n_tiendas, productos_por_tienda=12, semilla=0, canasta=None):
+    """
+    Genera una muestra sintetica de tiendas (MIPYMES)
+
+    Args:
+        n_tiendas (int): cantidad de tiendas
+        productos_por_tienda (int): promedio de productos por tienda (Poisson)
+        semilla (int): semilla del generador
+        canasta (dict): canasta de referencia (por defecto 'fuentes/canasta.json')
+
+    Returns:
+        list: tiendas con las keys store_id, name, coordinates, distance_to_hospital, collection_date,
+        evidence_path y products
+    """
+    canasta = canasta or cargar_canasta()
+    rng = np.random.default_rng(semilla)
+    categorias = list(canasta.keys())
+    contenidos = np.array([canasta[c]['contenido_neto'] for c in categorias], dtype=np.float64)
+    unidades = [_unidad(canasta[c]) for c in categorias]
+    precios_referencia = _precios_referencia(rng, canasta)
+
+    cantidades = rng.poisson(productos_por_tienda, size=n_tiendas)
+    total = int(cantidades.sum())
+
+    # Columnas de productos generadas en bloque
+    cat = rng.integers(0, len(categorias), size=total)
+    multiplo = rng.choice(_MULTIPLOS_ENVASE, size=total)
+    peso = np.maximum(np.round(contenidos[cat] * multiplo), 1)
+    precio = np.round(precios_referencia[cat] * multiplo * rng.lognormal(0, 0.25, size=total), -1)
+    origen = rng.choice(len(_ORIGENES), size=total, p=_PROBABILIDAD_ORIGENES)
+    marca = rng.integers(0, 40, size=total)
+
+    # Columnas de tiendas
+    lat = LAT_HOSPITAL + rng.normal(0, 0.02, size=n_tiendas)
+    lon = LON_HOSPITAL + rng.normal(0, 0.02, size=n_tiendas)
+    distancia = np.round(np.hypot((lat - LAT_HOSPITAL) * 111.0, (lon - LON_HOSPITAL) * 102.0), 2)
+    dias = rng.integers(0, 60, size=n_tiendas)
+    fechas = (np.datetime64('2025-11-01') + dias).astype(str)
+
+    tiendas = []
+    inicio = 0
+    for t in range(n_tiendas):
+        final = inicio + int(cantidades[t])
+        productos = [{
+            'name': f"{categorias[c]} {int(p)} {unidades[c]}",
+            'category': categorias[c],
+            'brand': f"marca {m}",
+            'unit': unidades[c],
+            'origin': _ORIGENES[o],
+            'price_cup': float(pr),
+            'net_weight': float(p),
+        } for c, p, pr, o, m in zip(cat[inicio:final].tolist(), peso[inicio:final].tolist(),
+                                    precio[inicio:final].tolist(), origen[inicio:final].tolist(),
+                                    marca[inicio:final].tolist())]
+        inicio = final
+
+        store_id = f"SIN{t:07d}"
+        tiendas.append({
+            'store_id': store_id,
+            'name': f"Tienda sintetica {t}",
+            'coordinates': {'lat': float(lat[t]), 'lon': float(lon[t])},
+            'distance_to_hospital': float(distancia[t]),
+            'collection_date': str(fechas[t]),
+            'evidence_path': f"evidence/{store_id}.jpg",
+            'products': productos,
+        })
+    return tiendas
+
+
+def generar_catalogo(n_productos, semilla=0, canasta=None):
+    """
+    Genera un catalogo sintetico de tienda online con precios en USD
+
+    Args:
+        n_productos (int): cantidad total de productos
+        semilla (int): semilla del generador
+        canasta (dict): canasta de referencia (por defecto 'fuentes/canasta.json')
+
+    Returns:
+        dict: {categoria: [{'name', 'price_usd', 'unit', 'net_weight'}, ...]}
+    """
+    canasta = canasta or cargar_canasta()
+    rng = np.random.default_rng(semilla)
+    categorias = list(canasta.keys())
+    contenidos = np.array([canasta[c]['contenido_neto'] for c in categorias], dtype=np.float64)
+    unidades = [_unidad(canasta[c]) for c in categorias]
+    precios_referencia = _precios_referencia(rng, canasta) / 450 # aproximadamente en USD
+
+    cat = rng.integers(0, len(categorias), size=n_productos)
+    multiplo = rng.choice(_MULTIPLOS_ENVASE, size=n_productos)
+    peso = np.maximum(np.round(contenidos[cat] * multiplo), 1)
+    precio = np.round(precios_referencia[cat] * multiplo * rng.lognormal(0, 0.25, size=n_productos), 2)
+
+    catalogo = {categoria: [] for categoria in categorias}
+    for c, p, pr in zip(cat.tolist(), peso.tolist(), precio.tolist()):
+        catalogo[categorias[c]].append({
+            'name': f"{categorias[c]} {int(p)} {unidades[c]}",
+            'price_usd': max(pr, 0.01),
+            'unit': unidades[c],
+            'net_weight': float(p),
+        })
+    return catalogo
+
+
+def escribir_json(datos, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(datos, file, ensure_ascii=False)
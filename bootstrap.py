@@ -0,0 +1,157 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import tabla_productos
+from tabla_productos import TablaProductos
+
+
+#======================Intervalos de confianza por bootstrap==========================================================
+
+REPLICAS_POR_BLOQUE = 1000 # replicas que procesa cada tarea del pool de procesos
+ELEMENTOS_POR_LOTE = 1 << 21 # tamaño maximo (replicas x precios) de las matrices de pesos de una categoria
+
+
+def _medianas_ponderadas(precios_ordenados, pesos):
+    """
+    Mediana de cada fila de una matriz de pesos sobre los mismos precios ordenados
+
+    pesos[b, j] es cuantas veces aparece precios_ordenados[j] en la replica b. La mediana de la replica
+    se ubica con la suma acumulada de pesos (los elementos centrales estan en las posiciones (n-1)//2 y n//2)
+
+    Returns:
+        np.ndarray: una mediana por replica (NaN si la replica no tiene ningun precio de la categoria)
+    """
+    acumulados = np.cumsum(pesos, axis=1)
+    n = acumulados[:, -1]
+    # primer indice donde la suma acumulada supera la posicion buscada
+    j_bajo = (acumulados > ((n - 1) // 2)[:, np.newaxis]).argmax(axis=1)
+    j_alto = (acumulados > (n // 2)[:, np.newaxis]).argmax(axis=1)
+    medianas = (precios_ordenados[j_alto] + precios_ordenados[j_bajo]) / 2
+    return np.where(n > 0, medianas, np.nan)
+
+
+def _bloque_bootstrap(semilla, replicas, n_tiendas, categorias, remuestrear_productos):
+    """
+    Ejecuta un bloque de replicas. Es una funcion de modulo para poder enviarla al pool de procesos
+
+    Las matrices de pesos de cada categoria se arman por lotes de replicas de a lo sumo ELEMENTOS_POR_LOTE
+    elementos, de modo que la memoria no crece con el producto replicas x precios de las categorias grandes.
+    Los lotes consumen el generador en el mismo orden, asi que el resultado no depende de su tamaño
+
+    Args:
+        semilla (np.random.SeedSequence): semilla propia de este bloque
+        replicas (int): cantidad de replicas del bloque
+        n_tiendas (int): tamaño de la muestra de tiendas
+        categorias (list): por categoria, (precios ordenados, tienda de cada precio)
+        remuestrear_productos (bool): ademas de las tiendas, remuestrear los productos dentro de cada categoria
+
+    Returns:
+        np.ndarray: matriz (replicas, categorias) con las medianas de cada replica
+    """
+    rng = np.random.default_rng(semilla)
+
+    # Matriz de indices de tiendas remuestreadas (replicas x n_tiendas) y cuantas veces salio cada tienda
+    indices = rng.integers(0, n_tiendas, size=(replicas, n_tiendas))
+    desplazamiento = (np.arange(replicas) * n_tiendas)[:, np.newaxis]
+    veces_tienda = np.bincount((indices + desplazamiento).ravel(),
+                               minlength=replicas * n_tiendas).reshape(replicas, n_tiendas)
+
+    medianas = np.empty((replicas, len(categorias)), dtype=np.float64)
+    for k, (precios_ordenados, tiendas) in enumerate(categorias):
+        lote = max(1, ELEMENTOS_POR_LOTE // len(tiendas))
+        for inicio in range(0, replicas, lote):
+            pesos = veces_tienda[inicio:inicio + lote, tiendas]
+            if remuestrear_productos:
+                # Segunda etapa: se sacan con reemplazo tantos productos como tenga la replica
+                n = pesos.sum(axis=1)
+                probabilidades = pesos / np.maximum(n, 1)[:, np.newaxis]
+                probabilidades[n == 0] = 1 / len(tiendas)
+                pesos = rng.multinomial(n, probabilidades)
+            medianas[inicio:inicio + lote, k] = _medianas_ponderadas(precios_ordenados, pesos)
+    return medianas
+
+
+def _intervalo(valores, estimacion, nivel):
+    alfa = (1 - nivel) / 2
+    inferior, superior = np.nanpercentile(valores, [100 * alfa, 100 * (1 - alfa)])
+    return {'estimacion': estimacion, 'inferior': inferior.item(), 'superior': superior.item()}
+
+
+def intervalos_bootstrap(tabla, canasta, replicas=10000, nivel=0.95, semilla=0,
+                         remuestrear_productos=False, procesos=None):
+    """
+    Intervalos de confianza por bootstrap para el precio mediano de cada categoria y el costo total de la canasta
+
+    Cada replica remuestrea con reemplazo las tiendas de la muestra (y opcionalmente los productos dentro de
+    cada categoria) y recalcula las medianas estandarizadas y el costo total. Las replicas se generan como
+    matrices de indices en bloques de REPLICAS_POR_BLOQUE y los bloques se reparten en un pool de procesos.
+    Cada bloque tiene su propia semilla derivada de 'semilla', por lo que el resultado es el mismo
+    independientemente de la cantidad de procesos
+
+    Args:
+        tabla (TablaProductos | list): tabla de productos o lista de tiendas (MIPYMES)
+        canasta (dict): canasta definida para el proyecto
+        replicas (int): cantidad de replicas bootstrap
+        nivel (float): nivel de confianza de los intervalos (percentiles)
+        semilla (int): semilla para reproducir el resultado
+        remuestrear_productos (bool): remuestrear tambien los productos dentro de cada categoria
+        procesos (int): procesos del pool (None = todos los nucleos, 1 = sin pool)
+
+    Returns:
+        dict: {
+            'replicas': int, 'nivel': float,
+            'precio_mediano': {categoria: {'estimacion', 'inferior', 'superior'}},
+            'costo_total': {'estimacion', 'inferior', 'superior'}
+        }
+        En las replicas donde una categoria no aparece su mediana es NaN y esa replica no se usa en el
+        intervalo del costo total
+    """
+    if not isinstance(tabla, TablaProductos):
+        tabla = tabla_productos.construir_tabla_productos(tabla)
+
+    precios = tabla_productos.estandarizar_precios_unidad_modal(tabla, canasta)
+    estimaciones = tabla_productos.calcular_precio_mediano_por_categoria(tabla, precios)
+
+    # Por categoria: precios ordenados y la tienda de cada uno (se ordena una sola vez)
+    orden, grupos, inicios = tabla_productos.indices_por_grupo(tabla.categoria)
+    finales = np.append(inicios[1:], len(orden))
+    categorias = []
+    for inicio, final in zip(inicios, finales):
+        filas = orden[inicio:final]
+        por_precio = np.argsort(precios[filas], kind='stable')
+        categorias.append((precios[filas][por_precio], tabla.tienda[filas][por_precio]))
+    nombres = [tabla.categorias[c] for c in grupos]
+    cantidades = np.asarray([canasta[nombre]['cantidad_semanal'] for nombre in nombres], dtype=np.float64)
+
+    # Bloques de replicas con semillas independientes
+    tamanos = [REPLICAS_POR_BLOQUE] * (replicas // REPLICAS_POR_BLOQUE)
+    if replicas % REPLICAS_POR_BLOQUE:
+        tamanos.append(replicas % REPLICAS_POR_BLOQUE)
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    argumentos = [(semilla_bloque, tamano, tabla.n_tiendas, categorias, remuestrear_productos)
+                  for semilla_bloque, tamano in zip(semillas, tamanos)]
+
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    if procesos == 1 or len(argumentos) == 1:
+        bloques = [_bloque_bootstrap(*args) for args in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            bloques = list(pool.map(_bloque_bootstrap, *zip(*argumentos)))
+    medianas = np.concatenate(bloques, axis=0)
+
+    costos = medianas @ cantidades # NaN si falta alguna categoria en la replica
+
+    costo_total = 0
+    for nombre in nombres:
+        costo_total += canasta[nombre]['cantidad_semanal'] * estimaciones[nombre]
+
+    return {
+        'replicas': replicas,
+        'nivel': nivel,
+        'precio_mediano': {nombre: _intervalo(medianas[:, k], estimaciones[nombre], nivel)
+                           for k, nombre in enumerate(nombres)},
+        'costo_total': _intervalo(costos, costo_total, nivel),
+    }
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import tabla_productos
+from tabla_productos import TablaProductos
+
+
+#======================Cache binaria columnar de las fuentes==========================================================
+
+VERSION_CACHE = 1 # se incrementa si cambia el formato de los archivos de la cache
+
+_META = 'meta.json'
+
+
+def hash_archivo(path, tamano_bloque=1 << 20):
+    """
+    Calcula el sha256 del contenido de un archivo leyendolo por bloques
+
+    Args:
+        path (str): ruta del archivo
+
+    Returns:
+        str: hash en hexadecimal
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for bloque in iter(lambda: file.read(tamano_bloque), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def directorio_cache(path, directorio=None):
+    """
+    Directorio donde se guarda la cache de una fuente. Por defecto es '.cache/<nombre sin extension>'
+    junto al archivo JSON (por ejemplo 'fuentes/.cache/tiendas_privadas')
+    """
+    if directorio is None:
+        directorio = os.path.join(os.path.dirname(os.path.abspath(path)), '.cache')
+    nombre = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(directorio, nombre)
+
+
+def guardar_tabla(tabla, directorio, meta=None):
+    """
+    Guarda una TablaProductos en disco: un archivo .npy por columna numerica y un meta.json con los
+    diccionarios de valores, las columnas de texto de las tiendas y los datos de la fuente
+
+    El meta.json se escribe al final (con reemplazo atomico), por lo que una cache a medio escribir
+    nunca se considera valida
+
+    Args:
+        tabla (TablaProductos)
+        directorio (str): directorio destino (se crea si no existe)
+        meta (dict): datos adicionales a guardar en meta.json (por ejemplo mtime y hash de la fuente)
+    """
+    os.makedirs(directorio, exist_ok=True)
+    ruta_meta = os.path.join(directorio, _META)
+    if os.path.exists(ruta_meta):
+        os.remove(ruta_meta)
+
+    for clave, columna in tabla.columnas().items():
+        np.save(os.path.join(directorio, clave + '.npy'), np.ascontiguousarray(columna))
+
+    columnas_tiendas = tabla.columnas_tiendas()
+    textos_tiendas = {}
+    for clave, columna in columnas_tiendas.items():
+        if isinstance(columna, np.ndarray):
+            np.save(os.path.join(directorio, 'tienda_' + clave + '.npy'), np.ascontiguousarray(columna))
+        else:
+            textos_tiendas[clave] = list(columna)
+
+    contenido = dict(meta or {})
+    contenido['version'] = VERSION_CACHE
+    contenido['diccionarios'] = tabla.diccionarios()
+    contenido['textos_tiendas'] = textos_tiendas
+
+    temporal = ruta_meta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as file:
+        json.dump(contenido, file, ensure_ascii=False)
+    os.replace(temporal, ruta_meta)
+
+
+def abrir_tabla(directorio, mmap=True):
+    """
+    Abre una TablaProductos guardada con guardar_tabla
+
+    Args:
+        directorio (str): directorio de la tabla
+        mmap (bool): si es True las columnas se mapean en memoria (solo lectura) en lugar de leerse completas
+
+    Returns:
+        tuple: (tabla, meta) donde meta es el contenido de meta.json
+    """
+    with open(os.path.join(directorio, _META), 'r', encoding='utf-8') as file:
+        meta = json.load(file)
+
+    modo = 'r' if mmap else None
+    columnas = {clave: np.load(os.path.join(directorio, clave + '.npy'), mmap_mode=modo)
+                for clave in TablaProductos.COLUMNAS}
+
+    tiendas = dict(meta['textos_tiendas'])
+    for clave in TablaProductos.COLUMNAS_TIENDAS:
+        if clave not in tiendas:
+            tiendas[clave] = np.load(os.path.join(directorio, 'tienda_' + clave + '.npy'), mmap_mode=modo)
+
+    return TablaProductos(columnas, meta['diccionarios'], tiendas), meta
+
+
+def _leer_meta(directorio):
+    try:
+        with open(os.path.join(directorio, _META), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _cargar_con_cache(path, construir, directorio=None, mmap=True):
+    """
+    Devuelve la tabla de una fuente desde la cache si sigue vigente, o la reconstruye a partir del JSON
+
+    La cache es vigente si coinciden el mtime y el tamaño del JSON. Si el mtime cambio pero el contenido
+    (sha256) es el mismo, solo se actualiza el meta.json sin volver a parsear el JSON
+    """
+    destino = directorio_cache(path, directorio)
+    estado = os.stat(path)
+    meta = _leer_meta(destino)
+
+    if meta is not None and meta.get('version') == VERSION_CACHE and meta.get('constructor') == construir.__name__:
+        if meta.get('mtime_ns') == estado.st_mtime_ns and meta.get('tamano') == estado.st_size:
+            return abrir_tabla(destino, mmap)[0]
+
+        sha = hash_archivo(path)
+        if meta.get('sha256') == sha:
+            meta['mtime_ns'] = estado.st_mtime_ns
+            meta['tamano'] = estado.st_size
+            temporal = os.path.join(destino, _META + '.tmp')
+            with open(temporal, 'w', encoding='utf-8') as file:
+                json.dump(meta, file, ensure_ascii=False)
+            os.replace(temporal, os.path.join(destino, _META))
+            return abrir_tabla(destino, mmap)[0]
+    else:
+        sha = hash_archivo(path)
+
+    # La fuente es nueva o cambio: se parsea el JSON una vez y se guarda la version binaria
+    with open(path, 'r', encoding='utf-8') as file:
+        datos = json.load(file)
+    tabla = construir(datos)
+    guardar_tabla(tabla, destino, {
+        'fuente': os.path.abspath(path),
+        'constructor': construir.__name__,
+        'mtime_ns': estado.st_mtime_ns,
+        'tamano': estado.st_size,
+        'sha256': sha,
+    })
+    return abrir_tabla(destino, mmap)[0]
+
+
+def cargar_tabla_productos_en_cache(path, directorio=None, mmap=True):
+    """
+    Carga una fuente de tiendas (formato de 'tiendas_privadas.json') como TablaProductos usando la cache binaria
+
+    La primera vez se parsea el JSON y se guardan las columnas en '.cache/' junto a la fuente. Las siguientes
+    veces las columnas se mapean en memoria directamente desde los .npy, y la cache se reconstruye sola cuando
+    cambia el contenido del JSON
+
+    Args:
+        path (str): ruta del JSON de tiendas
+        directorio (str): directorio raiz de la cache (por defecto '.cache' junto al JSON)
+        mmap (bool): mapear las columnas en memoria (solo lectura)
+
+    Returns:
+        TablaProductos
+    """
+    return _cargar_con_cache(path, tabla_productos.construir_tabla_productos, directorio, mmap)
+
+
+def cargar_tabla_catalogo_en_cache(path, directorio=None, mmap=True):
+    """
+    Carga el catalogo de la tienda online (formato de 'tienda_online_supermarket23.json') como TablaProductos
+    usando la cache binaria. Los precios quedan en la columna precio_usd; para obtener precio_cup se usa
+    utils.convertir_usd_a_cup(tabla, tasa), que devuelve una tabla nueva sin tocar la cache
+
+    Args:
+        path (str): ruta del JSON del catalogo
+        directorio (str): directorio raiz de la cache (por defecto '.cache' junto al JSON)
+        mmap (bool): mapear las columnas en memoria (solo lectura)
+
+    Returns:
+        TablaProductos
+    """
+    return _cargar_con_cache(path, tabla_productos.construir_tabla_catalogo, directorio, mmap)
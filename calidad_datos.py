@@ -0,0 +1,325 @@
+import json
+
+import numpy as np
+
+import normalizador
+import tabla_productos
+import utils
+from tabla_productos import TablaProductos
+
+
+#======================Revision de calidad de los datos al cargarlos==========================================================
+
+# Problemas por producto (se combinan como bits en la columna 'problemas'). Los de esquema coinciden con las
+# alertas de normalizador.py
+PESO_FALTANTE = normalizador.PESO_FALTANTE
+PESO_NO_POSITIVO = normalizador.PESO_NO_POSITIVO
+UNIDAD_DESCONOCIDA = normalizador.UNIDAD_DESCONOCIDA
+UNIDAD_INCOMPATIBLE = normalizador.UNIDAD_INCOMPATIBLE # por ejemplo yogurt en 'g' con la canasta en ml
+PRECIO_FALTANTE = normalizador.PRECIO_FALTANTE
+SIN_REFERENCIA = normalizador.SIN_REFERENCIA
+PRECIO_NO_POSITIVO = 64
+ORIGEN_DESCONOCIDO = 128 # 'origin' fuera de origenes_validos
+NOMBRE_VACIO = 256
+ATIPICO_MAD = 512 # precio normalizado con z robusto (mediana / MAD) mayor que umbral_mad
+ATIPICO_IQR = 1024 # precio normalizado fuera de [Q1 - k * IQR, Q3 + k * IQR]
+
+NOMBRES_PROBLEMAS = dict(normalizador.NOMBRES_ALERTAS)
+NOMBRES_PROBLEMAS.update({
+    PRECIO_NO_POSITIVO: 'precio_no_positivo',
+    ORIGEN_DESCONOCIDO: 'origen_desconocido',
+    NOMBRE_VACIO: 'nombre_vacio',
+    ATIPICO_MAD: 'atipico_mad',
+    ATIPICO_IQR: 'atipico_iqr',
+})
+
+# Problemas que impiden usar el producto en las medianas (con ellos estandarizar_precios_unidad_modal divide
+# por cero o da un precio sin sentido)
+INVALIDANTES = PESO_FALTANTE | PESO_NO_POSITIVO | UNIDAD_DESCONOCIDA | PRECIO_FALTANTE | PRECIO_NO_POSITIVO
+
+# z robusto: 0.6745 * (x - mediana) / MAD es comparable con el z de una normal
+_CONSTANTE_MAD = 0.6745
+# Si MAD es 0 (mas de la mitad de los precios iguales) se usa la desviacion absoluta media escalada
+_CONSTANTE_DESVIACION_MEDIA = 1.253314
+
+
+def cuantiles_por_grupo(valores, grupos, n_grupos, cuantiles):
+    """
+    Cuantiles de cada grupo con un solo ordenamiento de toda la columna (sin recorrer los grupos), con la misma
+    interpolacion lineal que np.quantile
+
+    Args:
+        valores (np.ndarray[float64]): sin NaN
+        grupos (np.ndarray[int]): grupo de cada valor, entre 0 y n_grupos - 1
+        n_grupos (int)
+        cuantiles (tuple): cuantiles entre 0 y 1
+
+    Returns:
+        tuple: (np.ndarray de forma (len(cuantiles), n_grupos) con NaN en los grupos vacios, conteo por grupo)
+    """
+    orden = np.lexsort((valores, grupos))
+    ordenados = valores[orden]
+    conteo = np.bincount(grupos, minlength=n_grupos)
+    inicios = np.cumsum(conteo) - conteo
+    con_datos = conteo > 0
+    resultado = np.full((len(cuantiles), n_grupos), np.nan)
+    for k, cuantil in enumerate(cuantiles):
+        posicion = inicios[con_datos] + cuantil * (conteo[con_datos] - 1)
+        abajo = np.floor(posicion).astype(np.int64)
+        arriba = np.ceil(posicion).astype(np.int64)
+        fraccion = posicion - abajo
+        resultado[k, con_datos] = ordenados[abajo] * (1 - fraccion) + ordenados[arriba] * fraccion
+    return resultado, conteo
+
+
+class ResultadoCalidad:
+    """
+    Resultado de revisar_tabla: columnas alineadas con las filas de la TablaProductos revisada
+
+    Columnas:
+        problemas (np.ndarray[int16]): combinacion de bits PESO_FALTANTE, ..., ATIPICO_IQR (0 = sin problemas)
+        precio_normalizado (np.ndarray[float64]): precio de la presentacion de referencia (normalizador.py)
+        z_robusto (np.ndarray[float64]): z robusto del logaritmo del precio normalizado dentro de su categoria
+        cuarentena (np.ndarray[bool]): filas apartadas (problemas invalidantes o atipicas segun 'metodo')
+
+    Estadisticas por categoria (self.estadisticas, {categoria: dict}) calculadas sobre el logaritmo del precio
+    normalizado y expresadas en CUP: n, mediana, mad (factor multiplicativo), q1, q3, limite_inferior_iqr,
+    limite_superior_iqr, limite_inferior_mad, limite_superior_mad
+    """
+
+    def __init__(self, tabla, problemas, precio_normalizado, z_robusto, cuarentena, estadisticas, parametros):
+        self.tabla = tabla
+        self.problemas = problemas
+        self.precio_normalizado = precio_normalizado
+        self.z_robusto = z_robusto
+        self.cuarentena = cuarentena
+        self.estadisticas = estadisticas
+        self.parametros = parametros
+
+    def __len__(self):
+        return len(self.problemas)
+
+    def con_problema(self, problema):
+        """Mascara de las filas con el problema indicado (por ejemplo ATIPICO_MAD o PESO_NO_POSITIVO)"""
+        return (self.problemas & problema) != 0
+
+    def tabla_limpia(self):
+        """TablaProductos sin las filas en cuarentena (las columnas de tiendas se conservan)"""
+        return self.tabla.seleccionar_filas(~self.cuarentena)
+
+    def tabla_cuarentena(self):
+        """TablaProductos con solo las filas en cuarentena"""
+        return self.tabla.seleccionar_filas(self.cuarentena)
+
+    def resumen(self):
+        """
+        Returns:
+            dict: {nombre del problema: cantidad de productos con ese problema}
+        """
+        return {nombre: int(np.count_nonzero(self.con_problema(problema))) for problema, nombre in NOMBRES_PROBLEMAS.items()}
+
+    def reporte(self, ejemplos=10):
+        """
+        Reporte de la revision (serializable a JSON)
+
+        Args:
+            ejemplos (int): cantidad maxima de productos en cuarentena que se incluyen completos
+
+        Returns:
+            dict: {'filas', 'en_cuarentena', 'parametros', 'problemas' (ver resumen), 'categorias' (estadisticas
+            mas la cantidad de problemas de cada categoria) y 'ejemplos' (productos en cuarentena con su tienda,
+            sus problemas y su z robusto)}
+        """
+        tabla = self.tabla
+        categorias = {}
+        for codigo, categoria in enumerate(tabla.categorias):
+            de_categoria = tabla.categoria == codigo
+            if not de_categoria.any():
+                continue
+            detalle = dict(self.estadisticas.get(categoria, {}))
+            detalle['en_cuarentena'] = int(np.count_nonzero(self.cuarentena & de_categoria))
+            for problema, nombre in NOMBRES_PROBLEMAS.items():
+                cantidad = int(np.count_nonzero(self.con_problema(problema) & de_categoria))
+                if cantidad:
+                    detalle[nombre] = cantidad
+            categorias[categoria] = detalle
+
+        lista = []
+        for fila in np.flatnonzero(self.cuarentena)[:ejemplos]:
+            producto = tabla.producto(fila)
+            producto['store_id'] = tabla.tienda_ids[tabla.tienda[fila]]
+            producto['problemas'] = [nombre for problema, nombre in NOMBRES_PROBLEMAS.items() if self.problemas[fila] & problema]
+            producto['z_robusto'] = None if np.isnan(self.z_robusto[fila]) else round(float(self.z_robusto[fila]), 2)
+            lista.append(producto)
+
+        return {
+            'filas': len(self),
+            'en_cuarentena': int(np.count_nonzero(self.cuarentena)),
+            'parametros': self.parametros,
+            'problemas': self.resumen(),
+            'categorias': categorias,
+            'ejemplos': lista,
+        }
+
+    def guardar_reporte(self, path, ejemplos=10):
+        """Guarda reporte() en un archivo JSON"""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.reporte(ejemplos), file, ensure_ascii=False, indent=2, default=_a_json)
+
+
+def _a_json(valor):
+    # Los productos reconstruidos pueden tener NaN o escalares de NumPy
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"{type(valor).__name__} no es serializable")
+
+
+def _estadisticas(tabla, logaritmo, validos, minimo_por_categoria, umbral_mad, k_iqr):
+    """Mediana, MAD, Q1 y Q3 del logaritmo del precio de cada categoria y z robusto de cada fila, sin bucles por fila"""
+    n_categorias = len(tabla.categorias)
+    grupos = tabla.categoria[validos]
+    valores = logaritmo[validos]
+    (mediana, q1, q3), conteo = cuantiles_por_grupo(valores, grupos, n_categorias, (0.5, 0.25, 0.75))
+
+    desviacion = np.abs(valores - mediana[grupos])
+    (mad,), _ = cuantiles_por_grupo(desviacion, grupos, n_categorias, (0.5,))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        desviacion_media = np.bincount(grupos, weights=desviacion, minlength=n_categorias) / conteo
+    escala = np.where(mad > 0, mad / _CONSTANTE_MAD, desviacion_media * _CONSTANTE_DESVIACION_MEDIA)
+    # Categorias con pocos precios o todos iguales: sin estadisticas para marcar atipicos
+    sin_escala = (conteo < minimo_por_categoria) | ~(escala > 0)
+    escala[sin_escala] = np.nan
+
+    z = np.full(len(tabla), np.nan)
+    with np.errstate(invalid='ignore'):
+        z[validos] = (valores - mediana[grupos]) / escala[grupos]
+    iqr = q3 - q1
+    inferior_iqr, superior_iqr = q1 - k_iqr * iqr, q3 + k_iqr * iqr
+    inferior_iqr[conteo < minimo_por_categoria] = np.nan
+    superior_iqr[conteo < minimo_por_categoria] = np.nan
+
+    estadisticas = {}
+    for codigo, categoria in enumerate(tabla.categorias):
+        if conteo[codigo] == 0:
+            continue
+        estadisticas[categoria] = {
+            'n': int(conteo[codigo]),
+            'mediana': _a_precio(mediana[codigo]),
+            'mad': _a_precio(mad[codigo]),
+            'q1': _a_precio(q1[codigo]),
+            'q3': _a_precio(q3[codigo]),
+            'limite_inferior_iqr': _a_precio(inferior_iqr[codigo]),
+            'limite_superior_iqr': _a_precio(superior_iqr[codigo]),
+            'limite_inferior_mad': _a_precio(mediana[codigo] - umbral_mad * escala[codigo]),
+            'limite_superior_mad': _a_precio(mediana[codigo] + umbral_mad * escala[codigo]),
+        }
+    return z, inferior_iqr, superior_iqr, estadisticas
+
+
+def _a_precio(logaritmo):
+    return None if np.isnan(logaritmo) else round(float(np.exp(logaritmo)), 4)
+
+
+def revisar_tabla(tabla, canasta=None, metodo='mad', umbral_mad=3.5, k_iqr=1.5, minimo_por_categoria=5,
+                  origenes_validos=('nacional', 'importado'), cuarentena_incompatibles=False):
+    """
+    Revision de calidad de toda la tabla de productos en una pasada vectorizada: problemas de esquema
+    (peso o precio ausente o no positivo, unidad desconocida o incompatible con la canasta, origen
+    desconocido, nombre vacio) y precios atipicos dentro de su categoria
+
+    Los atipicos se buscan sobre el logaritmo del precio normalizado a la presentacion de referencia
+    (normalizador.normalizar_precios), porque los precios varian de forma multiplicativa. Las estadisticas
+    robustas de todas las categorias (mediana, MAD, Q1, Q3) salen de un ordenamiento de la columna
+    completa, no de un bucle por categoria ni por producto
+
+    Args:
+        tabla (TablaProductos | list): tabla de productos o lista de tiendas (MIPYMES)
+        canasta (dict): canasta definida para el proyecto (presentaciones de referencia). Sin canasta se
+            compara el precio por unidad de contenido y no se revisa la unidad de cada categoria
+        metodo (str): 'mad', 'iqr' o 'ambos': que atipicos van a cuarentena (las dos marcas se calculan siempre)
+        umbral_mad (float): z robusto a partir del cual un precio es atipico
+        k_iqr (float): multiplo del rango intercuartil de las vallas de Tukey
+        minimo_por_categoria (int): categorias con menos precios validos no marcan atipicos
+        origenes_validos (tuple): valores aceptados en 'origin'; None para no revisarlo (por ejemplo en el
+            catalogo de la tienda online, que no tiene origen)
+        cuarentena_incompatibles (bool): poner en cuarentena los productos con UNIDAD_INCOMPATIBLE (por
+            defecto solo se marcan, ya que utils.py compara 1 g con 1 ml)
+
+    Returns:
+        ResultadoCalidad
+
+    Raises:
+        ValueError: si metodo no es 'mad', 'iqr' ni 'ambos'
+    """
+    if metodo not in ('mad', 'iqr', 'ambos'):
+        raise ValueError(f"metodo debe ser 'mad', 'iqr' o 'ambos' (se recibio {metodo!r})")
+    if not isinstance(tabla, TablaProductos):
+        tabla = tabla_productos.construir_tabla_productos(tabla)
+
+    if canasta is not None:
+        normalizada = normalizador.normalizar_precios(tabla, canasta)
+    else:
+        normalizada = normalizador.normalizar_precios(tabla, referencias={c: (1.0, None) for c in tabla.categorias})
+    problemas = normalizada.alertas.astype(np.int16)
+
+    with np.errstate(invalid='ignore'):
+        precio_no_positivo = tabla.precio_cup <= 0
+    problemas[precio_no_positivo] |= PRECIO_NO_POSITIVO
+    if origenes_validos is not None:
+        origen_valido = np.array([origen in origenes_validos for origen in tabla.origenes], dtype=bool)
+        if len(origen_valido):
+            problemas[~origen_valido[tabla.origen]] |= ORIGEN_DESCONOCIDO
+    nombre_vacio = np.array([not str(nombre or '').strip() for nombre in tabla.nombres], dtype=bool)
+    if len(nombre_vacio):
+        problemas[nombre_vacio[tabla.nombre]] |= NOMBRE_VACIO
+
+    invalidantes = INVALIDANTES | (SIN_REFERENCIA if canasta is not None else 0)
+    if cuarentena_incompatibles:
+        invalidantes |= UNIDAD_INCOMPATIBLE
+    with np.errstate(invalid='ignore', divide='ignore'):
+        logaritmo = np.log(normalizada.precio)
+    validos = ((problemas & invalidantes) == 0) & np.isfinite(logaritmo)
+
+    z, inferior_iqr, superior_iqr, estadisticas = _estadisticas(tabla, logaritmo, validos, minimo_por_categoria,
+                                                                umbral_mad, k_iqr)
+    with np.errstate(invalid='ignore'):
+        problemas[np.abs(z) > umbral_mad] |= ATIPICO_MAD
+        fuera = (logaritmo < inferior_iqr[tabla.categoria]) | (logaritmo > superior_iqr[tabla.categoria])
+    problemas[validos & fuera] |= ATIPICO_IQR
+
+    atipicos = {'mad': ATIPICO_MAD, 'iqr': ATIPICO_IQR, 'ambos': ATIPICO_MAD | ATIPICO_IQR}[metodo]
+    cuarentena = (problemas & invalidantes) != 0
+    if metodo == 'ambos':
+        # 'ambos': atipico para los dos criterios
+        cuarentena |= (problemas & atipicos) == atipicos
+    else:
+        cuarentena |= (problemas & atipicos) != 0
+
+    parametros = {'metodo': metodo, 'umbral_mad': umbral_mad, 'k_iqr': k_iqr,
+                  'minimo_por_categoria': minimo_por_categoria, 'cuarentena_incompatibles': cuarentena_incompatibles}
+    return ResultadoCalidad(tabla, problemas, normalizada.precio, z, cuarentena, estadisticas, parametros)
+
+
+def cargar_tabla_revisada(path, canasta=None, reporte=None, **opciones):
+    """
+    Carga las tiendas de un archivo JSON como TablaProductos (utils.cargar_tabla_productos) y la revisa una
+    sola vez, al cargarla
+
+    Ejemplo:
+        revision = calidad_datos.cargar_tabla_revisada('fuentes/tiendas_privadas.json', canasta,
+                                                       reporte='fuentes/.cache/calidad_tiendas.json')
+        tabla = revision.tabla_limpia()
+
+    Args:
+        path (str): archivo con la lista de tiendas
+        canasta (dict): ver revisar_tabla
+        reporte (str): si se indica, se guarda ahi el reporte JSON
+        **opciones: demas argumentos de revisar_tabla
+
+    Returns:
+        ResultadoCalidad
+    """
+    resultado = revisar_tabla(utils.cargar_tabla_productos(path), canasta, **opciones)
+    if reporte is not None:
+        resultado.guardar_reporte(reporte)
+    return resultado
@@ -0,0 +1,263 @@
+import heapq
+
+
+#======================Mediana dinamica (dos monticulos)==========================================================
+
+class MedianaDinamica:
+    """
+    Mantiene la mediana de un conjunto de valores que cambia (se agregan y se quitan valores)
+
+    Usa dos monticulos: 'bajos' (max-heap con la mitad menor) y 'altos' (min-heap con la mitad mayor).
+    Agregar y quitar cuestan O(log n) amortizado y la mediana se lee en O(1). Los valores quitados se
+    eliminan de forma perezosa: se anotan en 'borrados' y se descartan cuando llegan a la cima de su
+    monticulo. Si los borrados pendientes superan a los valores vigentes, los monticulos se reconstruyen solo
+    con los vigentes, de modo que la memoria queda acotada por el tamaño actual del conjunto
+    """
+
+    def __init__(self):
+        self.bajos = [] # valores negados para simular un max-heap con heapq
+        self.altos = []
+        self.n_bajos = 0 # cantidad de valores vigentes en cada monticulo (sin contar los borrados)
+        self.n_altos = 0
+        self.borrados = {}
+        self.n_borrados = 0 # borrados pendientes que siguen dentro de los monticulos
+        self.vigentes = {} # {valor: cantidad de apariciones vigentes}
+
+    def __len__(self):
+        return self.n_bajos + self.n_altos
+
+    def _podar(self):
+        # Descartar de la cima de cada monticulo los valores que ya fueron quitados
+        while self.bajos and self.borrados.get(-self.bajos[0]):
+            self._descontar(-heapq.heappop(self.bajos))
+        while self.altos and self.borrados.get(self.altos[0]):
+            self._descontar(heapq.heappop(self.altos))
+
+    def _descontar(self, valor):
+        self.n_borrados -= 1
+        if self.borrados[valor] == 1:
+            del self.borrados[valor]
+        else:
+            self.borrados[valor] -= 1
+
+    def _reconstruir(self):
+        # Monticulos nuevos solo con los valores vigentes: la mitad menor en 'bajos' y la mayor en 'altos'
+        valores = sorted(valor for valor, cantidad in self.vigentes.items() for _ in range(cantidad))
+        mitad = (len(valores) + 1) // 2
+        self.bajos = [-valor for valor in valores[:mitad]]
+        self.altos = valores[mitad:]
+        heapq.heapify(self.bajos)
+        heapq.heapify(self.altos)
+        self.n_bajos = mitad
+        self.n_altos = len(valores) - mitad
+        self.borrados = {}
+        self.n_borrados = 0
+
+    def _equilibrar(self):
+        # Invariante: n_bajos == n_altos o n_bajos == n_altos + 1
+        if self.n_bajos > self.n_altos + 1:
+            heapq.heappush(self.altos, -heapq.heappop(self.bajos))
+            self.n_bajos -= 1
+            self.n_altos += 1
+        elif self.n_bajos < self.n_altos:
+            heapq.heappush(self.bajos, -heapq.heappop(self.altos))
+            self.n_altos -= 1
+            self.n_bajos += 1
+        self._podar()
+
+    def agregar(self, valor):
+        self.vigentes[valor] = self.vigentes.get(valor, 0) + 1
+        if not self.bajos or valor <= -self.bajos[0]:
+            heapq.heappush(self.bajos, -valor)
+            self.n_bajos += 1
+        else:
+            heapq.heappush(self.altos, valor)
+            self.n_altos += 1
+        self._equilibrar()
+
+    def quitar(self, valor):
+        """
+        Quita una aparicion de 'valor'
+
+        Raises:
+            ValueError: si 'valor' no fue agregado (o ya se quitaron todas sus apariciones)
+        """
+        vigentes = self.vigentes.get(valor, 0)
+        if vigentes == 0:
+            raise ValueError(f"El valor {valor!r} no esta en el conjunto")
+        if vigentes == 1:
+            del self.vigentes[valor]
+        else:
+            self.vigentes[valor] = vigentes - 1
+
+        self.borrados[valor] = self.borrados.get(valor, 0) + 1
+        self.n_borrados += 1
+        if self.bajos and valor <= -self.bajos[0]:
+            self.n_bajos -= 1
+        else:
+            self.n_altos -= 1
+        self._podar()
+        self._equilibrar()
+        if self.n_borrados > len(self):
+            self._reconstruir()
+
+    def mediana(self):
+        """
+        Returns:
+            float: la mediana (el promedio de los dos centrales si la cantidad es par) o None si esta vacia
+        """
+        if len(self) == 0:
+            return None
+        if len(self) % 2 == 1:
+            return -self.bajos[0]
+        # mismo orden de la suma que utils.calcular_precio_mediano_por_categoria (central alto + central bajo)
+        return (self.altos[0] + -self.bajos[0]) / 2
+
+
+#======================Agregador incremental de la canasta==========================================================
+
+def aportes_de_tienda(tienda, canasta):
+    """
+    Lo que una encuesta aporta a los indicadores de la canasta. Se calcula completo antes de tocar ningun
+    estado: si un producto falla (categoria fuera de la canasta, net_weight 0) no se agrega nada
+
+    Returns:
+        list: (categoria, origen, precio estandarizado) por producto
+    """
+    aportes = []
+    for producto in tienda['products']:
+        categoria = producto['category']
+        factor_conversion = producto['net_weight'] / canasta[categoria]["contenido_neto"]
+        precio_estandarizado = producto['price_cup'] / factor_conversion
+        aportes.append((categoria, producto['origin'], precio_estandarizado))
+    return aportes
+
+
+class CanastaIncremental:
+    """
+    Mantiene actualizados los indicadores de la canasta a medida que llegan (o se retiran) encuestas de tiendas
+
+    Guarda por categoria: numero de tiendas donde esta disponible, conteo de productos nacionales/importados
+    y una MedianaDinamica con los precios estandarizados. Agregar o quitar una tienda con p productos cuesta
+    O(p log n); las consultas no recorren los productos, solo las categorias de la canasta
+
+    Los resultados coinciden con los de utils.py sobre la muestra actual:
+        conteo_disponibilidad()  == utils.conteo_disponibilidad_categorias(tiendas)
+        conteo_origen()          == utils.conteo_origen(tiendas)
+        precio_mediano_por_categoria() == utils.calcular_precio_mediano_por_categoria(
+                                            utils.estandarizar_precios_unidad_modal(
+                                                utils.agrupar_productos_por_categoria(tiendas), canasta))
+        costo_total()            == utils.costo_total_canasta(canasta, precio_mediano_por_categoria())
+
+    Nota: las categorias aparecen en los diccionarios en el orden en que llegaron por primera vez y se
+    eliminan cuando ya no queda ningun producto de esa categoria en la muestra
+    """
+
+    def __init__(self, canasta, tiendas=()):
+        """
+        Args:
+            canasta (dict): canasta definida para el proyecto
+            tiendas (iterable): tiendas iniciales (opcional)
+        """
+        self.canasta = canasta
+        self.disponibilidad = {}
+        self.origenes = {}
+        self.medianas = {}
+        # por cada tienda: lista de (categoria, origen, precio estandarizado) para poder quitarla despues
+        self.aportes = {}
+        for tienda in tiendas:
+            self.agregar_tienda(tienda)
+
+    @property
+    def n_tiendas(self):
+        return len(self.aportes)
+
+    def agregar_aportes(self, store_id, aportes):
+        """
+        Incorpora una tienda a partir de sus aportes ya calculados con aportes_de_tienda (por ejemplo guardados
+        en una cache, sin volver a leer la encuesta)
+
+        Raises:
+            ValueError: si ya hay una tienda con el mismo 'store_id'
+        """
+        if store_id in self.aportes:
+            raise ValueError(f"La tienda {store_id} ya forma parte de la muestra")
+        aportes = [tuple(aporte) for aporte in aportes]
+        for categoria, origen, precio_estandarizado in aportes:
+            if categoria not in self.medianas:
+                self.medianas[categoria] = MedianaDinamica()
+                self.origenes[categoria] = {'nacional': 0, 'importado': 0}
+                self.disponibilidad[categoria] = 0
+            self.medianas[categoria].agregar(precio_estandarizado)
+            if origen in ('nacional', 'importado'):
+                self.origenes[categoria][origen] += 1
+
+        for categoria in set(categoria for categoria, _, _ in aportes):
+            self.disponibilidad[categoria] += 1
+
+        self.aportes[store_id] = aportes
+
+    def agregar_tienda(self, tienda):
+        """
+        Incorpora una encuesta de tienda (con el esquema de 'tiendas_privadas.json'). Los precios de todos
+        los productos se calculan antes de modificar la muestra: si alguno falla no se agrega nada
+
+        Raises:
+            ValueError: si ya hay una tienda con el mismo 'store_id'
+            KeyError: si algun producto es de una categoria que no esta en la canasta
+            ZeroDivisionError: si algun producto tiene net_weight 0
+        """
+        store_id = tienda['store_id']
+        if store_id in self.aportes:
+            raise ValueError(f"La tienda {store_id} ya forma parte de la muestra")
+        self.agregar_aportes(store_id, aportes_de_tienda(tienda, self.canasta))
+
+    def quitar_tienda(self, store_id):
+        """
+        Retira de la muestra la tienda con ese 'store_id'
+
+        Raises:
+            KeyError: si la tienda no forma parte de la muestra
+        """
+        aportes = self.aportes.pop(store_id)
+
+        for categoria, origen, precio_estandarizado in aportes:
+            self.medianas[categoria].quitar(precio_estandarizado)
+            if origen in ('nacional', 'importado'):
+                self.origenes[categoria][origen] -= 1
+
+        for categoria in set(categoria for categoria, _, _ in aportes):
+            self.disponibilidad[categoria] -= 1
+            if len(self.medianas[categoria]) == 0:
+                del self.medianas[categoria]
+                del self.origenes[categoria]
+                del self.disponibilidad[categoria]
+
+    def reemplazar_tienda(self, tienda):
+        """
+        Actualiza una encuesta ya cargada (por ejemplo una correccion de precios) con la nueva version.
+        Si la nueva version tiene un producto invalido se conserva la anterior
+        """
+        aportes = aportes_de_tienda(tienda, self.canasta)
+        if tienda['store_id'] in self.aportes:
+            self.quitar_tienda(tienda['store_id'])
+        self.agregar_aportes(tienda['store_id'], aportes)
+
+    def conteo_disponibilidad(self):
+        return dict(self.disponibilidad)
+
+    def conteo_origen(self):
+        return {categoria: dict(conteo) for categoria, conteo in self.origenes.items()}
+
+    def precio_mediano_por_categoria(self):
+        return {categoria: mediana.mediana() for categoria, mediana in self.medianas.items()}
+
+    def costo_total(self):
+        """
+        Returns:
+            float: costo total semanal de la canasta con las medianas actuales
+        """
+        costo_total = 0
+        for categoria, mediana in self.medianas.items():
+            costo_total += self.canasta[categoria]['cantidad_semanal'] * mediana.mediana()
+        return costo_total
@@ -0,0 +1,207 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import utils
+from producto_compacto import Producto, congelar_producto
+
+
+#======================Carga concurrente de las fuentes y de las evidencias==========================================================
+
+# atributo del conjunto de datos -> archivo dentro del directorio de fuentes
+FUENTES = {
+    'canasta': 'canasta.json',
+    'tiendas': 'tiendas_privadas.json',
+    'tienda_online': 'tienda_online_supermarket23.json',
+    'datos_onei': 'datos_onei.json',
+    'tasa_informal': 'tasa_informal.json',
+}
+
+_ID_ARCHIVO = re.compile(r'^(\D*)0*(\d+)$')
+
+
+class Evidencia:
+    """
+    Resultado de validar el 'evidence_path' de una tienda
+
+    Atributos:
+        store_id (str)
+        ruta (str): 'evidence_path' tal como aparece en la encuesta
+        existe (bool): si 'ruta' existe
+        ruta_resuelta (str): archivo encontrado para la tienda. Es 'ruta' si existe; si no, un archivo del mismo
+            directorio cuyo nombre solo difiere en los ceros del numero (por ejemplo MP01.jpg para MP001);
+            None si no se encontro ninguno
+    """
+
+    __slots__ = ('store_id', 'ruta', 'existe', 'ruta_resuelta')
+
+    def __init__(self, store_id, ruta, existe, ruta_resuelta):
+        object.__setattr__(self, 'store_id', store_id)
+        object.__setattr__(self, 'ruta', ruta)
+        object.__setattr__(self, 'existe', existe)
+        object.__setattr__(self, 'ruta_resuelta', ruta_resuelta)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError(f"Evidencia es inmutable (no se puede asignar '{nombre}')")
+
+    def __repr__(self):
+        return (f"Evidencia(store_id={self.store_id!r}, ruta={self.ruta!r}, existe={self.existe}, "
+                f"ruta_resuelta={self.ruta_resuelta!r})")
+
+
+class DiccionarioCongelado(dict):
+    """
+    Diccionario de solo lectura: cualquier metodo que lo modifique lanza TypeError. Es un dict, por lo que
+    lo aceptan todas las funciones de utils.py, json.dump y pipeline.huella_contenido. copy.deepcopy devuelve
+    la estructura modificable (ver descongelar)
+    """
+
+    def _solo_lectura(self, *args, **kwargs):
+        raise TypeError("Los datos de DatosFuentes son de solo lectura (usar copy.deepcopy para modificarlos)")
+
+    __setitem__ = __delitem__ = __ior__ = _solo_lectura
+    clear = pop = popitem = setdefault = update = _solo_lectura
+
+    def __reduce__(self):
+        # pickle reconstruye con dict(...) en lugar de asignar clave por clave
+        return DiccionarioCongelado, (dict(self),)
+
+    def __deepcopy__(self, memo):
+        return descongelar(self)
+
+
+def congelar(valor):
+    """
+    Copia de solo lectura de datos JSON: dict -> DiccionarioCongelado, list -> tuple y
+    producto_compacto.Producto -> ProductoCongelado (los escalares se comparten)
+    """
+    if isinstance(valor, dict):
+        return DiccionarioCongelado((clave, congelar(elemento)) for clave, elemento in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return tuple(congelar(elemento) for elemento in valor)
+    if isinstance(valor, Producto):
+        return congelar_producto(valor)
+    return valor
+
+
+def descongelar(valor):
+    """Inversa de congelar: copia modificable con dict, list y Producto"""
+    if isinstance(valor, dict):
+        return {clave: descongelar(elemento) for clave, elemento in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [descongelar(elemento) for elemento in valor]
+    if isinstance(valor, Producto):
+        return Producto(**valor.a_dict())
+    return valor
+
+
+class DatosFuentes:
+    """
+    Conjunto de datos del proyecto cargado por cargar_fuentes. Es inmutable en profundidad: sus atributos no
+    se pueden reasignar ni borrar y los datos de cada fuente estan congelados (ver congelar), de modo que por
+    ejemplo utils.convertir_usd_a_cup(datos.tienda_online, tasa) lanza TypeError en lugar de cambiar el
+    conjunto compartido. Para convertir precios sobre una copia usar copy.deepcopy(datos.tienda_online)
+
+    Atributos:
+        canasta, tiendas, tienda_online, datos_onei, tasa_informal: contenido congelado de cada fuente (ver FUENTES):
+            las listas son tuplas, los diccionarios DiccionarioCongelado y los Producto ProductoCongelado
+        evidencias (tuple): un Evidencia por tienda, en el orden de 'tiendas'
+    """
+
+    __slots__ = tuple(FUENTES) + ('evidencias',)
+
+    def __init__(self, evidencias, **fuentes):
+        for nombre in FUENTES:
+            object.__setattr__(self, nombre, congelar(fuentes[nombre]))
+        object.__setattr__(self, 'evidencias', tuple(evidencias))
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError(f"DatosFuentes es inmutable (no se puede asignar '{nombre}')")
+
+    def __delattr__(self, nombre):
+        raise AttributeError(f"DatosFuentes es inmutable (no se puede borrar '{nombre}')")
+
+    def evidencias_faltantes(self):
+        """
+        Returns:
+            list: Evidencia de las tiendas cuya evidencia no se encontro (ni con otro relleno de ceros)
+        """
+        return [evidencia for evidencia in self.evidencias if evidencia.ruta_resuelta is None]
+
+    def evidencias_con_otro_nombre(self):
+        """
+        Returns:
+            list: Evidencia de las tiendas cuyo 'evidence_path' no existe pero se encontro el archivo con otro nombre
+        """
+        return [evidencia for evidencia in self.evidencias if not evidencia.existe and evidencia.ruta_resuelta]
+
+
+def _clave_archivo(nombre):
+    # 'MP001.jpg' y 'MP01.jpg' -> ('mp', '1', '.jpg')
+    base, extension = os.path.splitext(nombre)
+    coincidencia = _ID_ARCHIVO.match(base)
+    if coincidencia is None:
+        return base.lower(), None, extension.lower()
+    return coincidencia.group(1).lower(), coincidencia.group(2), extension.lower()
+
+
+def _listar_directorio(directorio):
+    """{clave de archivo: nombre} de un directorio (vacio si no existe)"""
+    try:
+        with os.scandir(directorio) as entradas:
+            return {_clave_archivo(entrada.name): entrada.name for entrada in entradas if entrada.is_file()}
+    except FileNotFoundError:
+        return {}
+
+
+def _validar_evidencias(tiendas, raiz, pool):
+    rutas = [tienda.get('evidence_path') for tienda in tiendas]
+    # Cada comprobacion de existencia es una consulta al sistema de archivos: en almacenamiento de red se
+    # hacen todas a la vez en el pool, igual que el listado de cada directorio de evidencias
+    existencias = pool.map(lambda ruta: bool(ruta) and os.path.isfile(os.path.join(raiz, ruta)), rutas)
+    directorios = {os.path.dirname(ruta) for ruta in rutas if ruta}
+    listados = dict(zip(directorios, pool.map(lambda d: _listar_directorio(os.path.join(raiz, d)), directorios)))
+
+    evidencias = []
+    for tienda, ruta, existe in zip(tiendas, rutas, existencias):
+        ruta_resuelta = ruta if existe else None
+        if ruta and not existe:
+            directorio, nombre = os.path.split(ruta)
+            encontrado = listados[directorio].get(_clave_archivo(nombre))
+            if encontrado is not None:
+                ruta_resuelta = os.path.join(directorio, encontrado) if directorio else encontrado
+        evidencias.append(Evidencia(tienda.get('store_id'), ruta, existe, ruta_resuelta))
+    return evidencias
+
+
+def cargar_fuentes(directorio='fuentes', raiz=None, compacto=False, hilos=None):
+    """
+    Lee y parsea todas las fuentes del proyecto a la vez en un pool de hilos y valida las evidencias de las
+    tiendas en la misma pasada: apenas termina de cargarse 'tiendas_privadas.json' se comprueban todos los
+    'evidence_path' en paralelo mientras siguen cargandose las demas fuentes
+
+    La lectura de archivos libera el GIL, por lo que la ganancia es mayor cuanto mas latencia tiene el
+    almacenamiento (por ejemplo un disco de red); el parseo JSON de cada archivo sigue siendo secuencial
+
+    Args:
+        directorio (str): directorio con los archivos de FUENTES
+        raiz (str): directorio respecto al cual se resuelven los 'evidence_path' (por defecto el padre de
+            'directorio', la raiz del proyecto)
+        compacto (bool): crear los productos como producto_compacto.Producto (ver utils.cargar_datos)
+        hilos (int): hilos del pool (por defecto uno por fuente mas los de la validacion de evidencias)
+
+    Returns:
+        DatosFuentes
+
+    Raises:
+        FileNotFoundError: si falta alguna fuente
+    """
+    if raiz is None:
+        raiz = os.path.dirname(os.path.abspath(directorio))
+    with ThreadPoolExecutor(max_workers=hilos or len(FUENTES) + 4) as pool:
+        futuros = {nombre: pool.submit(utils.cargar_datos, os.path.join(directorio, archivo),
+                                       compacto and nombre in ('tiendas', 'tienda_online'))
+                   for nombre, archivo in FUENTES.items()}
+        evidencias = _validar_evidencias(futuros['tiendas'].result(), raiz, pool)
+        fuentes = {nombre: futuro.result() for nombre, futuro in futuros.items()}
+    return DatosFuentes(evidencias, **fuentes)
@@ -0,0 +1,350 @@
+import json
+
+import numpy as np
+
+import normalizador
+import sketch_cuantiles
+import tabla_productos
+from indice_temporal import a_fecha, lunes_de
+from sketch_cuantiles import SketchKLL
+from tabla_productos import TablaProductos
+
+
+#======================Cubo de resumen materializado para el tablero==========================================================
+
+DIMENSIONES = ('categoria', 'origen', 'tienda', 'semana', 'banda')
+
+# Limites (km) de las bandas de distancia al hospital: '0-1 km', '1-2 km', '2-5 km', '5-10 km', '10+ km'
+BANDAS_KM = (1, 2, 5, 10)
+
+
+def etiquetas_bandas(limites):
+    """Nombre de cada banda de distancia definida por 'limites' (ascendentes, en km)"""
+    bordes = [0] + list(limites)
+    etiquetas = [f'{a:g}-{b:g} km' for a, b in zip(bordes, bordes[1:])]
+    return etiquetas + [f'{bordes[-1]:g}+ km']
+
+
+class _Dimension:
+    """Valores de una dimension del cubo con codigos enteros en orden de primera aparicion"""
+
+    def __init__(self, valores=()):
+        self.valores = []
+        self.codigos = {}
+        for valor in valores:
+            self.codificar(valor)
+
+    def codificar(self, valor):
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = self.codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def codificar_varios(self, valores):
+        return np.array([self.codificar(valor) for valor in valores], dtype=np.int64)
+
+
+class CuboResumen:
+    """
+    Agregados materializados de los productos de las MIPYMES por celda (categoria, origen, tienda, semana de
+    'collection_date', banda de distancia al hospital). Cada celda guarda:
+        n: cantidad de productos
+        n_precios: productos con precio estandarizado (ver normalizador.normalizar_precios)
+        suma: suma de los precios estandarizados
+        sketch: SketchKLL de los precios estandarizados (medianas y cuantiles combinables)
+
+    El cubo se construye una vez y se actualiza de forma incremental con agregar_tiendas (solo se procesan los
+    productos nuevos). Los conteos, medias, medianas y la disponibilidad por categoria de cualquier corte o
+    agregacion sobre las dimensiones se responden desde las celdas, sin volver a recorrer productos: el costo
+    depende de la cantidad de celdas ocupadas y cada respuesta queda memorizada hasta la siguiente actualizacion,
+    por lo que repetir una consulta del tablero es una busqueda en un diccionario
+
+    Ejemplo:
+        cubo = CuboResumen(canasta)
+        cubo.agregar_tiendas(stores)
+        cubo.conteo_origen(banda='0-1 km')
+        cubo.precio_mediano_por_categoria(semana='2025-11-10', origen='nacional')
+        cubo.consulta(por=('categoria', 'semana'))
+    """
+
+    def __init__(self, canasta, bandas_km=BANDAS_KM, k=sketch_cuantiles.K_POR_DEFECTO):
+        """
+        Args:
+            canasta (dict): canasta definida para el proyecto (presentaciones de referencia de los precios)
+            bandas_km (tuple): limites ascendentes de las bandas de distancia
+            k (int): parametro de los sketches de cada celda
+        """
+        self.canasta = canasta
+        self.bandas_km = tuple(bandas_km)
+        self.k = k
+        self.dimensiones = {dimension: _Dimension() for dimension in DIMENSIONES}
+        self.dimensiones['banda'] = _Dimension(etiquetas_bandas(self.bandas_km) + [None])
+        self._celdas = {} # {coordenadas: posicion de la celda}
+        self._coordenadas = [] # una tupla de codigos por celda
+        self.n = np.zeros(0, dtype=np.int64)
+        self.n_precios = np.zeros(0, dtype=np.int64)
+        self.suma = np.zeros(0)
+        self.sketches = []
+        self.encuestas = set() # claves 'store_id@collection_date' ya agregadas
+        self._matriz = None
+        self._memo = {}
+        self.actualizaciones = 0
+
+    def __len__(self):
+        """Cantidad de celdas ocupadas"""
+        return len(self._coordenadas)
+
+    def valores(self, dimension):
+        """Valores conocidos de una dimension (en orden de primera aparicion)"""
+        return list(self.dimensiones[dimension].valores)
+
+    def _coordenadas_de_filas(self, tabla):
+        """Codigos de las cinco dimensiones de cada producto, calculados por valor distinto de cada columna"""
+        categoria = self.dimensiones['categoria'].codificar_varios(tabla.categorias)
+        origen = self.dimensiones['origen'].codificar_varios(tabla.origenes)
+        tienda = self.dimensiones['tienda'].codificar_varios(tabla.tienda_ids)
+        semanas = [None if not fecha else str(lunes_de(fecha)) for fecha in tabla.tienda_fechas]
+        semana = self.dimensiones['semana'].codificar_varios(semanas)
+        distancias = np.asarray(tabla.tienda_distancias, dtype=np.float64)
+        banda = np.searchsorted(np.asarray(self.bandas_km, dtype=np.float64), distancias, side='right')
+        banda[np.isnan(distancias)] = self.dimensiones['banda'].codigos[None]
+
+        vacio = np.zeros(0, dtype=np.int64)
+        return np.column_stack((
+            categoria[tabla.categoria] if len(categoria) else vacio,
+            origen[tabla.origen] if len(origen) else vacio,
+            tienda[tabla.tienda] if len(tienda) else vacio,
+            semana[tabla.tienda] if len(semana) else vacio,
+            banda[tabla.tienda] if len(banda) else vacio,
+        )).reshape(-1, len(DIMENSIONES))
+
+    def agregar_tiendas(self, tiendas):
+        """
+        Agrega al cubo los productos de nuevas encuestas (lista de tiendas o TablaProductos). Las filas se
+        agrupan por celda con operaciones de arreglos y solo se recorre en Python cada celda tocada
+
+        Returns:
+            int: cantidad de celdas nuevas
+
+        Raises:
+            ValueError: si llega dos veces la encuesta de una tienda en la misma fecha (en esta llamada o en
+                una anterior). En ese caso el cubo no se modifica
+        """
+        tabla = tiendas if isinstance(tiendas, TablaProductos) else tabla_productos.construir_tabla_productos(tiendas)
+        claves = [f"{tienda_id}@{a_fecha(fecha) if fecha else None}"
+                  for tienda_id, fecha in zip(tabla.tienda_ids, tabla.tienda_fechas)]
+        nuevas_encuestas = set()
+        for clave in claves:
+            if clave in self.encuestas or clave in nuevas_encuestas:
+                raise ValueError(f"La encuesta {clave} ya fue agregada")
+            nuevas_encuestas.add(clave)
+        self.encuestas |= nuevas_encuestas
+        if len(tabla) == 0:
+            return 0
+        coordenadas = self._coordenadas_de_filas(tabla)
+        precio = normalizador.normalizar_precios(tabla, self.canasta).precio
+
+        distintas, celda_de_fila = np.unique(coordenadas, axis=0, return_inverse=True)
+        celda_de_fila = np.asarray(celda_de_fila).reshape(-1)
+        conteo = np.bincount(celda_de_fila, minlength=len(distintas))
+        con_precio = ~np.isnan(precio)
+        conteo_precios = np.bincount(celda_de_fila[con_precio], minlength=len(distintas))
+        sumas = np.bincount(celda_de_fila[con_precio], weights=precio[con_precio], minlength=len(distintas))
+        orden, grupos, inicios = tabla_productos.indices_por_grupo(celda_de_fila[con_precio])
+        precios_por_celda = dict(zip(grupos.tolist(), np.split(precio[con_precio][orden], inicios[1:])))
+
+        posiciones = np.empty(len(distintas), dtype=np.int64)
+        nuevas = 0
+        for i, celda in enumerate(map(tuple, distintas.tolist())):
+            posicion = self._celdas.get(celda)
+            if posicion is None:
+                posicion = self._celdas[celda] = len(self._coordenadas)
+                self._coordenadas.append(celda)
+                self.sketches.append(SketchKLL(self.k, semilla=posicion))
+                nuevas += 1
+            posiciones[i] = posicion
+            if i in precios_por_celda:
+                self.sketches[posicion].agregar_arreglo(precios_por_celda[i])
+
+        if nuevas:
+            self.n = np.concatenate((self.n, np.zeros(nuevas, dtype=np.int64)))
+            self.n_precios = np.concatenate((self.n_precios, np.zeros(nuevas, dtype=np.int64)))
+            self.suma = np.concatenate((self.suma, np.zeros(nuevas)))
+        self.n[posiciones] += conteo
+        self.n_precios[posiciones] += conteo_precios
+        self.suma[posiciones] += sumas
+
+        self._matriz = None
+        self._memo.clear()
+        self.actualizaciones += 1
+        return nuevas
+
+    def _matriz_coordenadas(self):
+        if self._matriz is None:
+            self._matriz = np.array(self._coordenadas, dtype=np.int64).reshape(-1, len(DIMENSIONES))
+        return self._matriz
+
+    def _mascara(self, filtros):
+        """Celdas que cumplen los filtros {dimension: valor o lista de valores}"""
+        matriz = self._matriz_coordenadas()
+        mascara = np.ones(len(matriz), dtype=bool)
+        for dimension, valores in filtros.items():
+            if dimension not in self.dimensiones:
+                raise KeyError(f"Dimension desconocida: {dimension!r} (usar {DIMENSIONES})")
+            if valores is None or isinstance(valores, (str, int, float)):
+                valores = [valores]
+            codigos = [self.dimensiones[dimension].codigos[v] for v in valores if v in self.dimensiones[dimension].codigos]
+            mascara &= np.isin(matriz[:, DIMENSIONES.index(dimension)], codigos)
+        return mascara
+
+    def consulta(self, por=('categoria',), **filtros):
+        """
+        Agrega las celdas que cumplen los filtros por las dimensiones de 'por'
+
+        Args:
+            por (tuple): dimensiones que se conservan (las demas se suman); () para el total
+            **filtros: corte por valor de dimension, por ejemplo origen='nacional', banda=['0-1 km', '1-2 km'],
+                semana='2025-11-10' (lunes de la semana)
+
+        Returns:
+            dict: {tupla con un valor por dimension de 'por': {'n', 'n_precios', 'suma', 'media', 'sketch'}},
+            en el orden de primera aparicion de los valores
+
+        Raises:
+            KeyError: si 'por' o los filtros usan una dimension que no es de DIMENSIONES
+        """
+        por = tuple(por)
+        clave_memo = ('consulta', por, _congelar(filtros))
+        if clave_memo in self._memo:
+            return self._memo[clave_memo]
+        for dimension in por:
+            if dimension not in self.dimensiones:
+                raise KeyError(f"Dimension desconocida: {dimension!r} (usar {DIMENSIONES})")
+
+        seleccion = np.flatnonzero(self._mascara(filtros))
+        ejes = [DIMENSIONES.index(dimension) for dimension in por]
+        claves = self._matriz_coordenadas()[seleccion][:, ejes]
+        if len(seleccion) == 0:
+            self._memo[clave_memo] = {}
+            return {}
+        grupos, grupo_de_celda = np.unique(claves, axis=0, return_inverse=True)
+        grupo_de_celda = np.asarray(grupo_de_celda).reshape(-1)
+        n = np.bincount(grupo_de_celda, weights=self.n[seleccion], minlength=len(grupos))
+        n_precios = np.bincount(grupo_de_celda, weights=self.n_precios[seleccion], minlength=len(grupos))
+        suma = np.bincount(grupo_de_celda, weights=self.suma[seleccion], minlength=len(grupos))
+        orden, codigos_grupo, inicios = tabla_productos.indices_por_grupo(grupo_de_celda)
+
+        resultado = {}
+        # np.unique ordena por codigo, que es el orden de primera aparicion de cada valor
+        for g, celdas in zip(codigos_grupo.tolist(), np.split(seleccion[orden], inicios[1:])):
+            clave = tuple(self.dimensiones[dimension].valores[codigo] for dimension, codigo in zip(por, grupos[g].tolist()))
+            resultado[clave] = {
+                'n': int(n[g]),
+                'n_precios': int(n_precios[g]),
+                'suma': float(suma[g]),
+                'media': float(suma[g] / n_precios[g]) if n_precios[g] else None,
+                'sketch': sketch_cuantiles.combinar_varios([self.sketches[c] for c in celdas], self.k, semilla=0),
+            }
+        self._memo[clave_memo] = resultado
+        return resultado
+
+    def conteo_origen(self, **filtros):
+        """
+        Como utils.conteo_origen sobre los productos del corte
+
+        Returns:
+            dict: {categoria: {'nacional': X, 'importado': Y}}
+        """
+        conteo = {}
+        for (categoria, origen), celda in self.consulta(('categoria', 'origen'), **filtros).items():
+            por_origen = conteo.setdefault(categoria, {'nacional': 0, 'importado': 0})
+            if origen in por_origen:
+                por_origen[origen] += celda['n']
+        return conteo
+
+    def conteo_disponibilidad_categorias(self, **filtros):
+        """
+        Como utils.conteo_disponibilidad_categorias: cantidad de encuestas del corte con al menos un producto
+        de cada categoria. Una tienda encuestada en varias semanas cuenta una vez por semana, como en utils,
+        donde cada encuesta es una tienda de la lista
+
+        Returns:
+            dict: {categoria: cantidad de tiendas}
+        """
+        conteo = {}
+        for categoria, _, _ in self.consulta(('categoria', 'tienda', 'semana'), **filtros):
+            conteo[categoria] = conteo.get(categoria, 0) + 1
+        return conteo
+
+    def sketches_por_categoria(self, **filtros):
+        """
+        Returns:
+            dict: {categoria: SketchKLL} de los precios estandarizados del corte (el formato de
+            sketch_cuantiles.sketches_por_categoria)
+        """
+        return {categoria: celda['sketch'] for (categoria,), celda in self.consulta(('categoria',), **filtros).items()
+                if celda['n_precios']}
+
+    def precio_mediano_por_categoria(self, **filtros):
+        """
+        Como utils.calcular_precio_mediano_por_categoria(utils.estandarizar_precios_unidad_modal(...)) sobre
+        el corte. Es exacta mientras el sketch combinado de la categoria no compacte (hasta unos k precios)
+
+        Returns:
+            dict: {categoria: precio mediano}
+        """
+        return sketch_cuantiles.medianas_aproximadas(self.sketches_por_categoria(**filtros))
+
+    def costo_total_canasta(self, **filtros):
+        """Costo de la canasta con las medianas del corte (las categorias sin precio no suman)"""
+        medianas = self.precio_mediano_por_categoria(**filtros)
+        return sum(medianas[categoria] * definicion['cantidad_semanal']
+                   for categoria, definicion in self.canasta.items() if categoria in medianas)
+
+    def guardar(self, path):
+        """Guarda el cubo (dimensiones, celdas y sketches) en un archivo JSON"""
+        contenido = {
+            'bandas_km': list(self.bandas_km),
+            'k': self.k,
+            'dimensiones': {dimension: self.dimensiones[dimension].valores for dimension in DIMENSIONES},
+            'coordenadas': self._coordenadas,
+            'n': self.n.tolist(),
+            'n_precios': self.n_precios.tolist(),
+            'suma': self.suma.tolist(),
+            'sketches': [sketch.a_dict() for sketch in self.sketches],
+            'encuestas': sorted(self.encuestas),
+        }
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(contenido, file, ensure_ascii=False)
+
+    @classmethod
+    def cargar(cls, path, canasta):
+        """
+        Carga un cubo guardado con guardar, para seguir actualizandolo con agregar_tiendas
+
+        Returns:
+            CuboResumen
+        """
+        with open(path, 'r', encoding='utf-8') as file:
+            contenido = json.load(file)
+        cubo = cls(canasta, contenido['bandas_km'], contenido['k'])
+        cubo.dimensiones = {dimension: _Dimension(valores) for dimension, valores in contenido['dimensiones'].items()}
+        cubo._coordenadas = [tuple(celda) for celda in contenido['coordenadas']]
+        cubo._celdas = {celda: posicion for posicion, celda in enumerate(cubo._coordenadas)}
+        cubo.n = np.array(contenido['n'], dtype=np.int64)
+        cubo.n_precios = np.array(contenido['n_precios'], dtype=np.int64)
+        cubo.suma = np.array(contenido['suma'], dtype=np.float64)
+        cubo.sketches = [SketchKLL.desde_dict(datos, semilla=posicion) for posicion, datos in enumerate(contenido['sketches'])]
+        cubo.encuestas = set(contenido['encuestas'])
+        return cubo
+
+
+def _congelar(filtros):
+    """Clave hashable de los filtros de una consulta (para la memoria de respuestas)"""
+    congelados = []
+    for dimension, valores in sorted(filtros.items()):
+        if isinstance(valores, (list, tuple, set, frozenset)):
+            valores = tuple(valores)
+        congelados.append((dimension, valores))
+    return tuple(congelados)
@@ -0,0 +1,117 @@
+import numpy as np
+
+import tabla_productos
+from tabla_productos import TablaProductos
+
+
+#======================Mapa de bits de disponibilidad tienda x categoria==========================================================
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(bytes_):
+        return np.bitwise_count(bytes_)
+else:
+    # NumPy < 2.0: tabla con la cantidad de bits encendidos de cada byte
+    _BITS_POR_BYTE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(axis=1).astype(np.uint8)
+
+    def _popcount(bytes_):
+        return _BITS_POR_BYTE[bytes_]
+
+
+class IndiceDisponibilidad:
+    """
+    Indice de disponibilidad: un conjunto de bits por categoria sobre los indices de tiendas
+
+    El bit t de la fila de la categoria c esta encendido si la tienda t tiene al menos un producto de c.
+    Las filas se guardan empaquetadas (8 tiendas por byte), de modo que contar tiendas es un popcount y
+    las consultas de cobertura son AND/OR bit a bit sobre filas completas
+
+    Atributos:
+        categorias (list): nombres de las categorias (en orden de primera aparicion)
+        n_tiendas (int): tamaño de la muestra, incluidas las tiendas sin productos
+        bits (np.ndarray[uint8]): matriz (categorias, ceil(n_tiendas / 8))
+    """
+
+    def __init__(self, tabla):
+        """
+        Args:
+            tabla (TablaProductos | list): tabla de productos o lista de tiendas (MIPYMES)
+        """
+        if not isinstance(tabla, TablaProductos):
+            tabla = tabla_productos.construir_tabla_productos(tabla)
+
+        self.categorias = list(tabla.categorias)
+        self.n_tiendas = tabla.n_tiendas
+        presencia = np.zeros((len(self.categorias), self.n_tiendas), dtype=bool)
+        presencia[tabla.categoria, tabla.tienda] = True
+        self.bits = np.packbits(presencia, axis=1)
+
+    def _codigos(self, categorias):
+        # Las categorias que no aparecen en la muestra no tienen ninguna tienda: se devuelve None
+        codigos = []
+        for categoria in categorias:
+            if categoria not in self.categorias:
+                return None
+            codigos.append(self.categorias.index(categoria))
+        return codigos
+
+    def _tiendas(self, fila):
+        return np.flatnonzero(np.unpackbits(fila, count=self.n_tiendas))
+
+    def conteo_disponibilidad(self):
+        """
+        Returns:
+            dict: el mismo resultado que utils.conteo_disponibilidad_categorias
+        """
+        conteos = _popcount(self.bits).sum(axis=1, dtype=np.int64)
+        return {categoria: int(conteo) for categoria, conteo in zip(self.categorias, conteos)}
+
+    def tiendas_con_todas(self, categorias):
+        """Indices de las tiendas que tienen todas las categorias indicadas (AND de las filas)"""
+        codigos = self._codigos(categorias)
+        if codigos is None:
+            return np.zeros(0, dtype=np.int64)
+        if not codigos:
+            return np.arange(self.n_tiendas)
+        return self._tiendas(np.bitwise_and.reduce(self.bits[codigos], axis=0))
+
+    def tiendas_con_alguna(self, categorias):
+        """Indices de las tiendas que tienen al menos una de las categorias indicadas (OR de las filas)"""
+        codigos = [self.categorias.index(c) for c in categorias if c in self.categorias]
+        if not codigos:
+            return np.zeros(0, dtype=np.int64)
+        return self._tiendas(np.bitwise_or.reduce(self.bits[codigos], axis=0))
+
+    def categorias_faltantes(self, porcentaje):
+        """
+        Categorias que faltan en mas del 'porcentaje' (0-100) de las tiendas
+
+        Returns:
+            dict: {categoria: porcentaje de tiendas donde falta} (vacio si no hay tiendas)
+        """
+        if self.n_tiendas == 0:
+            return {}
+        conteos = _popcount(self.bits).sum(axis=1, dtype=np.int64)
+        faltantes = (self.n_tiendas - conteos) / self.n_tiendas * 100
+        return {self.categorias[c]: faltantes[c].item() for c in np.flatnonzero(faltantes > porcentaje)}
+
+    def cobertura_canastas(self, canastas):
+        """
+        Cuantas tiendas tienen todas las categorias de cada variante de canasta
+
+        Args:
+            canastas (list): lista de variantes; cada variante es un iterable de nombres de categorias
+                (por ejemplo las keys de una canasta)
+
+        Returns:
+            np.ndarray[int64]: numero de tiendas que cubren cada variante
+        """
+        cobertura = np.zeros(len(canastas), dtype=np.int64)
+        for i, categorias in enumerate(canastas):
+            codigos = self._codigos(list(categorias))
+            if codigos is None:
+                continue
+            if not codigos:
+                cobertura[i] = self.n_tiendas
+                continue
+            cobertura[i] = _popcount(np.bitwise_and.reduce(self.bits[codigos], axis=0)).sum(dtype=np.int64)
+        return cobertura
@@ -0,0 +1,348 @@
+import re
+import unicodedata
+
+import numpy as np
+
+import tabla_productos
+from normalizador import UNIDADES
+from tabla_productos import TablaProductos
+
+
+#======================Emparejamiento de productos entre las MIPYMES y la tienda online==========================================================
+
+# Resultado del emparejamiento de cada producto (columna 'metodo')
+SIN_EMPAREJAR = 0
+EXACTO = 1 # misma categoria, mismas palabras en nombre + marca y mismo contenido
+NGRAMAS = 2 # misma categoria, nombre + marca parecido (trigramas de caracteres), misma marca y mismo contenido
+
+_PALABRAS_VACIAS = {'a', 'al', 'con', 'de', 'del', 'el', 'en', 'la', 'las', 'los', 'para', 'sabor', 'y'}
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-zñ]+')
+
+
+def normalizar_texto(texto):
+    """
+    Clave de texto de un producto: minusculas, sin tildes ni signos, sin palabras vacias ('de', 'con', ...)
+    y con las palabras ordenadas, de modo que el orden no importa ('Leche entera' + 'Pascual' y
+    'Leche entera Pascual' dan la misma clave)
+
+    Returns:
+        str: palabras distintas separadas por un espacio
+    """
+    texto = str(texto or '').lower().replace('ñ', '\0')
+    texto = ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+    palabras = _NO_ALFANUMERICO.sub(' ', texto.replace('\0', 'ñ')).split()
+    return ' '.join(sorted({palabra for palabra in palabras if palabra not in _PALABRAS_VACIAS}))
+
+
+def trigramas(clave):
+    """Trigramas de caracteres de una clave de normalizar_texto (con un espacio de relleno en los extremos)"""
+    texto = f' {clave} '
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _contenido_base(tabla):
+    """Contenido de cada fila en la unidad base de su dimension (g, ml o u; NaN si la unidad no esta en UNIDADES)"""
+    factores = np.array([UNIDADES.get(str(unidad).lower(), (None, np.nan))[1] for unidad in tabla.unidades])
+    if len(factores) == 0:
+        return np.full(len(tabla), np.nan)
+    return tabla.peso_neto * factores[tabla.unidad]
+
+
+class _Productos:
+    """
+    Productos distintos de una TablaProductos: filas con la misma categoria, la misma clave de texto
+    (nombre + marca) y el mismo contenido. Las claves de texto se calculan una vez por par (nombre, marca)
+    distinto, no por fila
+    """
+
+    def __init__(self, tabla):
+        contenido = _contenido_base(tabla)
+        # Productos crudos distintos: (categoria, nombre, marca, contenido)
+        crudo = np.column_stack((tabla.categoria, tabla.nombre, tabla.marca)).astype(np.float64)
+        # El contenido NaN (unidad desconocida) se agrupa como -1 para que np.unique lo trate como un valor
+        crudo = np.column_stack((crudo, np.round(np.nan_to_num(contenido, nan=-1.0), 6)))
+        distintos, inversa = np.unique(crudo, axis=0, return_inverse=True) if len(tabla) else (crudo, np.zeros(0, np.intp))
+
+        claves_texto = {}
+        ids = {}
+        id_de_crudo = np.empty(len(distintos), dtype=np.int64)
+        self.categorias = []
+        self.claves = []
+        self.contenidos = []
+        self.marcas = [] # palabras de la marca de cada producto (frozenset vacio si no tiene)
+        for i, (categoria, nombre, marca, cantidad) in enumerate(distintos):
+            par = (int(nombre), int(marca))
+            if par not in claves_texto:
+                claves_texto[par] = normalizar_texto(f'{tabla.nombres[par[0]]} {tabla.marcas[par[1]]}')
+            producto = (tabla.categorias[int(categoria)], claves_texto[par], cantidad)
+            if producto not in ids:
+                ids[producto] = len(ids)
+                self.categorias.append(producto[0])
+                self.claves.append(producto[1])
+                self.contenidos.append(cantidad)
+                self.marcas.append(frozenset(normalizar_texto(tabla.marcas[par[1]]).split()))
+            id_de_crudo[i] = ids[producto]
+        self.contenidos = np.asarray(self.contenidos, dtype=np.float64).reshape(-1)
+        self.contenidos[self.contenidos < 0] = np.nan
+        self.de_fila = id_de_crudo[np.asarray(inversa).reshape(-1)] # producto de cada fila de la tabla
+
+    def __len__(self):
+        return len(self.claves)
+
+
+def _contenido_compatible(a, b, tolerancia):
+    # Los contenidos se comparan en unidades base sin mirar la dimension (1 g = 1 ml), como utils.py
+    if tolerancia is None:
+        return np.ones(np.broadcast(a, b).shape, dtype=bool)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.abs(a - b) <= tolerancia * np.maximum(a, b)
+
+
+class IndiceEmparejamiento:
+    """
+    Indice de los productos del catalogo de la tienda online para emparejar con ellos los productos de las
+    MIPYMES sin comparar todos los pares de nombres
+
+    Cada producto del catalogo se indexa de dos formas, separadas por categoria:
+        - por su clave de texto completa (normalizar_texto del nombre, que en el catalogo incluye la marca)
+          en un diccionario, para los productos que coinciden exactamente
+        - por los trigramas de caracteres de esa clave en un indice invertido {(categoria, trigrama): productos},
+          para los nombres escritos distinto ('Jugo de  Nectar de Mango' + 'Bondelli' contra 'Néctar de mango ...')
+
+    Los productos repetidos del catalogo (mismo nombre y contenido) se unifican y su precio es la mediana
+    """
+
+    def __init__(self, catalogo, tasa_usd_cup=None, nombre_tienda='SuperMarket23'):
+        """
+        Args:
+            catalogo (dict | TablaProductos): catalogo de la tienda online (por ejemplo 'tienda_online_supermarket23.json')
+            tasa_usd_cup (float): tasa para los productos sin precio en CUP (catalogo sin convertir_usd_a_cup)
+            nombre_tienda (str): nombre de la tienda si se recibe el catalogo como dict
+        """
+        if not isinstance(catalogo, TablaProductos):
+            catalogo = tabla_productos.construir_tabla_catalogo(catalogo, nombre_tienda)
+        self.tabla = catalogo
+        self.productos = _Productos(catalogo)
+
+        precio = catalogo.precio_cup.copy()
+        if tasa_usd_cup is not None:
+            sin_cup = np.isnan(precio)
+            precio[sin_cup] = catalogo.precio_usd[sin_cup] * tasa_usd_cup
+        # Precio de cada producto distinto: mediana de sus filas
+        orden, grupos, inicios = tabla_productos.indices_por_grupo(self.productos.de_fila)
+        self.precio = np.full(len(self.productos), np.nan)
+        for producto, filas in zip(grupos, np.split(orden, inicios[1:])):
+            precios = precio[filas]
+            precios = precios[~np.isnan(precios)]
+            if len(precios):
+                self.precio[producto] = np.median(precios)
+        # Nombre original de cada producto (el de su primera fila)
+        primera = np.full(len(self.productos), -1, dtype=np.int64)
+        primera[self.productos.de_fila[::-1]] = np.arange(len(catalogo))[::-1]
+        self.nombres = [catalogo.nombres[catalogo.nombre[fila]] for fila in primera]
+
+        self.exactos = {} # {(categoria, clave): [productos]}
+        self.trigramas = {} # {(categoria, trigrama): codigo}
+        self.n_trigramas = np.zeros(len(self.productos), dtype=np.int64)
+        pares = [] # (codigo de trigrama, producto)
+        for producto, (categoria, clave) in enumerate(zip(self.productos.categorias, self.productos.claves)):
+            self.exactos.setdefault((categoria, clave), []).append(producto)
+            gramas = trigramas(clave)
+            self.n_trigramas[producto] = len(gramas)
+            for grama in gramas:
+                pares.append((self.trigramas.setdefault((categoria, grama), len(self.trigramas)), producto))
+        # Indice invertido como dos arreglos ordenados por trigrama: productos[inicio[t]:inicio[t + 1]]
+        pares = np.array(pares, dtype=np.int64).reshape(-1, 2)
+        pares = pares[np.argsort(pares[:, 0], kind='stable')]
+        self.postings = pares[:, 1]
+        self.inicio_postings = np.searchsorted(pares[:, 0], np.arange(len(self.trigramas) + 1))
+
+    def __len__(self):
+        return len(self.productos)
+
+    def _buscar_exactos(self, productos, tolerancia_peso):
+        elegido = np.full(len(productos), -1, dtype=np.int64)
+        for i, (categoria, clave, cantidad) in enumerate(zip(productos.categorias, productos.claves, productos.contenidos)):
+            candidatos = self.exactos.get((categoria, clave))
+            if not candidatos:
+                continue
+            candidatos = np.asarray(candidatos)
+            compatibles = candidatos[_contenido_compatible(cantidad, self.productos.contenidos[candidatos], tolerancia_peso)]
+            if len(compatibles):
+                elegido[i] = compatibles[np.argmin(np.abs(self.productos.contenidos[compatibles] - cantidad))]
+        return elegido
+
+    def _buscar_ngramas(self, productos, pendientes, umbral, tolerancia_peso, misma_marca):
+        """Mejor candidato por trigramas de cada producto en 'pendientes' (un join vectorizado sobre el indice invertido)"""
+        consultas = []
+        n_gramas = np.zeros(len(productos), dtype=np.int64)
+        for i in pendientes:
+            gramas = trigramas(productos.claves[i])
+            n_gramas[i] = len(gramas)
+            for grama in gramas:
+                codigo = self.trigramas.get((productos.categorias[i], grama))
+                if codigo is not None:
+                    consultas.append((i, codigo))
+        elegido = np.full(len(productos), -1, dtype=np.int64)
+        puntaje = np.zeros(len(productos))
+        if not consultas:
+            return elegido, puntaje
+        consultas = np.array(consultas, dtype=np.int64)
+
+        # Cada (producto, trigrama) se expande a los productos del catalogo que comparten ese trigrama
+        inicios = self.inicio_postings[consultas[:, 1]]
+        largos = self.inicio_postings[consultas[:, 1] + 1] - inicios
+        buscados = np.repeat(consultas[:, 0], largos)
+        desplazamiento = np.arange(largos.sum()) - np.repeat(np.cumsum(largos) - largos, largos)
+        candidatos = self.postings[np.repeat(inicios, largos) + desplazamiento]
+
+        # Trigramas compartidos por par y coeficiente de Dice: 2 * |A ∩ B| / (|A| + |B|)
+        n_catalogo = len(self.productos)
+        pares, compartidos = np.unique(buscados * n_catalogo + candidatos, return_counts=True)
+        buscados, candidatos = pares // n_catalogo, pares % n_catalogo
+        dice = 2 * compartidos / (n_gramas[buscados] + self.n_trigramas[candidatos])
+        validos = (dice >= umbral) & _contenido_compatible(productos.contenidos[buscados],
+                                                            self.productos.contenidos[candidatos], tolerancia_peso)
+        buscados, candidatos, dice = buscados[validos], candidatos[validos], dice[validos]
+        if misma_marca:
+            # Solo quedan los pares que superan el umbral, pocos por producto: se comprueban uno a uno
+            palabras = [set(clave.split()) for clave in self.productos.claves]
+            con_marca = np.array([productos.marcas[i] <= palabras[j] for i, j in zip(buscados, candidatos)], dtype=bool)
+            buscados, candidatos, dice = buscados[con_marca], candidatos[con_marca], dice[con_marca]
+
+        # Mejor candidato por producto: mayor Dice y, a igualdad, contenido mas parecido
+        diferencia = np.abs(productos.contenidos[buscados] - self.productos.contenidos[candidatos])
+        orden = np.lexsort((np.nan_to_num(diferencia, nan=np.inf), -dice, buscados))
+        primeros = orden[np.r_[True, buscados[orden][1:] != buscados[orden][:-1]]] if len(orden) else orden
+        elegido[buscados[primeros]] = candidatos[primeros]
+        puntaje[buscados[primeros]] = dice[primeros]
+        return elegido, puntaje
+
+    def emparejar(self, tiendas, umbral=0.7, tolerancia_peso=0.02, misma_marca=True):
+        """
+        Empareja cada producto de las MIPYMES con un producto equivalente del catalogo: primero por clave
+        exacta y, para los que no la tienen, por similitud de trigramas. En ambos casos solo dentro de la
+        misma categoria y con un contenido compatible
+
+        Args:
+            tiendas (list | TablaProductos): tiendas de la muestra
+            umbral (float): coeficiente de Dice minimo entre los trigramas de las claves de texto (0 a 1)
+            tolerancia_peso (float): diferencia relativa maxima de contenido (0.02 = 2%); None para no compararlo
+            misma_marca (bool): en los emparejamientos por trigramas, exigir que las palabras de la marca del
+                producto de la MIPYME aparezcan en el nombre del catalogo (que incluye la marca). Con False se
+                emparejan productos genericos equivalentes de otra marca ('Leche Entera' Vima con 'Leche entera Covap')
+
+        Returns:
+            Emparejamiento
+        """
+        if not isinstance(tiendas, TablaProductos):
+            tiendas = tabla_productos.construir_tabla_productos(tiendas)
+        productos = _Productos(tiendas)
+
+        elegido = self._buscar_exactos(productos, tolerancia_peso)
+        metodo = np.where(elegido >= 0, EXACTO, SIN_EMPAREJAR).astype(np.int8)
+        puntaje = np.where(elegido >= 0, 1.0, 0.0)
+
+        pendientes = np.flatnonzero(elegido < 0)
+        por_ngramas, puntaje_ngramas = self._buscar_ngramas(productos, pendientes, umbral, tolerancia_peso, misma_marca)
+        nuevos = por_ngramas >= 0
+        elegido[nuevos] = por_ngramas[nuevos]
+        metodo[nuevos] = NGRAMAS
+        puntaje[nuevos] = puntaje_ngramas[nuevos]
+
+        filas = productos.de_fila
+        return Emparejamiento(self, tiendas, productos.contenidos[filas], elegido[filas], puntaje[filas], metodo[filas])
+
+
+class Emparejamiento:
+    """
+    Resultado de IndiceEmparejamiento.emparejar: columnas alineadas con las filas de la TablaProductos de las MIPYMES
+
+    Columnas:
+        catalogo (np.ndarray[int64]): producto del indice emparejado con la fila (-1 si no se encontro)
+        puntaje (np.ndarray[float64]): 1 en los emparejamientos exactos, coeficiente de Dice en los de trigramas
+        metodo (np.ndarray[int8]): SIN_EMPAREJAR, EXACTO o NGRAMAS
+    """
+
+    def __init__(self, indice, tabla, contenido, catalogo, puntaje, metodo):
+        self.indice = indice
+        self.tabla = tabla
+        self.contenido = contenido
+        self.catalogo = catalogo
+        self.puntaje = puntaje
+        self.metodo = metodo
+
+    def __len__(self):
+        return len(self.catalogo)
+
+    def emparejados(self):
+        """Mascara de las filas con un producto del catalogo"""
+        return self.catalogo >= 0
+
+    def resumen(self):
+        """
+        Returns:
+            dict: {'exacto', 'ngramas', 'sin_emparejar'}: cantidad de productos de las MIPYMES por metodo
+        """
+        conteo = np.bincount(self.metodo, minlength=3)
+        return {'exacto': int(conteo[EXACTO]), 'ngramas': int(conteo[NGRAMAS]), 'sin_emparejar': int(conteo[SIN_EMPAREJAR])}
+
+    def brechas(self):
+        """
+        Brecha de precio de cada producto emparejado, calculada como un unico join vectorizado
+
+            precio_online_ajustado = precio_online * contenido_mipyme / contenido_online
+            brecha = precio_mipyme - precio_online_ajustado
+            brecha_relativa = brecha / precio_online_ajustado
+
+        El ajuste por contenido solo cambia algo cuando tolerancia_peso permite contenidos distintos
+
+        Returns:
+            dict: tabla plana (un arreglo por columna) con 'tienda', 'categoria', 'producto', 'marca',
+            'producto_online', 'metodo', 'puntaje', 'precio_mipyme', 'precio_online', 'precio_online_ajustado',
+            'brecha' y 'brecha_relativa', solo con las filas emparejadas
+        """
+        tabla = self.tabla
+        filas = np.flatnonzero(self.emparejados())
+        catalogo = self.catalogo[filas]
+        precio_mipyme = tabla.precio_cup[filas]
+        precio_online = self.indice.precio[catalogo]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ajustado = precio_online * self.contenido[filas] / self.indice.productos.contenidos[catalogo]
+            brecha = precio_mipyme - ajustado
+            relativa = brecha / ajustado
+        return {
+            'tienda': np.asarray(tabla.tienda_nombres, dtype=object)[tabla.tienda[filas]],
+            'categoria': np.asarray(tabla.categorias, dtype=object)[tabla.categoria[filas]],
+            'producto': np.asarray(tabla.nombres, dtype=object)[tabla.nombre[filas]],
+            'marca': np.asarray(tabla.marcas, dtype=object)[tabla.marca[filas]],
+            'producto_online': np.asarray(self.indice.nombres, dtype=object)[catalogo],
+            'metodo': self.metodo[filas],
+            'puntaje': self.puntaje[filas],
+            'precio_mipyme': precio_mipyme,
+            'precio_online': precio_online,
+            'precio_online_ajustado': ajustado,
+            'brecha': brecha,
+            'brecha_relativa': relativa,
+        }
+
+    def brechas_por_categoria(self):
+        """
+        Returns:
+            dict: {categoria: {'emparejados': int, 'sin_emparejar': int, 'brecha_relativa_mediana': float | None}}
+            con las categorias en el orden de la tabla de las MIPYMES
+        """
+        tabla = self.tabla
+        emparejados = self.emparejados()
+        totales = np.bincount(tabla.categoria, minlength=len(tabla.categorias))
+        con_pareja = np.bincount(tabla.categoria[emparejados], minlength=len(tabla.categorias))
+
+        relativa = self.brechas()['brecha_relativa']
+        codigos = tabla.categoria[emparejados]
+        validas = ~np.isnan(relativa)
+        orden, grupos, inicios = tabla_productos.indices_por_grupo(codigos[validas])
+        medianas = {int(c): float(np.median(v)) for c, v in zip(grupos, np.split(relativa[validas][orden], inicios[1:]))}
+
+        return {categoria: {'emparejados': int(con_pareja[c]), 'sin_emparejar': int(totales[c] - con_pareja[c]),
+                            'brecha_relativa_mediana': medianas.get(c)}
+                for c, categoria in enumerate(tabla.categorias) if totales[c]}
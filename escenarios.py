@@ -0,0 +1,111 @@
+import numpy as np
+
+
+#======================Evaluacion de muchas canastas en lote==========================================================
+
+DIAS_POR_SEMANA = 7
+
+
+def vector_precios(categorias, precio_mediano_categoria):
+    """
+    Alinea el diccionario de precios medianos con una lista de categorias
+
+    Args:
+        categorias (list): orden de las columnas (por ejemplo utils.nombre_categorias(canasta))
+        precio_mediano_categoria (dict): {categoria: precio mediano}
+
+    Returns:
+        np.ndarray[float64]: precio de cada categoria; 0 para las categorias sin precio, que igual que en
+        utils.costo_total_canasta no aportan al costo
+    """
+    return np.asarray([precio_mediano_categoria.get(categoria, 0.0) for categoria in categorias], dtype=np.float64)
+
+
+def matriz_cantidades(canasta, variantes):
+    """
+    Construye la matriz de cantidades semanales (escenarios x categorias) a partir de variantes de la canasta
+
+    Args:
+        canasta (dict): canasta base definida para el proyecto; sus keys dan el orden de las columnas
+        variantes (list): cada variante es un dict {categoria: cantidad_semanal} con los valores que cambian
+            respecto a la canasta base (un dict vacio es la canasta base)
+
+    Returns:
+        tuple: (categorias, matriz) con matriz de forma (len(variantes), len(categorias))
+    """
+    categorias = list(canasta.keys())
+    base = np.asarray([canasta[categoria]['cantidad_semanal'] for categoria in categorias], dtype=np.float64)
+    matriz = np.tile(base, (len(variantes), 1))
+    posicion = {categoria: j for j, categoria in enumerate(categorias)}
+    for i, variante in enumerate(variantes):
+        for categoria, cantidad in variante.items():
+            matriz[i, posicion[categoria]] = cantidad
+    return categorias, matriz
+
+
+def mascara_subconjuntos(categorias, subconjuntos):
+    """
+    Matriz booleana (escenarios x categorias) que indica que categorias incluye cada escenario
+
+    Args:
+        categorias (list): orden de las columnas
+        subconjuntos (list): cada elemento es un iterable con las categorias incluidas en ese escenario
+
+    Returns:
+        np.ndarray[bool]
+    """
+    posicion = {categoria: j for j, categoria in enumerate(categorias)}
+    mascara = np.zeros((len(subconjuntos), len(categorias)), dtype=bool)
+    for i, subconjunto in enumerate(subconjuntos):
+        mascara[i, [posicion[categoria] for categoria in subconjunto]] = True
+    return mascara
+
+
+def costos_por_categoria_escenarios(categorias, cantidades, precio_mediano_categoria, mascara=None):
+    """
+    Costo semanal de cada categoria en cada escenario (version en lote de utils.calcular_costos_totales_por_categoria_canasta,
+    sin redondeo)
+
+    Args:
+        categorias (list): orden de las columnas de 'cantidades'
+        cantidades (np.ndarray): matriz (escenarios x categorias) de cantidades semanales
+        precio_mediano_categoria (dict): {categoria: precio mediano}
+        mascara (np.ndarray[bool]): categorias incluidas en cada escenario (None = todas)
+
+    Returns:
+        np.ndarray[float64]: matriz (escenarios x categorias)
+    """
+    cantidades = np.asarray(cantidades, dtype=np.float64)
+    if mascara is not None:
+        cantidades = np.where(mascara, cantidades, 0.0)
+    return cantidades * vector_precios(categorias, precio_mediano_categoria)
+
+
+def costos_escenarios(categorias, cantidades, precio_mediano_categoria, mascara=None, dias_estancia=None):
+    """
+    Costo total de muchas canastas en una sola operacion matricial (version en lote de utils.costo_total_canasta)
+
+    costo[i] = sum_j cantidades[i, j] * mascara[i, j] * precio[j]
+
+    Si se indican duraciones de la estancia hospitalaria, las cantidades semanales se escalan a
+    dias / 7 y el resultado tiene una columna por duracion
+
+    Args:
+        categorias (list): orden de las columnas de 'cantidades'
+        cantidades (np.ndarray): matriz (escenarios x categorias) de cantidades semanales (o un vector para un solo escenario)
+        precio_mediano_categoria (dict): {categoria: precio mediano}
+        mascara (np.ndarray[bool]): categorias incluidas en cada escenario (None = todas)
+        dias_estancia (list | np.ndarray): duraciones de la estancia en dias (None = una semana)
+
+    Returns:
+        np.ndarray[float64]: vector (escenarios) o matriz (escenarios x duraciones) de costos totales
+    """
+    cantidades = np.atleast_2d(np.asarray(cantidades, dtype=np.float64))
+    if mascara is not None:
+        cantidades = np.where(mascara, cantidades, 0.0)
+
+    costos = cantidades @ vector_precios(categorias, precio_mediano_categoria)
+
+    if dias_estancia is None:
+        return costos
+    return np.outer(costos, np.asarray(dias_estancia, dtype=np.float64) / DIAS_POR_SEMANA)
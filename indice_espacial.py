@@ -0,0 +1,169 @@
+import numpy as np
+
+import tabla_productos
+import utils
+from tabla_productos import TablaProductos
+
+
+#======================Indice espacial de tiendas (rejilla uniforme)==========================================================
+
+RADIO_TIERRA_KM = 6371.0088
+
+
+class IndiceEspacial:
+    """
+    Indice en rejilla sobre las coordenadas de las tiendas para consultas por radio y de vecinos mas cercanos
+
+    Las coordenadas (lat, lon) se proyectan a km con una proyeccion equirectangular centrada en la latitud
+    media de la muestra (el error es despreciable a escala de una ciudad) y cada tienda se asigna a una celda
+    cuadrada de 'tamano_celda_km'. Una consulta solo revisa las celdas que pueden contener tiendas dentro
+    del radio, en lugar de calcular la distancia a todas las tiendas
+
+    Las tiendas sin coordenadas no se indexan
+    """
+
+    def __init__(self, tabla, tamano_celda_km=0.5):
+        """
+        Args:
+            tabla (TablaProductos | list): tabla de productos o lista de tiendas (MIPYMES)
+            tamano_celda_km (float): lado de cada celda de la rejilla
+        """
+        if not isinstance(tabla, TablaProductos):
+            tabla = tabla_productos.construir_tabla_productos(tabla)
+        self.tabla = tabla
+        self.tamano_celda = tamano_celda_km
+
+        validas = ~(np.isnan(tabla.tienda_lat) | np.isnan(tabla.tienda_lon))
+        self.lat0 = np.radians(np.mean(tabla.tienda_lat[validas])) if validas.any() else 0.0
+        self.x, self.y = self.proyectar(tabla.tienda_lat, tabla.tienda_lon)
+
+        # Celdas: {(ix, iy): arreglo de indices de tiendas}
+        self.celdas = {}
+        tiendas_validas = np.flatnonzero(validas)
+        ix = np.floor(self.x[tiendas_validas] / tamano_celda_km).astype(np.int64)
+        iy = np.floor(self.y[tiendas_validas] / tamano_celda_km).astype(np.int64)
+        for tienda, celda in zip(tiendas_validas, zip(ix.tolist(), iy.tolist())):
+            self.celdas.setdefault(celda, []).append(tienda)
+        self.celdas = {celda: np.asarray(tiendas) for celda, tiendas in self.celdas.items()}
+
+        # Matriz tienda x categoria: True si la tienda tiene algun producto de la categoria
+        self.presencia = np.zeros((tabla.n_tiendas, len(tabla.categorias)), dtype=bool)
+        self.presencia[tabla.tienda, tabla.categoria] = True
+
+    def proyectar(self, lat, lon):
+        """Convierte grados (lat, lon) a coordenadas planas (x, y) en km"""
+        x = RADIO_TIERRA_KM * np.radians(lon) * np.cos(self.lat0)
+        y = RADIO_TIERRA_KM * np.radians(lat)
+        return x, y
+
+    def _candidatas(self, x, y, anillos):
+        # Tiendas de las celdas a distancia de a lo sumo 'anillos' celdas de la celda del punto
+        cx = int(np.floor(x / self.tamano_celda))
+        cy = int(np.floor(y / self.tamano_celda))
+        if (2 * anillos + 1) ** 2 > len(self.celdas):
+            # Hay menos celdas ocupadas que celdas en el bloque: es mas barato recorrer las ocupadas
+            grupos = [tiendas for (i, j), tiendas in self.celdas.items()
+                      if abs(i - cx) <= anillos and abs(j - cy) <= anillos]
+        else:
+            grupos = [self.celdas[(i, j)]
+                      for i in range(cx - anillos, cx + anillos + 1)
+                      for j in range(cy - anillos, cy + anillos + 1)
+                      if (i, j) in self.celdas]
+        return np.concatenate(grupos) if grupos else np.zeros(0, dtype=np.int64)
+
+    def tiendas_en_radio(self, lat, lon, radio_km):
+        """
+        Tiendas a menos de 'radio_km' del punto (lat, lon)
+
+        Returns:
+            tuple: (tiendas, distancias) ordenadas de la mas cercana a la mas lejana
+        """
+        x, y = self.proyectar(lat, lon)
+        candidatas = self._candidatas(x, y, int(np.ceil(radio_km / self.tamano_celda)))
+        distancias = np.hypot(self.x[candidatas] - x, self.y[candidatas] - y)
+        dentro = distancias <= radio_km
+        orden = np.argsort(distancias[dentro], kind='stable')
+        return candidatas[dentro][orden], distancias[dentro][orden]
+
+    def k_tiendas_cercanas(self, lat, lon, k, categoria=None):
+        """
+        Las k tiendas mas cercanas al punto (lat, lon), opcionalmente solo las que tienen la categoria indicada
+
+        Se revisan anillos de celdas (duplicando el radio cada vez) hasta tener k tiendas a una distancia
+        que ningun anillo exterior puede mejorar
+
+        Returns:
+            tuple: (tiendas, distancias) ordenadas de la mas cercana a la mas lejana (menos de k si no hay suficientes)
+        """
+        x, y = self.proyectar(lat, lon)
+        if categoria is None:
+            aceptadas = None
+        else:
+            codigo = self.tabla.codigo_categoria(categoria)
+            if codigo < 0:
+                return np.zeros(0, dtype=np.int64), np.zeros(0)
+            aceptadas = self.presencia[:, codigo]
+
+        total = sum(len(tiendas) for tiendas in self.celdas.values())
+        anillos = 0
+        while True:
+            candidatas = self._candidatas(x, y, anillos)
+            revisadas_todas = len(candidatas) == total
+            if aceptadas is not None:
+                candidatas = candidatas[aceptadas[candidatas]]
+            distancias = np.hypot(self.x[candidatas] - x, self.y[candidatas] - y)
+            # Todo lo que esta fuera de los anillos revisados esta a mas de anillos * tamano_celda
+            seguras = distancias <= anillos * self.tamano_celda
+            if seguras.sum() >= k or revisadas_todas:
+                break
+            anillos = max(1, 2 * anillos)
+
+        orden = np.argsort(distancias, kind='stable')[:k]
+        return candidatas[orden], distancias[orden]
+
+    def tabla_de_tiendas(self, tiendas):
+        """Subtabla con los productos de las tiendas indicadas"""
+        seleccionadas = np.zeros(self.tabla.n_tiendas, dtype=bool)
+        seleccionadas[tiendas] = True
+        return self.tabla.seleccionar_filas(seleccionadas[self.tabla.tienda])
+
+
+def costo_canasta_en_radio(indice, canasta, lat, lon, radio_km):
+    """
+    Costo total de la canasta usando solo las tiendas a menos de 'radio_km' del punto (lat, lon)
+
+    Reutiliza la estandarizacion, las medianas y utils.costo_total_canasta sobre la subtabla de esas tiendas.
+    Como en indice_temporal.IndicePreciosTemporal, las categorias de la canasta sin precio en el radio no suman
+    al costo y se informan aparte
+
+    Args:
+        indice (IndiceEspacial)
+        canasta (dict): canasta definida para el proyecto
+        lat, lon (float): punto de consulta (por ejemplo un hospital)
+        radio_km (float): radio de busqueda
+
+    Returns:
+        tuple: (costo total, precio mediano por categoria, tiendas usadas, categorias faltantes). El costo es
+        None si no hay tiendas en el radio
+    """
+    tiendas, _ = indice.tiendas_en_radio(lat, lon, radio_km)
+    subtabla = indice.tabla_de_tiendas(tiendas)
+    precios = tabla_productos.estandarizar_precios_unidad_modal(subtabla, canasta)
+    precio_mediano = tabla_productos.calcular_precio_mediano_por_categoria(subtabla, precios)
+    categorias_faltantes = [categoria for categoria in canasta if categoria not in precio_mediano]
+    costo = utils.costo_total_canasta(canasta, precio_mediano) if len(tiendas) else None
+    return costo, precio_mediano, tiendas, categorias_faltantes
+
+
+def costos_canasta_en_radio(indice, canasta, puntos, radio_km):
+    """
+    Evalua costo_canasta_en_radio para muchos puntos (hospitales o ubicaciones candidatas)
+
+    Args:
+        puntos (list): lista de (lat, lon)
+
+    Returns:
+        np.ndarray[float64]: costo total de la canasta para cada punto (NaN donde no hay tiendas en el radio)
+    """
+    return np.asarray([costo_canasta_en_radio(indice, canasta, lat, lon, radio_km)[0] for lat, lon in puntos],
+                      dtype=np.float64)
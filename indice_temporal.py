@@ -0,0 +1,236 @@
+import hashlib
+import json
+
+import numpy as np
+
+from canasta_incremental import CanastaIncremental, aportes_de_tienda
+from tasas_cambio import a_fecha
+
+
+#======================Indice de precios por ventanas de fecha de recogida==========================================================
+
+def lunes_de(fecha):
+    """
+    Returns:
+        np.datetime64: el lunes de la semana de 'fecha' (texto como 'collection_date' o np.datetime64)
+    """
+    dia = a_fecha(fecha)
+    # 1970-01-01 fue jueves: el dia 0 esta 3 dias despues de un lunes
+    return dia - (dia.astype(np.int64) + 3) % 7
+
+
+class IndicePreciosTemporal:
+    """
+    Indice de precios de la canasta por ventanas de 'collection_date'
+
+    Las tiendas se agrupan en bloques de 'paso' dias contados desde 'origen'. Cada ventana abarca
+    'dias_ventana' dias (un multiplo de 'paso') y termina al final de un bloque; con dias_ventana == paso
+    las ventanas no se solapan (semanas), con dias_ventana > paso son moviles (por ejemplo 28 dias que
+    avanzan de semana en semana). Para cada ventana se calculan las medianas por categoria y el costo de la
+    canasta, con los mismos valores que utils.py sobre las tiendas de la ventana
+
+    Al avanzar de una ventana a la siguiente solo se agregan las tiendas del bloque que entra y se quitan las
+    del bloque que sale (canasta_incremental.CanastaIncremental). Los resultados se guardan por ventana junto
+    con una huella de las encuestas que contiene (claves y contenido): una ventana solo se recalcula si cambia
+    alguna de ellas. La cache (ver guardar_cache) guarda tambien los aportes de cada encuesta (categoria,
+    origen y precio estandarizado de sus productos), por lo que en cada corrida solo hay que pasar las
+    encuestas nuevas o corregidas: las historicas se toman de la cache sin volver a leerlas, y solo se
+    recalculan las ventanas que contienen alguna encuesta nueva o corregida
+
+    Ejemplo (corrida semanal):
+        indice = IndicePreciosTemporal(canasta, dias_ventana=7)
+        indice.cargar_cache('fuentes/.cache/indice_semanal.json')
+        indice.agregar_tiendas(encuestas_de_la_semana)
+        indice.resultados()
+        indice.guardar_cache('fuentes/.cache/indice_semanal.json')
+    """
+
+    def __init__(self, canasta, dias_ventana=7, paso=7, origen=None):
+        """
+        Args:
+            canasta (dict): canasta definida para el proyecto
+            dias_ventana (int): largo de cada ventana en dias
+            paso (int): dias que avanza la ventana
+            origen (str): fecha donde empieza el primer bloque (por defecto el lunes de la primera fecha recibida)
+
+        Raises:
+            ValueError: si dias_ventana no es un multiplo de paso
+        """
+        if paso <= 0 or dias_ventana % paso != 0:
+            raise ValueError(f"dias_ventana ({dias_ventana}) debe ser un multiplo de paso ({paso})")
+        self.canasta = canasta
+        self.dias_ventana = dias_ventana
+        self.paso = paso
+        self.bloques_por_ventana = dias_ventana // paso
+        self.origen = a_fecha(origen) if origen is not None else None
+        self.bloques = {} # {indice de bloque: {clave de encuesta: aportes de la encuesta}}
+        self.contenidos = {} # {clave de encuesta: sha1 del contenido de la encuesta}
+        self.de_cache = set() # claves de las encuestas que vienen de la cache (se pueden corregir)
+        self.sin_fecha = 0
+        self.cache = {} # {inicio de la ventana: resultado}
+        self.recalculadas = 0
+
+    def _configuracion(self):
+        # La huella de la canasta invalida la cache si cambian contenido_neto o cantidad_semanal de alguna categoria
+        canasta = json.dumps(self.canasta, sort_keys=True, ensure_ascii=False, default=str)
+        return {'dias_ventana': self.dias_ventana, 'paso': self.paso,
+                'origen': None if self.origen is None else str(self.origen),
+                'canasta': hashlib.sha1(canasta.encode('utf-8')).hexdigest()}
+
+    def agregar_tiendas(self, tiendas):
+        """
+        Agrega encuestas de tiendas (lista o generador, por ejemplo lectura_streaming.iterar_tiendas).
+        Una misma tienda puede aparecer en varias fechas; las tiendas sin 'collection_date' se cuentan en
+        'sin_fecha' y no entran en ninguna ventana. Una encuesta que ya estaba en la cache cargada (mismos
+        store_id y fecha) se toma como una correccion y reemplaza a la guardada
+
+        Raises:
+            ValueError: si llega dos veces la encuesta de una tienda en la misma fecha
+        """
+        for tienda in tiendas:
+            if not tienda.get('collection_date'):
+                self.sin_fecha += 1
+                continue
+            fecha = a_fecha(tienda['collection_date'])
+            if self.origen is None:
+                self.origen = lunes_de(fecha)
+            bloque = int((fecha - self.origen).astype(np.int64) // self.paso)
+            clave = f"{tienda['store_id']}@{fecha}"
+            if clave in self.bloques.get(bloque, {}) and clave not in self.de_cache:
+                raise ValueError(f"La encuesta {clave} ya fue agregada")
+            aportes = aportes_de_tienda(tienda, self.canasta)
+            self.de_cache.discard(clave)
+            # La clave sustituye al store_id para que la misma tienda en dos fechas cuente como dos encuestas
+            self.bloques.setdefault(bloque, {})[clave] = aportes
+            contenido = json.dumps(tienda, sort_keys=True, ensure_ascii=False, default=str)
+            self.contenidos[clave] = hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+    def _limites(self, ventana):
+        inicio = self.origen + np.timedelta64((ventana - self.bloques_por_ventana + 1) * self.paso, 'D')
+        fin = self.origen + np.timedelta64((ventana + 1) * self.paso - 1, 'D')
+        return str(inicio), str(fin)
+
+    def _huella(self, ventana):
+        # Clave y contenido de cada encuesta: una encuesta corregida (mismos store_id y fecha, otros precios)
+        # tambien invalida la ventana guardada en la cache
+        encuestas = []
+        for bloque in range(ventana - self.bloques_por_ventana + 1, ventana + 1):
+            encuestas.extend(f'{clave} {self.contenidos[clave]}' for clave in self.bloques.get(bloque, {}))
+        return hashlib.sha1('\n'.join(sorted(encuestas)).encode('utf-8')).hexdigest()
+
+    def _calcular(self, canasta_ventana, ventana, huella):
+        inicio, fin = self._limites(ventana)
+        n_tiendas = canasta_ventana.n_tiendas
+        precio_mediano = canasta_ventana.precio_mediano_por_categoria()
+        return {
+            'inicio': inicio,
+            'fin': fin,
+            'n_tiendas': n_tiendas,
+            'precio_mediano': precio_mediano,
+            'costo_total': canasta_ventana.costo_total() if n_tiendas else None,
+            'categorias_faltantes': [categoria for categoria in self.canasta if categoria not in precio_mediano],
+            'huella': huella,
+        }
+
+    def ventanas(self):
+        """
+        Calcula (o toma de la cache) el resultado de cada ventana, desde el primer bloque con datos hasta el ultimo
+
+        Returns:
+            list: un dict por ventana con 'inicio', 'fin' (incluidos), 'n_tiendas', 'precio_mediano', 'costo_total'
+            y 'categorias_faltantes' (categorias de la canasta sin precio en la ventana, que no suman al costo)
+        """
+        if not self.bloques:
+            return []
+        resultados = []
+        canasta_ventana = None
+        ventana_actual = None
+        for ventana in range(min(self.bloques), max(self.bloques) + 1):
+            inicio, _ = self._limites(ventana)
+            huella = self._huella(ventana)
+            guardado = self.cache.get(inicio)
+            if guardado is not None and guardado['huella'] == huella:
+                resultados.append(guardado)
+                continue
+
+            if canasta_ventana is not None and ventana_actual == ventana - 1:
+                # La ventana avanza un bloque: entran las tiendas del bloque nuevo y salen las del mas antiguo
+                for clave in self.bloques.get(ventana - self.bloques_por_ventana, {}):
+                    canasta_ventana.quitar_tienda(clave)
+                for clave, aportes in self.bloques.get(ventana, {}).items():
+                    canasta_ventana.agregar_aportes(clave, aportes)
+            else:
+                canasta_ventana = CanastaIncremental(self.canasta)
+                for bloque in range(ventana - self.bloques_por_ventana + 1, ventana + 1):
+                    for clave, aportes in self.bloques.get(bloque, {}).items():
+                        canasta_ventana.agregar_aportes(clave, aportes)
+            ventana_actual = ventana
+
+            resultado = self._calcular(canasta_ventana, ventana, huella)
+            self.cache[inicio] = resultado
+            self.recalculadas += 1
+            resultados.append(resultado)
+        return resultados
+
+    def resultados(self):
+        """
+        Serie del indice de precios
+
+        Returns:
+            list: un dict por ventana con las keys de ventanas() (sin la huella) mas 'indice' (costo respecto a
+            la primera ventana con tiendas, base 100) y 'variacion' (cambio relativo del costo respecto a la
+            ventana anterior con tiendas). Ambos son None en las ventanas sin tiendas
+        """
+        serie = []
+        base = None
+        anterior = None
+        for ventana in self.ventanas():
+            resultado = {clave: valor for clave, valor in ventana.items() if clave != 'huella'}
+            costo = resultado['costo_total']
+            resultado['indice'] = None
+            resultado['variacion'] = None
+            if costo is not None:
+                if base is None:
+                    base = costo
+                resultado['indice'] = costo / base * 100 if base else None
+                resultado['variacion'] = costo / anterior - 1 if anterior else None
+                anterior = costo
+            serie.append(resultado)
+        return serie
+
+    def guardar_cache(self, path):
+        """Guarda en un archivo JSON los resultados por ventana y las encuestas de cada bloque (clave, huella del
+        contenido y aportes), para que la corrida siguiente solo necesite las encuestas nuevas"""
+        encuestas = {clave: {'bloque': bloque, 'contenido': self.contenidos[clave], 'aportes': aportes}
+                     for bloque, por_clave in self.bloques.items() for clave, aportes in por_clave.items()}
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'configuracion': self._configuracion(), 'ventanas': self.cache, 'encuestas': encuestas},
+                      file, ensure_ascii=False)
+
+    def cargar_cache(self, path):
+        """
+        Carga los resultados y las encuestas guardados con guardar_cache. Si el archivo no existe no hace nada.
+        Las encuestas ya agregadas en este proceso tienen prioridad sobre las de la cache
+
+        Raises:
+            ValueError: si la cache se calculo con otras ventanas (dias_ventana, paso u origen distintos) o con
+                otra canasta
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                contenido = json.load(file)
+        except FileNotFoundError:
+            return
+        configuracion = contenido['configuracion']
+        if self.origen is None and configuracion['origen'] is not None:
+            self.origen = a_fecha(configuracion['origen'])
+        if configuracion != self._configuracion():
+            raise ValueError(f"La cache {path} corresponde a otras ventanas o a otra canasta: {configuracion}")
+        self.cache.update(contenido['ventanas'])
+        for clave, encuesta in contenido['encuestas'].items():
+            encuestas = self.bloques.setdefault(encuesta['bloque'], {})
+            if clave in encuestas:
+                continue
+            encuestas[clave] = [tuple(aporte) for aporte in encuesta['aportes']]
+            self.contenidos[clave] = encuesta['contenido']
+            self.de_cache.add(clave)
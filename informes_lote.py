@@ -0,0 +1,175 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+
+import utils
+
+
+#======================Renderizado por lotes de los boletines (sin pantalla)==========================================================
+
+# figura -> (biblioteca, tamaño en pulgadas de las figuras de matplotlib, funcion de visualizaciones.py que la dibuja)
+FIGURAS = {
+    'canastas_vs_salario': ('matplotlib', (8, 6), 'dibujar_canastas_vs_salario'),
+    'origen_de_productos': ('plotly', None, 'figura_origen_de_productos_por_categoria'),
+    'distancia_vs_precios_jugos': ('matplotlib', (10, 6), 'dibujar_distancia_vs_precios_jugos'),
+    'costo_total_canasta': ('plotly', None, 'figura_costo_total_canasta'),
+    'disponibilidad': ('matplotlib', (10, 6), 'dibujar_disponibilidad'),
+}
+
+FORMATOS = ('png', 'svg', 'html')
+
+# Plantillas del proceso actual: {figura: matplotlib.figure.Figure | go.Figure}. Cada proceso del pool crea
+# una figura por tipo la primera vez y en los boletines siguientes solo reemplaza sus datos
+_PLANTILLAS = {}
+
+
+def boletin(nombre, canasta, tiendas, salario, costo_canasta_online):
+    """
+    Datos de todas las figuras del informe para una muestra de tiendas (por ejemplo las MIPYMES cercanas a un
+    hospital o las de una ventana de fechas), calculados con las mismas funciones de utils.py que el notebook
+
+    Args:
+        nombre (str): nombre del boletin (subdirectorio de salida)
+        canasta (dict): canasta definida para el proyecto
+        tiendas (list): tiendas de la muestra
+        salario (float): salario medio estatal
+        costo_canasta_online (float): costo de la canasta en SuperMarket23 (comun a todos los boletines)
+
+    Returns:
+        dict: {'nombre': nombre, 'figuras': {figura de FIGURAS: argumentos de su funcion de dibujo}}
+    """
+    productos_categoria = utils.agrupar_productos_por_categoria(tiendas)
+    precios_estandarizados = utils.estandarizar_precios_unidad_modal(productos_categoria, canasta)
+    precio_mediano = utils.calcular_precio_mediano_por_categoria(precios_estandarizados)
+    return {
+        'nombre': nombre,
+        'figuras': {
+            'canastas_vs_salario': (utils.costo_total_canasta(canasta, precio_mediano), costo_canasta_online, salario),
+            'origen_de_productos': (utils.conteo_origen(tiendas),),
+            'distancia_vs_precios_jugos': (utils.estandarizar_jugos_a_200ml(tiendas),),
+            'costo_total_canasta': (canasta, utils.calcular_costos_totales_por_categoria_canasta(canasta, precio_mediano)),
+            'disponibilidad': (utils.conteo_disponibilidad_categorias(tiendas), len(tiendas)),
+        },
+    }
+
+
+def _iniciar_proceso():
+    # Los procesos del pool no tienen pantalla: backend sin interfaz grafica
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _guardar_matplotlib(fig, ruta, formato, dpi):
+    if formato == 'html':
+        # matplotlib no exporta HTML: se incrusta el SVG en una pagina minima
+        svg = io.StringIO()
+        fig.savefig(svg, format='svg')
+        with open(ruta, 'w', encoding='utf-8') as file:
+            file.write(f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"></head><body>\n{svg.getvalue()}</body></html>\n')
+    else:
+        fig.savefig(ruta, format=formato, dpi=dpi)
+
+
+def _guardar_plotly(fig, ruta, formato, plotlyjs):
+    if formato == 'html':
+        fig.write_html(ruta, include_plotlyjs=plotlyjs, full_html=True)
+    else:
+        fig.write_image(ruta, format=formato)
+
+
+def renderizar_boletin(boletin, directorio, formatos=('png', 'html'), dpi=100, plotlyjs='cdn'):
+    """
+    Renderiza las figuras de un boletin a archivos, sin mostrarlas
+
+    Las figuras de matplotlib se dibujan sobre matplotlib.figure.Figure (sin pyplot, por lo que no necesitan
+    pantalla ni quedan registradas en el estado global) y las de plotly se exportan directamente. En ambos
+    casos la figura de cada tipo se reutiliza entre boletines del mismo proceso como plantilla
+
+    Args:
+        boletin (dict): resultado de boletin() (solo se renderizan las figuras presentes en 'figuras')
+        directorio (str): los archivos se escriben en directorio/<nombre del boletin>/<figura>.<formato>
+        formatos (tuple): formatos de FORMATOS. Las figuras de matplotlib en 'html' se guardan como SVG
+            incrustado; las de plotly en 'png' o 'svg' necesitan el paquete kaleido
+        dpi (int): resolucion de los PNG de matplotlib
+        plotlyjs: 'include_plotlyjs' de los HTML de plotly ('cdn' enlaza plotly.js; True lo incrusta en cada
+            archivo, unos 3.5 MB, para verlos sin conexion)
+
+    Returns:
+        list: rutas de los archivos escritos
+    """
+    from matplotlib.figure import Figure
+    import visualizaciones
+
+    salida = os.path.join(directorio, boletin['nombre'])
+    os.makedirs(salida, exist_ok=True)
+    rutas = []
+    for figura, argumentos in boletin['figuras'].items():
+        biblioteca, tamano, funcion = FIGURAS[figura]
+        dibujar = getattr(visualizaciones, funcion)
+        if biblioteca == 'matplotlib':
+            if figura not in _PLANTILLAS:
+                _PLANTILLAS[figura] = Figure(figsize=tamano)
+            fig = dibujar(_PLANTILLAS[figura], *argumentos)
+        else:
+            fig = _PLANTILLAS[figura] = dibujar(*argumentos, fig=_PLANTILLAS.get(figura))
+
+        for formato in formatos:
+            ruta = os.path.join(salida, f'{figura}.{formato}')
+            if biblioteca == 'matplotlib':
+                _guardar_matplotlib(fig, ruta, formato, dpi)
+            else:
+                _guardar_plotly(fig, ruta, formato, plotlyjs)
+            rutas.append(ruta)
+    return rutas
+
+
+def _renderizar(argumentos):
+    return renderizar_boletin(*argumentos)
+
+
+def renderizar_lote(boletines, directorio, formatos=('png', 'html'), procesos=None, dpi=100, plotlyjs='cdn'):
+    """
+    Renderiza muchos boletines (por ejemplo uno por hospital o por ventana de fechas) en un pool de procesos,
+    sin pantalla. Cada proceso reutiliza sus plantillas de figura para todos los boletines que le tocan
+
+    Ejemplo:
+        costo_online = utils.costo_total_canasta(canasta, precio_mediano_tienda_online)
+        boletines = [informes_lote.boletin(hospital, canasta, tiendas_hospital, salario_medio, costo_online)
+                     for hospital, tiendas_hospital in tiendas_por_hospital.items()]
+        informes_lote.renderizar_lote(boletines, 'informes', formatos=('png', 'svg', 'html'))
+
+    Args:
+        boletines (iterable): resultados de boletin()
+        directorio (str): directorio de salida (ver renderizar_boletin)
+        formatos (tuple): formatos de FORMATOS
+        procesos (int): procesos del pool (por defecto os.cpu_count()); con 1 se renderiza en este proceso
+        dpi, plotlyjs: ver renderizar_boletin
+
+    Returns:
+        dict: {nombre del boletin: rutas de los archivos escritos}
+
+    Raises:
+        ValueError: si algun formato no esta en FORMATOS
+        ImportError: si se pide 'png' o 'svg' y no esta instalado kaleido (exportacion de imagenes de plotly)
+    """
+    formatos = tuple(formatos)
+    desconocidos = [formato for formato in formatos if formato not in FORMATOS]
+    if desconocidos:
+        raise ValueError(f"Formatos no soportados: {desconocidos} (usar {FORMATOS})")
+    boletines = list(boletines)
+    usa_plotly = any(FIGURAS[figura][0] == 'plotly' for b in boletines for figura in b['figuras'])
+    if usa_plotly and set(formatos) - {'html'} and find_spec('kaleido') is None:
+        # Se comprueba antes de repartir el trabajo para no fallar en cada proceso a mitad del lote
+        raise ImportError("Exportar figuras de plotly a PNG/SVG requiere el paquete kaleido (pip install kaleido)")
+
+    trabajos = [(b, directorio, formatos, dpi, plotlyjs) for b in boletines]
+    if procesos == 1:
+        # Sin pyplot no hace falta cambiar el backend de este proceso (por ejemplo el del notebook)
+        rutas = map(_renderizar, trabajos)
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso) as pool:
+            # Boletines en bloques para que cada proceso reutilice sus plantillas en varios seguidos
+            bloque = max(1, len(trabajos) // (4 * (procesos or os.cpu_count() or 1)))
+            rutas = list(pool.map(_renderizar, trabajos, chunksize=bloque))
+    return {b['nombre']: r for b, r in zip(boletines, rutas)}
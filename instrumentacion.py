@@ -0,0 +1,192 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+#======================Instrumentacion opcional por etapa==========================================================
+
+class _Estado:
+    activo = False # se consulta en cada llamada: cuando es False el costo de una etapa es solo esta lectura
+    memoria = False
+    registros = []
+    origen_ns = 0
+
+
+_estado = _Estado()
+_hilo = threading.local() # pila de etapas abiertas en cada hilo
+
+
+def activar(memoria=False):
+    """
+    Empieza a registrar las etapas instrumentadas
+
+    Args:
+        memoria (bool): registrar tambien el pico de memoria asignada en cada etapa (usa tracemalloc,
+            que hace mas lenta la ejecucion)
+    """
+    _estado.registros = []
+    _estado.origen_ns = time.perf_counter_ns()
+    _estado.memoria = memoria
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _estado.activo = True
+
+
+def desactivar():
+    """
+    Deja de registrar etapas y devuelve los registros acumulados
+
+    Returns:
+        list: registros (ver registros())
+    """
+    _estado.activo = False
+    if _estado.memoria and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _estado.memoria = False
+    return registros()
+
+
+def registros():
+    """
+    Returns:
+        list: un dict por etapa ejecutada con las keys 'etapa', 'inicio_s' (desde activar), 'duracion_s',
+        'filas', 'memoria_pico_bytes' (None si no se mide memoria), 'hilo' y 'nivel' (profundidad de anidamiento)
+    """
+    return list(_estado.registros)
+
+
+class registrando:
+    """
+    Context manager que activa la instrumentacion dentro de un bloque
+
+    Ejemplo:
+        with instrumentacion.registrando() as sesion:
+            ...
+        sesion.registros
+    """
+
+    def __init__(self, memoria=False):
+        self.memoria = memoria
+        self.registros = []
+
+    def __enter__(self):
+        activar(self.memoria)
+        return self
+
+    def __exit__(self, *exc):
+        self.registros = desactivar()
+        return False
+
+
+def etapa(nombre=None, filas=None):
+    """
+    Decorador que registra tiempo, filas procesadas y pico de memoria de una funcion cuando la
+    instrumentacion esta activa. Cuando esta desactivada solo agrega una comprobacion por llamada
+
+    Args:
+        nombre (str): nombre de la etapa (por defecto el nombre de la funcion)
+        filas (callable): funcion (resultado, *args, **kwargs) -> int con la cantidad de filas procesadas
+    """
+    def decorador(funcion):
+        nombre_etapa = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _estado.activo:
+                return funcion(*args, **kwargs)
+            return _ejecutar_registrando(nombre_etapa, filas, funcion, args, kwargs)
+
+        return envoltura
+    return decorador
+
+
+def _ejecutar_registrando(nombre, filas, funcion, args, kwargs):
+    pila = getattr(_hilo, 'pila', None)
+    if pila is None:
+        pila = _hilo.pila = []
+
+    medir_memoria = _estado.memoria and tracemalloc.is_tracing()
+    if medir_memoria:
+        actual, pico = tracemalloc.get_traced_memory()
+        if pila:
+            # El pico acumulado por la etapa padre se guarda antes de reiniciar el contador
+            pila[-1]['pico'] = max(pila[-1]['pico'], pico)
+        tracemalloc.reset_peak()
+        marco = {'base': actual, 'pico': actual}
+    else:
+        marco = {'base': 0, 'pico': 0}
+    pila.append(marco)
+
+    inicio = time.perf_counter_ns()
+    try:
+        resultado = funcion(*args, **kwargs)
+    finally:
+        duracion = time.perf_counter_ns() - inicio
+        pila.pop()
+        memoria_pico = None
+        if medir_memoria:
+            pico_absoluto = max(marco['pico'], tracemalloc.get_traced_memory()[1])
+            memoria_pico = pico_absoluto - marco['base']
+            if pila:
+                pila[-1]['pico'] = max(pila[-1]['pico'], pico_absoluto)
+            tracemalloc.reset_peak()
+
+    _estado.registros.append({
+        'etapa': nombre,
+        'inicio_s': (inicio - _estado.origen_ns) / 1e9,
+        'duracion_s': duracion / 1e9,
+        'filas': filas(resultado, *args, **kwargs) if filas is not None else None,
+        'memoria_pico_bytes': memoria_pico,
+        'hilo': threading.get_ident(),
+        'nivel': len(pila),
+    })
+    return resultado
+
+
+def resumen(registros_etapas=None):
+    """
+    Agrega los registros por etapa
+
+    Returns:
+        dict: {etapa: {'llamadas', 'duracion_s', 'filas', 'memoria_pico_bytes'}} con la duracion y las filas
+        sumadas y el maximo de los picos de memoria
+    """
+    resultado = {}
+    for registro in registros_etapas if registros_etapas is not None else registros():
+        total = resultado.setdefault(registro['etapa'], {'llamadas': 0, 'duracion_s': 0.0, 'filas': 0,
+                                                          'memoria_pico_bytes': None})
+        total['llamadas'] += 1
+        total['duracion_s'] += registro['duracion_s']
+        total['filas'] += registro['filas'] or 0
+        if registro['memoria_pico_bytes'] is not None:
+            total['memoria_pico_bytes'] = max(total['memoria_pico_bytes'] or 0, registro['memoria_pico_bytes'])
+    return resultado
+
+
+def exportar_json(path, registros_etapas=None):
+    """Guarda los registros como un log estructurado (una linea JSON por etapa)"""
+    with open(path, 'w', encoding='utf-8') as file:
+        for registro in registros_etapas if registros_etapas is not None else registros():
+            file.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+
+def exportar_chrome_trace(path, registros_etapas=None):
+    """
+    Guarda los registros en el formato Trace Event de Chrome (se abre en chrome://tracing o en Perfetto)
+    """
+    eventos = []
+    for registro in registros_etapas if registros_etapas is not None else registros():
+        eventos.append({
+            'name': registro['etapa'],
+            'ph': 'X',
+            'ts': registro['inicio_s'] * 1e6,
+            'dur': registro['duracion_s'] * 1e6,
+            'pid': os.getpid(),
+            'tid': registro['hilo'],
+            'args': {'filas': registro['filas'], 'memoria_pico_bytes': registro['memoria_pico_bytes']},
+        })
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, file)
@@ -0,0 +1,159 @@
+import json
+
+
+#======================Lectura incremental de archivos JSON==========================================================
+
+TAMANO_BLOQUE = 1 << 20 # caracteres que se leen del archivo en cada bloque (1 MiB aprox.)
+
+_ESPACIOS = ' \t\n\r'
+_SEPARADORES = _ESPACIOS + ',]'
+
+
+def iterar_elementos_json(path, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Recorre un archivo JSON cuya raiz es una lista y devuelve sus elementos uno por uno, sin cargar
+    el archivo completo en memoria
+
+    El archivo se lee por bloques de 'tamano_bloque' caracteres y cada elemento se decodifica con
+    json.JSONDecoder.raw_decode apenas esta completo en el buffer. La memoria usada queda acotada por el
+    tamaño del bloque mas el tamaño del elemento mas grande (por ejemplo una tienda con todos sus productos)
+
+    Args:
+        path (str): ruta del archivo JSON (por ejemplo 'fuentes/tiendas_privadas.json')
+        tamano_bloque (int): cantidad de caracteres que se leen en cada bloque
+
+    Yields:
+        cada elemento de la lista raiz, con el mismo valor que tendria en json.load(file)
+
+    Raises:
+        ValueError: si la raiz del archivo no es una lista o el archivo esta incompleto
+    """
+    decodificador = json.JSONDecoder()
+
+    with open(path, 'r', encoding='utf-8') as file:
+        buffer = file.read(tamano_bloque)
+        fin_archivo = len(buffer) < tamano_bloque
+        pos = 0
+
+        def leer_mas(buffer, pos, cantidad):
+            # Se descarta lo ya consumido para que el buffer no crezca con el archivo
+            bloque = file.read(cantidad)
+            return buffer[pos:] + bloque, 0, len(bloque) < cantidad
+
+        # Saltar espacios iniciales y verificar que la raiz sea una lista
+        while True:
+            while pos < len(buffer) and buffer[pos] in _ESPACIOS:
+                pos += 1
+            if pos < len(buffer) or fin_archivo:
+                break
+            buffer, pos, fin_archivo = leer_mas(buffer, pos, tamano_bloque)
+        if pos >= len(buffer) or buffer[pos] != '[':
+            raise ValueError(f"La raiz de {path} no es una lista JSON")
+        pos += 1
+
+        esperando_elemento = True  # despues de '[' o ',' toca un elemento (o el cierre de una lista vacia)
+        primero = True
+        while True:
+            while pos < len(buffer) and buffer[pos] in _ESPACIOS:
+                pos += 1
+            if pos >= len(buffer):
+                if fin_archivo:
+                    raise ValueError(f"El archivo {path} termina antes de cerrar la lista")
+                buffer, pos, fin_archivo = leer_mas(buffer, pos, tamano_bloque)
+                continue
+
+            caracter = buffer[pos]
+            if caracter == ']' and (not esperando_elemento or primero):
+                return
+            if caracter == ',' and not esperando_elemento:
+                esperando_elemento = True
+                pos += 1
+                continue
+            if not esperando_elemento:
+                raise ValueError(f"Se esperaba ',' o ']' en {path}")
+
+            # Intentar decodificar el siguiente elemento; si esta cortado por el final del bloque
+            # se leen mas datos (cada vez el doble) y se vuelve a intentar
+            cantidad = tamano_bloque
+            while True:
+                try:
+                    elemento, final = decodificador.raw_decode(buffer, pos)
+                    # Un numero cortado por el final del bloque (por ejemplo '3e' de '3e2') se decodifica
+                    # como un numero mas corto, asi que solo se acepta si lo sigue un separador
+                    if fin_archivo or (final < len(buffer) and buffer[final] in _SEPARADORES):
+                        break
+                except json.JSONDecodeError:
+                    if fin_archivo:
+                        raise
+                buffer, pos, fin_archivo = leer_mas(buffer, pos, cantidad)
+                cantidad *= 2
+
+            yield elemento
+            pos = final
+            esperando_elemento = False
+            primero = False
+
+            if pos > tamano_bloque:
+                buffer, pos = buffer[pos:], 0
+
+
+def iterar_tiendas(path, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Generador de tiendas (MIPYMES) leidas incrementalmente de un archivo con el formato de 'tiendas_privadas.json'
+
+    El resultado se puede pasar directamente a las funciones de utils.py que recorren la muestra una
+    sola vez: conteo_disponibilidad_categorias, agrupar_productos_por_categoria, conteo_origen,
+    estandarizar_jugos_a_200ml, y a tabla_productos.construir_tabla_productos. Cada generador se
+    consume una sola vez, por lo que para varias agregaciones hay que abrir un generador por funcion
+
+    Args:
+        path (str): ruta al archivo de tiendas
+        tamano_bloque (int): cantidad de caracteres que se leen en cada bloque
+
+    Yields:
+        dict: una tienda con sus productos
+    """
+    yield from iterar_elementos_json(path, tamano_bloque)
+
+
+def iterar_productos(tiendas):
+    """
+    Aplana un flujo de tiendas en un flujo de filas (tienda, producto)
+
+    Args:
+        tiendas (iterable): tiendas, por ejemplo el generador de iterar_tiendas
+
+    Yields:
+        tuple: (tienda, producto) para cada producto de cada tienda
+    """
+    for tienda in tiendas:
+        for producto in tienda['products']:
+            yield tienda, producto
+
+
+def estandarizar_precios_en_flujo(tiendas, canasta):
+    """
+    Estandariza los precios de un flujo de tiendas sin guardar los productos
+
+    Equivale a utils.estandarizar_precios_unidad_modal(utils.agrupar_productos_por_categoria(tiendas), canasta),
+    pero solo conserva un float por producto en lugar del diccionario completo de cada producto
+
+    Args:
+        tiendas (iterable): tiendas, por ejemplo el generador de iterar_tiendas
+        canasta (dict): canasta definida para el proyecto
+
+    Returns:
+        dict: {categoria: [precios estandarizados]} con las categorias en orden de primera aparicion
+    """
+    precios_estandarizados_categoria = {}
+
+    for _, producto in iterar_productos(tiendas):
+        categoria = producto['category']
+        if categoria not in precios_estandarizados_categoria:
+            precios_estandarizados_categoria[categoria] = []
+
+        # misma formula (y mismo orden de operaciones) que utils.estandarizar_precios_unidad_modal
+        factor_conversion = producto['net_weight'] / canasta[categoria]["contenido_neto"]
+        precios_estandarizados_categoria[categoria].append(producto['price_cup'] / factor_conversion)
+
+    return precios_estandarizados_categoria
@@ -0,0 +1,274 @@
+import numpy as np
+
+import tabla_productos
+from tabla_productos import TablaProductos
+
+
+#======================Normalizacion de precios a la presentacion de referencia==========================================================
+
+# unidad -> (dimension, factor a la unidad base de la dimension: g, ml o u)
+UNIDADES = {
+    'mg': ('masa', 0.001),
+    'g': ('masa', 1.0),
+    'kg': ('masa', 1000.0),
+    'oz': ('masa', 28.349523125),
+    'lb': ('masa', 453.59237),
+    'ml': ('volumen', 1.0),
+    'cl': ('volumen', 10.0),
+    'dl': ('volumen', 100.0),
+    'l': ('volumen', 1000.0),
+    'u': ('unidades', 1.0),
+}
+
+# Alertas por producto (se combinan como bits en la columna 'alertas')
+PESO_FALTANTE = 1 # net_weight ausente
+PESO_NO_POSITIVO = 2 # net_weight cero o negativo
+UNIDAD_DESCONOCIDA = 4 # la unidad del producto no esta en UNIDADES
+UNIDAD_INCOMPATIBLE = 8 # masa contra volumen (o unidades) respecto a la referencia de la categoria
+PRECIO_FALTANTE = 16 # sin precio en CUP (por ejemplo catalogo sin convertir_usd_a_cup)
+SIN_REFERENCIA = 32 # la categoria no esta en la canasta ni en 'referencias'
+
+NOMBRES_ALERTAS = {
+    PESO_FALTANTE: 'peso_faltante',
+    PESO_NO_POSITIVO: 'peso_no_positivo',
+    UNIDAD_DESCONOCIDA: 'unidad_desconocida',
+    UNIDAD_INCOMPATIBLE: 'unidad_incompatible',
+    PRECIO_FALTANTE: 'precio_faltante',
+    SIN_REFERENCIA: 'sin_referencia',
+}
+
+# Alertas que impiden calcular el precio normalizado
+_INVALIDANTES = PESO_FALTANTE | PESO_NO_POSITIVO | UNIDAD_DESCONOCIDA | PRECIO_FALTANTE | SIN_REFERENCIA
+
+
+def parsear_cantidad(texto):
+    """
+    Separa una presentacion como '1000 ml', '590 g' o '1 u' en cantidad y unidad
+
+    Returns:
+        tuple: (float, str) con la unidad en minusculas; (None, None) si el texto no tiene ese formato
+    """
+    partes = str(texto or '').split()
+    if len(partes) != 2:
+        return None, None
+    try:
+        return float(partes[0]), partes[1].lower()
+    except ValueError:
+        return None, None
+
+
+def referencias_de_canasta(canasta):
+    """
+    Presentacion de referencia de cada categoria segun la canasta: 'contenido_neto' en la unidad indicada en
+    'unidad' o 'unidad_minima_observada'
+
+    Returns:
+        dict: {categoria: (cantidad, unidad)} (unidad None si la canasta no la indica)
+    """
+    referencias = {}
+    for categoria, definicion in canasta.items():
+        _, unidad = parsear_cantidad(definicion.get('unidad') or definicion.get('unidad_minima_observada'))
+        referencias[categoria] = (float(definicion['contenido_neto']), unidad)
+    return referencias
+
+
+class TablaNormalizada:
+    """
+    Resultado de normalizar_precios: columnas alineadas con las filas de la TablaProductos de origen
+
+    Columnas:
+        precio (np.ndarray[float64]): precio en CUP de la presentacion de referencia (NaN si hay una alerta invalidante)
+        cantidad (np.ndarray[float64]): contenido del envase expresado en la unidad de referencia de su categoria
+        referencia (np.ndarray[float64]): tamaño de la presentacion de referencia de la categoria
+        alertas (np.ndarray[int8]): combinacion de bits PESO_FALTANTE, PESO_NO_POSITIVO, ... (0 = sin alertas)
+    """
+
+    def __init__(self, tabla, precio, cantidad, referencia, alertas, unidades_referencia):
+        self.tabla = tabla
+        self.precio = precio
+        self.cantidad = cantidad
+        self.referencia = referencia
+        self.alertas = alertas
+        self.unidades_referencia = unidades_referencia # {categoria: unidad}
+
+    def __len__(self):
+        return len(self.precio)
+
+    def validos(self):
+        """Mascara de las filas con precio normalizado"""
+        return ~np.isnan(self.precio)
+
+    def con_alerta(self, alerta):
+        """Mascara de las filas que tienen la alerta indicada (por ejemplo UNIDAD_INCOMPATIBLE)"""
+        return (self.alertas & alerta) != 0
+
+    def resumen_alertas(self):
+        """
+        Returns:
+            dict: {nombre de la alerta: cantidad de productos con esa alerta}
+        """
+        return {nombre: int(np.count_nonzero(self.con_alerta(alerta))) for alerta, nombre in NOMBRES_ALERTAS.items()}
+
+    def por_categoria(self):
+        """
+        Precios normalizados validos separados por categoria, con el formato de utils.estandarizar_precios_unidad_modal
+
+        Returns:
+            dict: {categoria: np.ndarray de precios}
+        """
+        validos = np.flatnonzero(self.validos())
+        orden, grupos, inicios = tabla_productos.indices_por_grupo(self.tabla.categoria[validos])
+        agrupados = np.split(self.precio[validos][orden], inicios[1:])
+        return {self.tabla.categorias[c]: precios for c, precios in zip(grupos, agrupados)}
+
+    def columnas(self):
+        """
+        Tabla plana (un arreglo por columna) con los datos de cada producto y su normalizacion
+
+        Returns:
+            dict: {'tienda', 'distancia_km', 'categoria', 'producto', 'marca', 'origen', 'unidad',
+            'precio_original', 'peso_neto_original', 'unidad_referencia', 'cantidad', 'referencia',
+            'precio_normalizado', 'alertas'}
+        """
+        tabla = self.tabla
+        return {
+            'tienda': np.asarray(tabla.tienda_nombres, dtype=object)[tabla.tienda],
+            'distancia_km': tabla.distancia,
+            'categoria': np.asarray(tabla.categorias, dtype=object)[tabla.categoria],
+            'producto': np.asarray(tabla.nombres, dtype=object)[tabla.nombre],
+            'marca': np.asarray(tabla.marcas, dtype=object)[tabla.marca],
+            'origen': np.asarray(tabla.origenes, dtype=object)[tabla.origen],
+            'unidad': np.asarray(tabla.unidades, dtype=object)[tabla.unidad],
+            'precio_original': tabla.precio_cup,
+            'peso_neto_original': tabla.peso_neto,
+            'unidad_referencia': np.asarray([self.unidades_referencia.get(c) for c in tabla.categorias],
+                                            dtype=object)[tabla.categoria],
+            'cantidad': self.cantidad,
+            'referencia': self.referencia,
+            'precio_normalizado': self.precio,
+            'alertas': self.alertas,
+        }
+
+
+def _referencia_explicita(categoria, referencia):
+    """Valida una referencia pasada a normalizar_precios ('200 ml' o (200, 'ml')) y la devuelve como (float, unidad)"""
+    if isinstance(referencia, str):
+        cantidad, unidad = parsear_cantidad(referencia)
+    elif isinstance(referencia, (tuple, list)) and len(referencia) == 2:
+        cantidad, unidad = referencia
+    else:
+        cantidad, unidad = None, None
+    unidad = str(unidad).lower() if unidad is not None else None
+    try:
+        cantidad = float(cantidad)
+    except (TypeError, ValueError):
+        cantidad = None
+    # (cantidad, None) es valido: como una categoria de la canasta sin unidad, se compara en las unidades base
+    if cantidad is None or (unidad is not None and unidad not in UNIDADES):
+        raise ValueError(f"Referencia no valida para la categoria {categoria!r}: {referencia!r} "
+                         f"(usar el formato '200 ml' o (200, 'ml'), con una unidad de {list(UNIDADES)})")
+    return cantidad, unidad
+
+
+def normalizar_precios(tabla, canasta=None, referencias=None, categorias=None, permitir_incompatibles=True):
+    """
+    Lleva el precio de cada producto al de la presentacion de referencia de su categoria, en una sola
+    pasada vectorizada sobre toda la tabla
+
+        precio_normalizado = precio_cup / (peso_neto * factor_unidad / referencia)
+
+    donde factor_unidad convierte la unidad del producto a la de la referencia (g/kg/mg/oz/lb, ml/L/cl/dl, u).
+    Las conversiones se resuelven una vez por valor distinto de 'unit' (no por producto). Los productos con
+    peso ausente o no positivo, unidad desconocida, sin precio o de una categoria sin referencia no generan
+    error: quedan con precio NaN y la alerta correspondiente en la columna 'alertas'
+
+    Con las unidades de las fuentes actuales y permitir_incompatibles=True el resultado coincide con
+    utils.estandarizar_precios_unidad_modal, y con referencias={'jugos': '200 ml'} el de los jugos coincide
+    con utils.estandarizar_jugos_a_200ml al redondear a 2 decimales
+
+    Args:
+        tabla (TablaProductos)
+        canasta (dict): canasta definida para el proyecto (referencias por defecto)
+        referencias (dict): {categoria: '200 ml' | (200, 'ml')} para reemplazar o agregar referencias
+        categorias (list): normalizar solo estas categorias (el resto queda con alerta SIN_REFERENCIA)
+        permitir_incompatibles (bool): si la unidad del producto es de otra dimension que la referencia
+            (masa contra volumen o unidades) se compara en las unidades base (1 g = 1 ml = 1 u), como hacen
+            las funciones de utils.py, y se marca UNIDAD_INCOMPATIBLE. Si es False esos productos quedan sin precio
+
+    Returns:
+        TablaNormalizada
+
+    Raises:
+        ValueError: si alguna de 'referencias' no tiene el formato '<cantidad> <unidad>' (o (cantidad, unidad))
+            o su unidad (salvo None) no esta en UNIDADES
+    """
+    referencias_categoria = referencias_de_canasta(canasta or {})
+    for categoria, referencia in (referencias or {}).items():
+        referencias_categoria[categoria] = _referencia_explicita(categoria, referencia)
+    if categorias is not None:
+        referencias_categoria = {c: r for c, r in referencias_categoria.items() if c in set(categorias)}
+
+    # Vectores por codigo de categoria: tamaño de referencia y dimension/factor de su unidad
+    n_categorias = len(tabla.categorias)
+    tamano_ref = np.full(n_categorias, np.nan)
+    dimension_ref = np.full(n_categorias, -1, dtype=np.int16)
+    factor_ref = np.ones(n_categorias)
+    dimensiones = {}
+    for codigo, categoria in enumerate(tabla.categorias):
+        if categoria not in referencias_categoria:
+            continue
+        tamano, unidad = referencias_categoria[categoria]
+        tamano_ref[codigo] = tamano
+        if unidad in UNIDADES:
+            dimension, factor = UNIDADES[unidad]
+            dimension_ref[codigo] = dimensiones.setdefault(dimension, len(dimensiones))
+            factor_ref[codigo] = factor
+
+    # Vectores por codigo de unidad del producto
+    n_unidades = len(tabla.unidades)
+    dimension_unidad = np.full(n_unidades, -1, dtype=np.int16)
+    factor_unidad = np.full(n_unidades, np.nan)
+    for codigo, unidad in enumerate(tabla.unidades):
+        unidad = str(unidad).lower()
+        if unidad in UNIDADES:
+            dimension, factor = UNIDADES[unidad]
+            dimension_unidad[codigo] = dimensiones.setdefault(dimension, len(dimensiones))
+            factor_unidad[codigo] = factor
+
+    referencia = tamano_ref[tabla.categoria]
+    dim_ref = dimension_ref[tabla.categoria]
+    dim_producto = dimension_unidad[tabla.unidad]
+    peso = tabla.peso_neto
+
+    alertas = np.zeros(len(tabla), dtype=np.int8)
+    alertas[np.isnan(referencia)] |= SIN_REFERENCIA
+    alertas[np.isnan(peso)] |= PESO_FALTANTE
+    with np.errstate(invalid='ignore'):
+        alertas[peso <= 0] |= PESO_NO_POSITIVO
+    alertas[dim_producto < 0] |= UNIDAD_DESCONOCIDA
+    incompatible = (dim_producto >= 0) & (dim_ref >= 0) & (dim_producto != dim_ref)
+    alertas[incompatible] |= UNIDAD_INCOMPATIBLE
+    alertas[np.isnan(tabla.precio_cup)] |= PRECIO_FALTANTE
+
+    # Factor de la unidad del producto a la de la referencia. Sin unidad en la referencia se toma la del
+    # producto tal cual (factor 1), como en utils.estandarizar_precios_unidad_modal
+    factor = factor_unidad[tabla.unidad] / factor_ref[tabla.categoria]
+    factor[dim_ref < 0] = 1.0
+    invalidos = (alertas & _INVALIDANTES) != 0
+    if not permitir_incompatibles:
+        invalidos |= incompatible
+
+    cantidad = peso * factor
+    precio = np.full(len(tabla), np.nan)
+    validos = ~invalidos
+    precio[validos] = tabla.precio_cup[validos] / (cantidad[validos] / referencia[validos])
+
+    unidades_referencia = {categoria: unidad for categoria, (_, unidad) in referencias_categoria.items()}
+    return TablaNormalizada(tabla, precio, cantidad, referencia, alertas, unidades_referencia)
+
+
+def normalizar_tiendas(tiendas, canasta=None, referencias=None, categorias=None, permitir_incompatibles=True):
+    """normalizar_precios sobre una lista de tiendas (MIPYMES) o una TablaProductos"""
+    if not isinstance(tiendas, TablaProductos):
+        tiendas = tabla_productos.construir_tabla_productos(tiendas)
+    return normalizar_precios(tiendas, canasta, referencias, categorias, permitir_incompatibles)
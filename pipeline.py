@@ -0,0 +1,385 @@
+import copy
+import hashlib
+import os
+import pickle
+import sys
+import types
+from collections import OrderedDict
+
+import numpy as np
+
+import utils
+from producto_compacto import Producto
+from tabla_productos import TablaProductos
+
+
+#======================Huellas de contenido==========================================================
+
+def _actualizar_huella(sha, valor):
+    # Recorre el valor y alimenta el hash con su tipo y contenido. El orden de las keys de los diccionarios
+    # forma parte de la huella porque las funciones de utils.py lo conservan en sus resultados
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        sha.update(f"{type(valor).__name__}:{valor!r};".encode('utf-8'))
+    elif isinstance(valor, dict):
+        sha.update(f"dict{len(valor)}{{".encode('utf-8'))
+        for clave, elemento in valor.items():
+            _actualizar_huella(sha, clave)
+            _actualizar_huella(sha, elemento)
+        sha.update(b'}')
+    elif isinstance(valor, (list, tuple)):
+        sha.update(f"{type(valor).__name__}{len(valor)}[".encode('utf-8'))
+        for elemento in valor:
+            _actualizar_huella(sha, elemento)
+        sha.update(b']')
+    elif isinstance(valor, Producto):
+        sha.update(b'Producto')
+        _actualizar_huella(sha, valor.a_dict())
+    elif isinstance(valor, np.ndarray):
+        sha.update(f"ndarray{valor.dtype.str}{valor.shape}".encode('utf-8'))
+        if valor.dtype == object:
+            _actualizar_huella(sha, valor.tolist())
+        else:
+            sha.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, np.generic):
+        _actualizar_huella(sha, valor.item())
+    elif isinstance(valor, TablaProductos):
+        sha.update(b'TablaProductos')
+        _actualizar_huella(sha, valor.columnas())
+        _actualizar_huella(sha, valor.diccionarios())
+        _actualizar_huella(sha, valor.columnas_tiendas())
+    else:
+        raise TypeError(f"No se puede calcular la huella de un valor de tipo {type(valor).__name__}")
+
+
+def huella_contenido(valor):
+    """
+    Hash (sha256) del contenido de un valor: dos valores con el mismo contenido tienen la misma huella
+    aunque sean objetos distintos
+
+    Args:
+        valor: dict, list, tuple, escalares, np.ndarray, producto_compacto.Producto o TablaProductos (anidados)
+
+    Returns:
+        str: hash en hexadecimal
+    """
+    sha = hashlib.sha256()
+    _actualizar_huella(sha, valor)
+    return sha.hexdigest()
+
+
+_DIRECTORIO_PROYECTO = os.path.dirname(os.path.abspath(__file__))
+_HUELLAS_ARCHIVO = {} # {ruta: (mtime, sha256 del codigo fuente)}
+
+
+def _huella_archivo(ruta):
+    # Hash del codigo fuente de un modulo, recalculado solo si cambia la fecha de modificacion del archivo
+    mtime = os.stat(ruta).st_mtime_ns
+    guardado = _HUELLAS_ARCHIVO.get(ruta)
+    if guardado is None or guardado[0] != mtime:
+        with open(ruta, 'rb') as file:
+            guardado = _HUELLAS_ARCHIVO[ruta] = (mtime, hashlib.sha256(file.read()).hexdigest())
+    return guardado[1]
+
+
+def _archivo_del_proyecto(modulo):
+    ruta = getattr(modulo, '__file__', None)
+    if ruta and ruta.endswith('.py') and os.path.dirname(os.path.abspath(ruta)) == _DIRECTORIO_PROYECTO:
+        return ruta
+    return None
+
+
+def _actualizar_huella_codigo(sha, codigo):
+    # Bytecode, nombres y constantes; los code objects anidados (genexpr, listcomp, lambdas) se recorren en
+    # lugar de usar su repr, que incluye su direccion de memoria y cambia en cada proceso
+    sha.update(codigo.co_code)
+    sha.update(repr(codigo.co_names).encode('utf-8'))
+    for constante in codigo.co_consts:
+        if isinstance(constante, types.CodeType):
+            sha.update(b'code{')
+            _actualizar_huella_codigo(sha, constante)
+            sha.update(b'}')
+        elif isinstance(constante, frozenset):
+            # el orden de iteracion de un frozenset de str depende de la semilla de hash del proceso
+            sha.update(repr(sorted(map(repr, constante))).encode('utf-8'))
+        else:
+            sha.update(repr(constante).encode('utf-8'))
+
+
+def _nombres_globales(codigo):
+    nombres = set(codigo.co_names)
+    for constante in codigo.co_consts:
+        if isinstance(constante, types.CodeType):
+            nombres |= _nombres_globales(constante)
+    return nombres
+
+
+def _huella_funcion(funcion):
+    """
+    Huella del codigo de una etapa: nombre calificado, bytecode (con los code objects anidados recorridos
+    recursivamente) y, por cada nombre global que usa, la huella de la funcion auxiliar o el codigo fuente del
+    modulo del proyecto al que se refiere. Asi, si cambia la etapa o un auxiliar que llama (por ejemplo
+    tabla_productos.precios_estandarizados_por_categoria desde utils.py) cambian sus claves en la cache de disco,
+    y la huella es la misma en todos los procesos
+    """
+    sha = hashlib.sha256()
+    pendientes = [funcion]
+    vistos = set()
+    while pendientes:
+        actual = pendientes.pop()
+        actual = getattr(actual, '__wrapped__', actual)
+        if id(actual) in vistos:
+            continue
+        vistos.add(id(actual))
+        codigo = actual.__code__
+        sha.update(f"{actual.__module__}.{actual.__qualname__}|".encode('utf-8'))
+        _actualizar_huella_codigo(sha, codigo)
+        globales = getattr(actual, '__globals__', {})
+        for nombre in sorted(_nombres_globales(codigo)):
+            valor = globales.get(nombre)
+            if isinstance(valor, types.FunctionType):
+                pendientes.append(valor)
+            elif isinstance(valor, types.ModuleType):
+                ruta = _archivo_del_proyecto(valor)
+            elif isinstance(valor, type):
+                ruta = _archivo_del_proyecto(sys.modules.get(valor.__module__))
+            else:
+                continue
+            if not isinstance(valor, types.FunctionType) and ruta is not None:
+                sha.update(f"{nombre}:{_huella_archivo(ruta)};".encode('utf-8'))
+    return sha.hexdigest()
+
+
+#======================Cache acotada (memoria y disco)==========================================================
+
+class CacheLRU:
+    """
+    Cache de resultados por clave con politica LRU en memoria y, opcionalmente, en disco (un archivo pickle
+    por clave). Ambas estan acotadas por cantidad de entradas
+    """
+
+    def __init__(self, max_entradas=128, directorio=None, max_entradas_disco=1024):
+        self.max_entradas = max_entradas
+        self.directorio = directorio
+        self.max_entradas_disco = max_entradas_disco
+        self._memoria = OrderedDict()
+        if directorio is not None:
+            os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave + '.pkl')
+
+    def obtener(self, clave):
+        """
+        Returns:
+            tuple: (origen, valor) con origen 'memoria' o 'disco'; (None, None) si la clave no esta
+        """
+        if clave in self._memoria:
+            self._memoria.move_to_end(clave)
+            return 'memoria', self._memoria[clave]
+        if self.directorio is not None:
+            try:
+                with open(self._ruta(clave), 'rb') as file:
+                    valor = pickle.load(file)
+            except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+                return None, None
+            os.utime(self._ruta(clave)) # la fecha de modificacion marca el ultimo uso para el LRU de disco
+            self._guardar_en_memoria(clave, valor)
+            return 'disco', valor
+        return None, None
+
+    def guardar(self, clave, valor):
+        self._guardar_en_memoria(clave, valor)
+        if self.directorio is not None:
+            temporal = self._ruta(clave) + '.tmp'
+            with open(temporal, 'wb') as file:
+                pickle.dump(valor, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, self._ruta(clave))
+            self._podar_disco()
+
+    def _guardar_en_memoria(self, clave, valor):
+        self._memoria[clave] = valor
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_entradas:
+            self._memoria.popitem(last=False)
+
+    def _podar_disco(self):
+        archivos = [entrada for entrada in os.scandir(self.directorio) if entrada.name.endswith('.pkl')]
+        if len(archivos) <= self.max_entradas_disco:
+            return
+        archivos.sort(key=lambda entrada: entrada.stat().st_mtime)
+        for entrada in archivos[:len(archivos) - self.max_entradas_disco]:
+            os.remove(entrada.path)
+
+    def limpiar(self):
+        self._memoria.clear()
+        if self.directorio is not None:
+            for entrada in os.scandir(self.directorio):
+                if entrada.name.endswith('.pkl'):
+                    os.remove(entrada.path)
+
+
+#======================Pipeline declarativo con memoizacion==========================================================
+
+class Pipeline:
+    """
+    Grafo de etapas (nodos) cuyos resultados se memorizan por el contenido de sus entradas
+
+    La clave de un nodo es el hash de su funcion y de las huellas de sus dependencias, por lo que al cambiar
+    una entrada solo se recalculan los nodos que dependen de ella. La huella del resultado de un nodo es su
+    clave, salvo en los nodos declarados con huella_contenido=True: ahi es el hash del resultado, de modo que
+    si el nodo se recalcula pero da lo mismo (por ejemplo la proyeccion de la canasta a 'contenido_neto'
+    cuando solo cambio 'cantidad_semanal') los nodos siguientes no se recalculan
+
+    Ejemplo:
+        p = Pipeline()
+        p.entrada('tiendas', tiendas)
+        p.nodo('agrupados', utils.agrupar_productos_por_categoria, 'tiendas')
+        p.calcular('agrupados')
+
+    Nota: los resultados en cache se comparten entre llamadas, por lo que las funciones de los nodos no
+    deben modificar sus argumentos (ver _convertir_usd_a_cup)
+    """
+
+    def __init__(self, cache=None):
+        """
+        Args:
+            cache (CacheLRU): cache de resultados (por defecto una CacheLRU en memoria de 128 entradas)
+        """
+        self.cache = cache if cache is not None else CacheLRU()
+        self.entradas = {} # {nombre: (valor, huella)}
+        self.nodos = {} # {nombre: (funcion, dependencias, huella_contenido, version)}
+        self.ultimos_calculados = []
+        self.estadisticas = {'calculados': 0, 'memoria': 0, 'disco': 0}
+
+    def entrada(self, nombre, valor, huella=None):
+        """
+        Define o reemplaza una entrada del grafo
+
+        Args:
+            nombre (str)
+            valor: dato de entrada
+            huella (str): huella conocida del valor (por ejemplo cache_fuentes.hash_archivo de su archivo);
+                por defecto se calcula con huella_contenido
+        """
+        if nombre in self.nodos:
+            raise ValueError(f"'{nombre}' ya es un nodo del pipeline")
+        self.entradas[nombre] = (valor, huella if huella is not None else huella_contenido(valor))
+
+    def nodo(self, nombre, funcion, *dependencias, huella_contenido=False, version=None):
+        """
+        Agrega un nodo: su resultado es funcion(*[valor de cada dependencia])
+
+        Args:
+            nombre (str)
+            funcion (callable)
+            dependencias (str): nombres de entradas o de otros nodos, en el orden de los argumentos
+            huella_contenido (bool): usar el hash del resultado como huella (para nodos con resultados pequeños)
+            version (str): sal explicita de la clave del nodo. Cambiarla invalida sus resultados en cache (por
+                ejemplo si cambia un dato externo que la huella del codigo no ve)
+        """
+        if nombre in self.entradas or nombre in self.nodos:
+            raise ValueError(f"'{nombre}' ya existe en el pipeline")
+        for dependencia in dependencias:
+            if dependencia not in self.entradas and dependencia not in self.nodos:
+                raise KeyError(f"'{nombre}' depende de '{dependencia}', que no esta definido")
+        self.nodos[nombre] = (funcion, dependencias, huella_contenido, version)
+
+    def calcular(self, *nombres):
+        """
+        Calcula los nodos pedidos (y los que necesitan) usando la cache
+
+        Returns:
+            valor del nodo, o una tupla de valores si se piden varios
+        """
+        self.ultimos_calculados = []
+        resueltos = {}
+        valores = [self._resolver(nombre, resueltos)[0] for nombre in nombres]
+        return valores[0] if len(valores) == 1 else tuple(valores)
+
+    def _resolver(self, nombre, resueltos):
+        # Devuelve (valor, huella) del nodo o de la entrada, una sola vez por llamada a calcular
+        if nombre in self.entradas:
+            return self.entradas[nombre]
+        if nombre in resueltos:
+            return resueltos[nombre]
+
+        funcion, dependencias, por_contenido, version = self.nodos[nombre]
+        argumentos = [self._resolver(dependencia, resueltos) for dependencia in dependencias]
+        sha = hashlib.sha256(f"{nombre}|{version!r}|{_huella_funcion(funcion)}".encode('utf-8'))
+        for _, huella in argumentos:
+            sha.update(huella.encode('utf-8'))
+        clave = sha.hexdigest()
+
+        origen, guardado = self.cache.obtener(clave)
+        if origen is None:
+            valor = funcion(*[valor for valor, _ in argumentos])
+            huella = huella_contenido(valor) if por_contenido else clave
+            self.cache.guardar(clave, (valor, huella))
+            self.ultimos_calculados.append(nombre)
+            self.estadisticas['calculados'] += 1
+        else:
+            valor, huella = guardado
+            self.estadisticas[origen] += 1
+
+        resueltos[nombre] = (valor, huella)
+        return resueltos[nombre]
+
+
+#======================Cadena del notebook==========================================================
+
+def proyectar_canasta(canasta, clave):
+    """Canasta reducida a una sola key por categoria (por ejemplo 'contenido_neto' o 'cantidad_semanal')"""
+    return {categoria: {clave: definicion[clave]} for categoria, definicion in canasta.items()}
+
+
+def contenidos_canasta(canasta):
+    return proyectar_canasta(canasta, 'contenido_neto')
+
+
+def cantidades_canasta(canasta):
+    return proyectar_canasta(canasta, 'cantidad_semanal')
+
+
+def _convertir_usd_a_cup(catalogo, tasa_usd_cup):
+    # utils.convertir_usd_a_cup modifica el catalogo recibido: se trabaja sobre una copia para no alterar la entrada
+    return utils.convertir_usd_a_cup(copy.deepcopy(catalogo), tasa_usd_cup)
+
+
+def pipeline_canasta(canasta, tiendas, tienda_online, tasa_usd_cup, cache=None):
+    """
+    Pipeline con la cadena del notebook para las tiendas (MIPYMES) y la tienda online:
+
+        tiendas       -> agrupar_productos_por_categoria -> estandarizar -> mediana -> costo ('costo_tiendas')
+        tienda_online -> convertir_usd_a_cup(tasa)        -> estandarizar -> mediana -> costo ('costo_online')
+
+    La estandarizacion depende solo de 'contenido_neto' y los costos solo de 'cantidad_semanal', por lo que
+    al cambiar la tasa se recalcula solo la rama online y al cambiar una 'cantidad_semanal' solo los costos.
+    Para actualizar un dato se vuelve a llamar a entrada() con el mismo nombre ('canasta', 'tiendas',
+    'tienda_online' o 'tasa_usd_cup') y luego a calcular()
+
+    Returns:
+        Pipeline
+    """
+    p = Pipeline(cache)
+    p.entrada('canasta', canasta)
+    p.entrada('tiendas', tiendas)
+    p.entrada('tienda_online', tienda_online)
+    p.entrada('tasa_usd_cup', tasa_usd_cup)
+
+    p.nodo('contenidos', contenidos_canasta, 'canasta', huella_contenido=True)
+    p.nodo('cantidades', cantidades_canasta, 'canasta', huella_contenido=True)
+
+    p.nodo('agrupados_tiendas', utils.agrupar_productos_por_categoria, 'tiendas')
+    p.nodo('estandarizados_tiendas', utils.estandarizar_precios_unidad_modal, 'agrupados_tiendas', 'contenidos')
+    p.nodo('medianas_tiendas', utils.calcular_precio_mediano_por_categoria, 'estandarizados_tiendas')
+    p.nodo('costos_categoria_tiendas', utils.calcular_costos_totales_por_categoria_canasta, 'cantidades',
+           'medianas_tiendas')
+    p.nodo('costo_tiendas', utils.costo_total_canasta, 'cantidades', 'medianas_tiendas')
+
+    p.nodo('tienda_online_cup', _convertir_usd_a_cup, 'tienda_online', 'tasa_usd_cup')
+    p.nodo('estandarizados_online', utils.estandarizar_precios_unidad_modal, 'tienda_online_cup', 'contenidos')
+    p.nodo('medianas_online', utils.calcular_precio_mediano_por_categoria, 'estandarizados_online')
+    p.nodo('costos_categoria_online', utils.calcular_costos_totales_por_categoria_canasta, 'cantidades',
+           'medianas_online')
+    p.nodo('costo_online', utils.costo_total_canasta, 'cantidades', 'medianas_online')
+    return p
@@ -0,0 +1,181 @@
+import sys
+from types import MappingProxyType
+
+
+#======================Registro compacto de producto==========================================================
+
+class Producto:
+    """
+    Registro de un producto con __slots__ en lugar de un diccionario por producto
+
+    Se usa igual que el diccionario de 'tiendas_privadas.json' o del catalogo online (producto['price_cup'],
+    'price_usd' in producto, producto.get('brand', '')), por lo que todas las funciones de utils.py lo aceptan.
+    Los textos repetidos (categoria, marca, unidad, origen) se internan, de modo que todos los productos
+    comparten la misma cadena. Un Producto ocupa varias veces menos memoria que el diccionario equivalente
+
+    Las claves que no son del esquema conocido se guardan aparte y se conservan al convertir a diccionario
+    """
+
+    # Orden en que aparecen las claves en las dos fuentes (tiendas y catalogo online)
+    CLAVES = ('name', 'category', 'brand', 'price_usd', 'unit', 'origin', 'price_cup', 'net_weight')
+    _INTERNADAS = ('category', 'brand', 'unit', 'origin')
+
+    __slots__ = CLAVES + ('_extra',)
+
+    def __init__(self, **valores):
+        self._extra = None
+        for clave, valor in valores.items():
+            self[clave] = valor
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(**datos)
+
+    def a_dict(self):
+        """
+        Returns:
+            dict: el producto con el esquema original, con las claves en el orden de 'CLAVES'
+        """
+        return dict(self.items())
+
+    def __getitem__(self, clave):
+        if clave in Producto.CLAVES:
+            try:
+                return getattr(self, clave)
+            except AttributeError:
+                raise KeyError(clave) from None
+        if self._extra is not None and clave in self._extra:
+            return self._extra[clave]
+        raise KeyError(clave)
+
+    def __setitem__(self, clave, valor):
+        if clave in Producto.CLAVES:
+            if clave in Producto._INTERNADAS and isinstance(valor, str):
+                valor = sys.intern(valor)
+            setattr(self, clave, valor)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[clave] = valor
+
+    def __contains__(self, clave):
+        if clave in Producto.CLAVES:
+            return hasattr(self, clave)
+        return self._extra is not None and clave in self._extra
+
+    def get(self, clave, defecto=None):
+        try:
+            return self[clave]
+        except KeyError:
+            return defecto
+
+    def keys(self):
+        claves = [clave for clave in Producto.CLAVES if hasattr(self, clave)]
+        if self._extra is not None:
+            claves.extend(self._extra)
+        return claves
+
+    def items(self):
+        return [(clave, self[clave]) for clave in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, otro):
+        if isinstance(otro, (Producto, dict)):
+            return dict(self.items()) == dict(otro.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Producto({', '.join(f'{clave}={valor!r}' for clave, valor in self.items())})"
+
+    def __getstate__(self):
+        return self.a_dict()
+
+    def __setstate__(self, estado):
+        self._extra = None
+        for clave, valor in estado.items():
+            self[clave] = valor
+
+
+class ProductoCongelado(Producto):
+    """
+    Producto de solo lectura (ver congelar_producto). Ocupa lo mismo que un Producto; copy.deepcopy devuelve
+    un Producto modificable
+    """
+
+    __slots__ = ()
+
+    def __setitem__(self, clave, valor):
+        raise TypeError(f"El producto es de solo lectura (no se puede asignar '{clave}')")
+
+    def __setattr__(self, nombre, valor):
+        raise TypeError(f"El producto es de solo lectura (no se puede asignar '{nombre}')")
+
+    def __delattr__(self, nombre):
+        raise TypeError(f"El producto es de solo lectura (no se puede borrar '{nombre}')")
+
+    def __reduce__(self):
+        return congelar_producto, (self.a_dict(),)
+
+    def __deepcopy__(self, memo):
+        return Producto(**self.a_dict())
+
+
+def congelar_producto(producto):
+    """
+    Returns:
+        ProductoCongelado: copia de solo lectura de un Producto o del diccionario de un producto
+    """
+    congelado = Producto(**(producto.a_dict() if isinstance(producto, Producto) else producto))
+    if congelado._extra is not None:
+        congelado._extra = MappingProxyType(congelado._extra)
+    congelado.__class__ = ProductoCongelado
+    return congelado
+
+
+def _es_producto(datos):
+    # Los productos son los unicos objetos de las fuentes con 'net_weight' (las tiendas tienen 'products')
+    return 'net_weight' in datos and 'products' not in datos
+
+
+def objeto_compacto(datos):
+    """object_hook para json.load que crea un Producto por cada producto en lugar de un diccionario"""
+    if _es_producto(datos):
+        return Producto(**datos)
+    return datos
+
+
+def compactar(datos):
+    """
+    Reemplaza los diccionarios de productos por Producto
+
+    Args:
+        datos (list | dict): lista de tiendas (con 'products') o catalogo {categoria: [productos]}
+
+    Returns:
+        list | dict: la misma estructura con los productos compactos (la entrada no se modifica)
+    """
+    if isinstance(datos, dict):
+        return {categoria: [_compacto(producto) for producto in productos] for categoria, productos in datos.items()}
+    return [dict(tienda, products=[_compacto(producto) for producto in tienda['products']]) for tienda in datos]
+
+
+def _compacto(producto):
+    return producto if isinstance(producto, Producto) else Producto(**producto)
+
+
+def a_dicts(datos):
+    """
+    Inversa de compactar: devuelve la estructura con los productos como diccionarios (por ejemplo para json.dump)
+    """
+    if isinstance(datos, dict):
+        return {categoria: [_como_dict(producto) for producto in productos] for categoria, productos in datos.items()}
+    return [dict(tienda, products=[_como_dict(producto) for producto in tienda['products']]) for tienda in datos]
+
+
+def _como_dict(producto):
+    return producto.a_dict() if isinstance(producto, Producto) else dict(producto)
@@ -0,0 +1,280 @@
+import json
+import math
+import zlib
+
+import numpy as np
+
+
+#======================Sketch de cuantiles KLL (memoria acotada, combinable)==========================================================
+
+K_POR_DEFECTO = 200
+_C = 2 / 3 # razon de capacidad entre niveles consecutivos del sketch
+
+
+def k_para_error(error):
+    """
+    Parametro k aproximado para que el error de rango normalizado sea a lo sumo 'error'
+    (por ejemplo error=0.01 -> el cuantil devuelto esta entre los cuantiles q-0.01 y q+0.01 con alta probabilidad)
+    """
+    return max(8, math.ceil(2 / error))
+
+
+class SketchKLL:
+    """
+    Sketch de cuantiles KLL (Karnin, Lang y Liberty) para un flujo de precios
+
+    Guarda una jerarquia de 'compactadores': el nivel h contiene valores que representan 2**h valores
+    originales cada uno. Cuando un nivel se llena se ordena y se sube al nivel siguiente la mitad de sus
+    valores (los de posicion par o impar, al azar). La memoria es O(k log(n/k)) y el error de rango es
+    aproximadamente 2/k, independiente de n. Dos sketches se combinan uniendo sus niveles, por lo que se
+    pueden calcular por separado (por archivo, por ventana de tiempo) y juntar despues
+
+    Atributos:
+        k (int): parametro de precision
+        n (int): cantidad de valores agregados
+        niveles (list): un np.ndarray[float64] por nivel
+    """
+
+    def __init__(self, k=K_POR_DEFECTO, semilla=None):
+        self.k = k
+        self.n = 0
+        self.niveles = [np.zeros(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(semilla)
+
+    def __len__(self):
+        return self.n
+
+    def _capacidad(self, nivel):
+        altura = len(self.niveles) - nivel - 1
+        return int(math.ceil(_C ** altura * self.k)) + 1
+
+    def _capacidad_total(self):
+        return sum(self._capacidad(nivel) for nivel in range(len(self.niveles)))
+
+    def _tamano(self):
+        return sum(len(valores) for valores in self.niveles)
+
+    def _compactar(self):
+        # Compacta niveles llenos de abajo hacia arriba hasta que el sketch vuelva a caber
+        while self._tamano() >= self._capacidad_total():
+            for nivel in range(len(self.niveles)):
+                if len(self.niveles[nivel]) >= self._capacidad(nivel):
+                    if nivel + 1 == len(self.niveles):
+                        self.niveles.append(np.zeros(0, dtype=np.float64))
+                    valores = np.sort(self.niveles[nivel])
+                    # Si la cantidad es impar, el ultimo valor se queda en este nivel
+                    par = len(valores) - len(valores) % 2
+                    desplazamiento = int(self._rng.integers(0, 2))
+                    self.niveles[nivel + 1] = np.concatenate((self.niveles[nivel + 1], valores[desplazamiento:par:2]))
+                    self.niveles[nivel] = valores[par:]
+                    break
+
+    def agregar(self, valor):
+        self.agregar_arreglo([valor])
+
+    def agregar_arreglo(self, valores):
+        """Agrega muchos valores de una vez"""
+        valores = np.asarray(valores, dtype=np.float64).ravel()
+        if len(valores) == 0:
+            return
+        self.niveles[0] = np.concatenate((self.niveles[0], valores))
+        self.n += len(valores)
+        self._compactar()
+
+    def combinar(self, otro, semilla=None):
+        """
+        Args:
+            otro (SketchKLL): sketch a combinar con este
+            semilla: semilla del generador propio del resultado (no se consume el de ninguno de los dos)
+
+        Returns:
+            SketchKLL: sketch nuevo con los valores de ambos (ninguno de los dos se modifica)
+        """
+        resultado = SketchKLL(max(self.k, otro.k), semilla=semilla)
+        altura = max(len(self.niveles), len(otro.niveles))
+        resultado.niveles = [
+            np.concatenate((self.niveles[h] if h < len(self.niveles) else np.zeros(0),
+                            otro.niveles[h] if h < len(otro.niveles) else np.zeros(0)))
+            for h in range(altura)
+        ]
+        resultado.n = self.n + otro.n
+        resultado._compactar()
+        return resultado
+
+    def _valores_y_pesos(self):
+        valores = np.concatenate(self.niveles)
+        pesos = np.concatenate([np.full(len(nivel), 2 ** h, dtype=np.int64) for h, nivel in enumerate(self.niveles)])
+        orden = np.argsort(valores, kind='stable')
+        return valores[orden], np.cumsum(pesos[orden])
+
+    def cuantiles(self, qs):
+        """
+        Cuantiles aproximados
+
+        Args:
+            qs (list): probabilidades entre 0 y 1 (por ejemplo [0.1, 0.5, 0.9])
+
+        Returns:
+            np.ndarray[float64]: para cada q, el menor valor cuyo rango acumulado alcanza q (NaN si el sketch esta vacio)
+        """
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        valores, acumulados = self._valores_y_pesos()
+        total = acumulados[-1]
+        posiciones = np.searchsorted(acumulados, np.maximum(np.ceil(qs * total), 1), side='left')
+        return valores[np.minimum(posiciones, len(valores) - 1)]
+
+    def cuantil(self, q):
+        return self.cuantiles([q])[0].item()
+
+    def mediana(self):
+        """
+        Mediana aproximada. Mientras el sketch no compacto nada (todos los valores estan en el nivel 0)
+        es exacta y coincide con utils.calcular_precio_mediano_por_categoria
+        """
+        if len(self.niveles) == 1 and self.n > 0:
+            valores = np.sort(self.niveles[0])
+            mitad = len(valores) // 2
+            if len(valores) % 2 == 1:
+                return valores[mitad].item()
+            return ((valores[mitad] + valores[mitad - 1]) / 2).item()
+        return self.cuantil(0.5)
+
+    def a_dict(self):
+        """Representacion serializable en JSON"""
+        return {'k': self.k, 'n': self.n, 'niveles': [nivel.tolist() for nivel in self.niveles]}
+
+    @classmethod
+    def desde_dict(cls, datos, semilla=None):
+        sketch = cls(datos['k'], semilla)
+        sketch.n = datos['n']
+        sketch.niveles = [np.asarray(nivel, dtype=np.float64) for nivel in datos['niveles']]
+        return sketch
+
+
+#======================Sketches por categoria==========================================================
+
+def sketches_por_categoria(precios_estandarizados, k=K_POR_DEFECTO, semilla=0):
+    """
+    Construye un sketch por categoria a partir de precios estandarizados
+
+    Args:
+        precios_estandarizados (dict): {categoria: lista o arreglo de precios} (por ejemplo la salida de
+            utils.estandarizar_precios_unidad_modal)
+        k (int): precision del sketch (ver k_para_error)
+        semilla (int | tuple): cada categoria recibe un generador independiente derivado de esta semilla.
+            Los sketches de distintos shards que luego se combinan deben usar semillas distintas, por ejemplo
+            (semilla, numero de shard)
+
+    Returns:
+        dict: {categoria: SketchKLL}
+    """
+    semillas = np.random.SeedSequence(semilla).spawn(len(precios_estandarizados))
+    sketches = {}
+    for semilla_categoria, (categoria, precios) in zip(semillas, precios_estandarizados.items()):
+        sketches[categoria] = SketchKLL(k, semilla=semilla_categoria)
+        sketches[categoria].agregar_arreglo(precios)
+    return sketches
+
+
+def _semilla_categoria(semilla, categoria):
+    # Semilla derivada de 'semilla' y del nombre de la categoria (crc32, estable entre procesos a diferencia de hash)
+    return np.random.SeedSequence((*np.atleast_1d(semilla).tolist(), zlib.crc32(str(categoria).encode('utf-8'))))
+
+
+def actualizar_sketches(sketches, precios_estandarizados, k=K_POR_DEFECTO, semilla=0):
+    """
+    Agrega nuevos precios estandarizados a los sketches (crea los de las categorias nuevas)
+
+    Args:
+        sketches (dict): {categoria: SketchKLL} (se modifica)
+        precios_estandarizados (dict): {categoria: lista o arreglo de precios}
+        k (int): precision de los sketches nuevos
+        semilla (int | tuple): el generador de cada sketch nuevo se deriva de esta semilla y del nombre de la
+            categoria, por lo que el resultado no depende del orden en que aparecen las categorias
+
+    Returns:
+        dict: el mismo diccionario 'sketches'
+    """
+    for categoria, precios in precios_estandarizados.items():
+        if categoria not in sketches:
+            sketches[categoria] = SketchKLL(k, semilla=_semilla_categoria(semilla, categoria))
+        sketches[categoria].agregar_arreglo(precios)
+    return sketches
+
+
+def combinar_sketches(a, b, semilla=None):
+    """
+    Combina dos diccionarios de sketches por categoria (por ejemplo de dos ventanas de tiempo)
+
+    Args:
+        a, b (dict): {categoria: SketchKLL} (no se modifican)
+        semilla (int | tuple): semilla de la que se derivan los generadores de los sketches combinados
+
+    Returns:
+        dict: {categoria: SketchKLL}, con las categorias de 'a' primero y luego las nuevas de 'b'
+    """
+    semillas = np.random.SeedSequence(semilla)
+    resultado = dict(a)
+    for categoria, sketch in b.items():
+        if categoria in resultado:
+            resultado[categoria] = resultado[categoria].combinar(sketch, semilla=semillas.spawn(1)[0])
+        else:
+            resultado[categoria] = sketch
+    return resultado
+
+
+def combinar_varios(sketches, k=None, semilla=None):
+    """
+    Combina muchos sketches en uno solo uniendo sus niveles y compactando una vez al final (mas barato que
+    encadenar SketchKLL.combinar, que compacta en cada paso)
+
+    Args:
+        sketches (iterable): SketchKLL a combinar (no se modifican)
+        k (int): parametro del resultado (por defecto el mayor de los recibidos)
+
+    Returns:
+        SketchKLL
+    """
+    sketches = list(sketches)
+    resultado = SketchKLL(k or max([sketch.k for sketch in sketches], default=K_POR_DEFECTO), semilla=semilla)
+    altura = max([len(sketch.niveles) for sketch in sketches], default=1)
+    resultado.niveles = [
+        np.concatenate([sketch.niveles[h] for sketch in sketches if h < len(sketch.niveles)] + [np.zeros(0)])
+        for h in range(altura)
+    ]
+    resultado.n = sum(sketch.n for sketch in sketches)
+    resultado._compactar()
+    return resultado
+
+
+def medianas_aproximadas(sketches):
+    """
+    Returns:
+        dict: {categoria: mediana aproximada}, analogo a utils.calcular_precio_mediano_por_categoria
+    """
+    return {categoria: sketch.mediana() for categoria, sketch in sketches.items() if len(sketch)}
+
+
+def cuantiles_por_categoria(sketches, qs=(0.1, 0.5, 0.9)):
+    """
+    Cuantiles de dispersion de precios por categoria (p10, mediana, p90 por defecto) desde los mismos sketches
+
+    Returns:
+        dict: {categoria: {q: valor}}
+    """
+    return {categoria: dict(zip(qs, sketch.cuantiles(list(qs)).tolist()))
+            for categoria, sketch in sketches.items() if len(sketch)}
+
+
+def guardar_sketches(sketches, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({categoria: sketch.a_dict() for categoria, sketch in sketches.items()}, file, ensure_ascii=False)
+
+
+def cargar_sketches(path, semilla=0):
+    """Carga sketches guardados con guardar_sketches; sus generadores se derivan como en actualizar_sketches"""
+    with open(path, 'r', encoding='utf-8') as file:
+        return {categoria: SketchKLL.desde_dict(datos, semilla=_semilla_categoria(semilla, categoria))
+                for categoria, datos in json.load(file).items()}
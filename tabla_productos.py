@@ -0,0 +1,535 @@
+import numpy as np
+
+
+#======================Tabla columnar de productos==========================================================
+
+class TablaProductos:
+    """
+    Representacion columnar (una columna por campo) de los productos de la muestra de tiendas (MIPYMES)
+
+    Se construye una sola vez a partir de la lista de tiendas de 'tiendas_privadas.json' y permite que
+    todas las agregaciones se hagan como operaciones vectorizadas de NumPy en lugar de recorrer
+    tienda['products'] en cada funcion.
+
+    Columnas numericas (una posicion por producto):
+        precio_cup (np.ndarray[float64]): precio del producto en CUP
+        precio_usd (np.ndarray[float64]): precio en USD (solo en el catalogo de la tienda online, NaN si no existe)
+        peso_neto (np.ndarray[float64]): peso (volumen) neto del envase
+        distancia (np.ndarray[float64]): distancia al hospital de la tienda donde se encontro el producto
+
+    Columnas codificadas por diccionario (una posicion por producto, enteros int32):
+        categoria, origen, marca, unidad, nombre : indice del valor dentro de la lista correspondiente
+        (categorias, origenes, marcas, unidades, nombres)
+        tienda : indice de la tienda dentro de las columnas de tiendas
+
+    Columnas de tiendas (una posicion por tienda, incluidas las tiendas sin productos):
+        tienda_ids, tienda_nombres, tienda_fechas, tienda_evidencias (list)
+        tienda_distancias, tienda_lat, tienda_lon (np.ndarray[float64])
+
+    Nota:
+        Los diccionarios se llenan en orden de primera aparicion, por lo que el codigo 0 de categoria
+        es la primera categoria encontrada al recorrer las tiendas. Esto permite devolver diccionarios
+        con las keys en el mismo orden que las funciones originales de utils.py
+    """
+
+    # nombres de las claves que reciben los constructores (se usan tambien para guardar la tabla en disco)
+    COLUMNAS = ('precio_cup', 'precio_usd', 'peso_neto', 'distancia',
+                'categoria', 'origen', 'marca', 'unidad', 'nombre', 'tienda')
+    DICCIONARIOS = ('categorias', 'origenes', 'marcas', 'unidades', 'nombres')
+    COLUMNAS_TIENDAS = ('ids', 'nombres', 'fechas', 'evidencias', 'distancias', 'lat', 'lon')
+
+    def __init__(self, columnas, diccionarios, tiendas):
+        self.precio_cup = columnas['precio_cup']
+        self.precio_usd = columnas['precio_usd']
+        self.peso_neto = columnas['peso_neto']
+        self.distancia = columnas['distancia']
+        self.categoria = columnas['categoria']
+        self.origen = columnas['origen']
+        self.marca = columnas['marca']
+        self.unidad = columnas['unidad']
+        self.nombre = columnas['nombre']
+        self.tienda = columnas['tienda']
+
+        self.categorias = diccionarios['categorias']
+        self.origenes = diccionarios['origenes']
+        self.marcas = diccionarios['marcas']
+        self.unidades = diccionarios['unidades']
+        self.nombres = diccionarios['nombres']
+
+        self.tienda_ids = tiendas['ids']
+        self.tienda_nombres = tiendas['nombres']
+        self.tienda_fechas = tiendas['fechas']
+        self.tienda_evidencias = tiendas['evidencias']
+        self.tienda_distancias = tiendas['distancias']
+        self.tienda_lat = tiendas['lat']
+        self.tienda_lon = tiendas['lon']
+
+    def __len__(self):
+        return len(self.precio_cup)
+
+    @property
+    def n_tiendas(self):
+        return len(self.tienda_ids)
+
+    def codigo_categoria(self, categoria):
+        """Devuelve el codigo entero de una categoria o -1 si no aparece en la tabla"""
+        try:
+            return self.categorias.index(categoria)
+        except ValueError:
+            return -1
+
+    def columnas(self):
+        """Devuelve las columnas por producto en un diccionario con las claves de TablaProductos.COLUMNAS"""
+        return {clave: getattr(self, clave) for clave in self.COLUMNAS}
+
+    def diccionarios(self):
+        """Devuelve las listas de valores de las columnas codificadas, con las claves de TablaProductos.DICCIONARIOS"""
+        return {clave: getattr(self, clave) for clave in self.DICCIONARIOS}
+
+    def columnas_tiendas(self):
+        """Devuelve las columnas por tienda, con las claves de TablaProductos.COLUMNAS_TIENDAS"""
+        return {clave: getattr(self, 'tienda_' + clave) for clave in self.COLUMNAS_TIENDAS}
+
+    def con_columnas(self, **columnas):
+        """
+        Crea una tabla nueva que comparte todas las columnas con esta, salvo las que se pasan como argumento.
+        No modifica la tabla original (las columnas pueden ser de solo lectura si vienen de la cache en disco)
+
+        Ejemplo:
+            tabla_cup = tabla.con_columnas(precio_cup=tabla.precio_usd * 460)
+        """
+        nuevas = self.columnas()
+        nuevas.update(columnas)
+        return TablaProductos(nuevas, self.diccionarios(), self.columnas_tiendas())
+
+    def seleccionar_filas(self, filas):
+        """
+        Crea una tabla con solo algunos productos (por ejemplo los de las tiendas cercanas a un punto).
+        Las columnas de tiendas y los diccionarios se comparten con la tabla original
+
+        Args:
+            filas (np.ndarray): posiciones de los productos a conservar o mascara booleana
+
+        Returns:
+            TablaProductos
+        """
+        return self.con_columnas(**{clave: columna[filas] for clave, columna in self.columnas().items()})
+
+    def producto(self, i):
+        """
+        Reconstruye el diccionario del producto i con el mismo esquema de 'tiendas_privadas.json'
+
+        Args:
+            i (int): posicion del producto en la tabla
+
+        Returns:
+            dict
+        """
+        return self.productos([i])[0]
+
+    def productos(self, filas=None):
+        """
+        Reconstruye los diccionarios de muchos productos a la vez. Cada columna se decodifica y se pasa a una
+        lista de Python una sola vez (tolist), en lugar de indexar escalares de NumPy producto por producto
+
+        Args:
+            filas (np.ndarray | list): posiciones de los productos (por defecto todos, en orden)
+
+        Returns:
+            list: un dict por fila, con el esquema de producto()
+        """
+        filas = np.arange(len(self)) if filas is None else np.asarray(filas, dtype=np.intp)
+        columnas = zip(
+            np.asarray(self.nombres, dtype=object)[self.nombre[filas]].tolist(),
+            np.asarray(self.categorias, dtype=object)[self.categoria[filas]].tolist(),
+            np.asarray(self.marcas, dtype=object)[self.marca[filas]].tolist(),
+            np.asarray(self.unidades, dtype=object)[self.unidad[filas]].tolist(),
+            np.asarray(self.origenes, dtype=object)[self.origen[filas]].tolist(),
+            self.precio_cup[filas].tolist(),
+            self.peso_neto[filas].tolist(),
+        )
+        return [
+            {'name': nombre, 'category': categoria, 'brand': marca, 'unit': unidad, 'origin': origen,
+             'price_cup': precio, 'net_weight': peso}
+            for nombre, categoria, marca, unidad, origen, precio, peso in columnas
+        ]
+
+
+class _Codificador:
+    """Asigna codigos enteros consecutivos a valores en orden de primera aparicion"""
+
+    def __init__(self):
+        self.codigos = {}
+        self.valores = []
+
+    def codificar(self, valor):
+        codigo = self.codigos.get(valor)
+        if codigo is None:
+            codigo = len(self.valores)
+            self.codigos[valor] = codigo
+            self.valores.append(valor)
+        return codigo
+
+
+class _ConstructorTabla:
+    """
+    Acumula tiendas y productos en listas por columna y al final los convierte en una TablaProductos.
+    Permite construir la tabla a partir de la lista de tiendas o del catalogo de la tienda online
+    """
+
+    def __init__(self):
+        self.categorias = _Codificador()
+        self.origenes = _Codificador()
+        self.marcas = _Codificador()
+        self.unidades = _Codificador()
+        self.nombres = _Codificador()
+
+        self.columnas = {'precio_cup': [], 'precio_usd': [], 'peso_neto': [], 'categoria': [],
+                         'origen': [], 'marca': [], 'unidad': [], 'nombre': []}
+        self.productos_por_tienda = []
+        self.columnas_tiendas = {'ids': [], 'nombres': [], 'fechas': [], 'evidencias': [],
+                                 'distancias': [], 'lat': [], 'lon': []}
+
+    def agregar_tienda(self, tienda):
+        coordenadas = tienda.get('coordinates', {})
+        self.columnas_tiendas['ids'].append(tienda.get('store_id'))
+        self.columnas_tiendas['nombres'].append(tienda.get('name'))
+        self.columnas_tiendas['fechas'].append(tienda.get('collection_date'))
+        self.columnas_tiendas['evidencias'].append(tienda.get('evidence_path'))
+        self.columnas_tiendas['distancias'].append(tienda.get('distance_to_hospital', np.nan))
+        self.columnas_tiendas['lat'].append(coordenadas.get('lat', np.nan))
+        self.columnas_tiendas['lon'].append(coordenadas.get('lon', np.nan))
+        self.productos_por_tienda.append(0)
+
+    def agregar_producto(self, producto, categoria):
+        # el producto pertenece a la ultima tienda agregada
+        self.productos_por_tienda[-1] += 1
+        self.columnas['precio_cup'].append(producto.get('price_cup', np.nan))
+        self.columnas['precio_usd'].append(producto.get('price_usd', np.nan))
+        # un peso ausente queda como NaN (normalizador.normalizar_precios lo marca como alerta)
+        self.columnas['peso_neto'].append(producto.get('net_weight', np.nan))
+        self.columnas['categoria'].append(self.categorias.codificar(categoria))
+        self.columnas['origen'].append(self.origenes.codificar(producto.get('origin', '')))
+        self.columnas['marca'].append(self.marcas.codificar(producto.get('brand', '')))
+        self.columnas['unidad'].append(self.unidades.codificar(producto.get('unit', '')))
+        self.columnas['nombre'].append(self.nombres.codificar(producto['name']))
+
+    def construir(self):
+        distancias_tiendas = np.asarray(self.columnas_tiendas['distancias'], dtype=np.float64)
+        # El codigo de tienda de cada producto es la posicion de su tienda en la lista
+        codigos_tienda = np.repeat(np.arange(len(self.productos_por_tienda), dtype=np.int32),
+                                   np.asarray(self.productos_por_tienda, dtype=np.int64))
+
+        columnas = {
+            'precio_cup': np.asarray(self.columnas['precio_cup'], dtype=np.float64),
+            'precio_usd': np.asarray(self.columnas['precio_usd'], dtype=np.float64),
+            'peso_neto': np.asarray(self.columnas['peso_neto'], dtype=np.float64),
+            'distancia': distancias_tiendas[codigos_tienda],
+            'tienda': codigos_tienda,
+        }
+        for clave in ('categoria', 'origen', 'marca', 'unidad', 'nombre'):
+            columnas[clave] = np.asarray(self.columnas[clave], dtype=np.int32)
+
+        diccionarios = {
+            'categorias': self.categorias.valores,
+            'origenes': self.origenes.valores,
+            'marcas': self.marcas.valores,
+            'unidades': self.unidades.valores,
+            'nombres': self.nombres.valores,
+        }
+        tiendas = dict(self.columnas_tiendas)
+        tiendas['distancias'] = distancias_tiendas
+        tiendas['lat'] = np.asarray(tiendas['lat'], dtype=np.float64)
+        tiendas['lon'] = np.asarray(tiendas['lon'], dtype=np.float64)
+
+        return TablaProductos(columnas, diccionarios, tiendas)
+
+
+def construir_tabla_productos(tiendas):
+    """
+    Aplana la lista de tiendas (MIPYMES) en una TablaProductos. Es el unico recorrido de
+    tienda['products'] que hace falta; el resto de las agregaciones trabajan sobre las columnas.
+
+    Args:
+        tiendas (list): lista de diccionarios, donde cada diccionario representa una tienda (MIPYME)
+
+    Returns:
+        TablaProductos
+    """
+    constructor = _ConstructorTabla()
+    for tienda in tiendas:
+        constructor.agregar_tienda(tienda)
+        for producto in tienda['products']:
+            constructor.agregar_producto(producto, producto['category'])
+    return constructor.construir()
+
+
+def construir_tabla_catalogo(catalogo, nombre_tienda=None):
+    """
+    Aplana el catalogo de la tienda online ({categoria: [productos]}) en una TablaProductos con una sola tienda
+
+    Los productos del catalogo no tienen 'brand' ni 'origin', por lo que se codifican como ''. Si el catalogo
+    todavia no paso por convertir_usd_a_cup la columna precio_cup queda en NaN y el precio esta en precio_usd
+
+    Args:
+        catalogo (dict): datos de la tienda online (por ejemplo 'tienda_online_supermarket23.json')
+        nombre_tienda (str): nombre con el que se registra la unica tienda de la tabla
+
+    Returns:
+        TablaProductos
+    """
+    constructor = _ConstructorTabla()
+    constructor.agregar_tienda({'name': nombre_tienda})
+    for categoria, productos in catalogo.items():
+        for producto in productos:
+            constructor.agregar_producto(producto, categoria)
+    return constructor.construir()
+
+
+#======================Agrupaciones vectorizadas==========================================================
+
+def indices_por_grupo(codigos):
+    """
+    Ordena las posiciones de la tabla por codigo de grupo (orden estable) y devuelve los limites de cada grupo
+
+    Args:
+        codigos (np.ndarray[int]): codigo de grupo de cada fila
+
+    Returns:
+        tuple: (orden, grupos, inicios) donde orden son las posiciones ordenadas por grupo, grupos los codigos
+        presentes (ascendentes) e inicios la posicion en 'orden' donde empieza cada grupo
+    """
+    # Con pocos grupos los codigos caben en int16 y el ordenamiento estable de NumPy usa radix sort (lineal)
+    if len(codigos) and codigos.max() < np.iinfo(np.int16).max and codigos.min() >= 0:
+        orden = np.argsort(codigos.astype(np.int16), kind='stable')
+    else:
+        orden = np.argsort(codigos, kind='stable')
+    ordenados = codigos[orden]
+    if len(ordenados) == 0:
+        return orden, ordenados, np.zeros(0, dtype=np.intp)
+    cambios = np.flatnonzero(ordenados[1:] != ordenados[:-1]) + 1
+    inicios = np.concatenate(([0], cambios))
+    return orden, ordenados[inicios], inicios
+
+
+def conteo_disponibilidad_categorias(tabla):
+    """
+    Version vectorizada de utils.conteo_disponibilidad_categorias: numero de tiendas donde cada
+    categoria tiene al menos un producto
+
+    Args:
+        tabla (TablaProductos)
+
+    Returns:
+        dict: {categoria: numero de tiendas}
+    """
+    n_categorias = len(tabla.categorias)
+    # Cada par (tienda, categoria) se representa con un solo entero y se eliminan los repetidos
+    pares = tabla.tienda.astype(np.int64) * n_categorias + tabla.categoria
+    categorias_por_tienda = np.unique(pares) % n_categorias if n_categorias else pares
+    conteos = np.bincount(categorias_por_tienda, minlength=n_categorias)
+
+    presentes = np.bincount(tabla.categoria, minlength=n_categorias) > 0
+    return {tabla.categorias[c]: int(conteos[c]) for c in np.flatnonzero(presentes)}
+
+
+def agrupar_productos_por_categoria(tabla):
+    """
+    Version vectorizada de utils.agrupar_productos_por_categoria
+
+    Args:
+        tabla (TablaProductos)
+
+    Returns:
+        dict : diccionario de la forma {...categoria : [{...},...{...}]...}
+    """
+    orden, grupos, inicios = indices_por_grupo(tabla.categoria)
+    finales = np.append(inicios[1:], len(orden))
+    # Todos los diccionarios se arman en una pasada sobre columnas ya convertidas a listas
+    productos = tabla.productos(orden)
+
+    dic_productos_por_categoria = {}
+    for codigo, inicio, final in zip(grupos.tolist(), inicios.tolist(), finales.tolist()):
+        dic_productos_por_categoria[tabla.categorias[codigo]] = productos[inicio:final]
+    return dic_productos_por_categoria
+
+
+def conteo_origen(tabla):
+    """
+    Version vectorizada de utils.conteo_origen
+
+    Args:
+        tabla (TablaProductos)
+
+    Returns:
+        dict: {categoria: {'nacional': X, 'importado': Y}, ...}
+    """
+    n_categorias = len(tabla.categorias)
+    n_origenes = len(tabla.origenes)
+    conteos = np.bincount(tabla.categoria.astype(np.int64) * n_origenes + tabla.origen,
+                          minlength=n_categorias * n_origenes).reshape(n_categorias, n_origenes)
+
+    # Los origenes que no son 'nacional' ni 'importado' (por ejemplo '') no se cuentan
+    columnas = {}
+    for origen in ('nacional', 'importado'):
+        if origen in tabla.origenes:
+            columnas[origen] = conteos[:, tabla.origenes.index(origen)]
+        else:
+            columnas[origen] = np.zeros(n_categorias, dtype=np.int64)
+
+    presentes = conteos.sum(axis=1) > 0
+    return {
+        tabla.categorias[c]: {'nacional': int(columnas['nacional'][c]),
+                              'importado': int(columnas['importado'][c])}
+        for c in np.flatnonzero(presentes)
+    }
+
+
+def peso_minimo_por_categoria(tabla):
+    """
+    Version vectorizada de utils.peso_minimo_por_categoria
+
+    Args:
+        tabla (TablaProductos)
+
+    Returns:
+        dict: {categoria: peso neto minimo}
+    """
+    orden, grupos, inicios = indices_por_grupo(tabla.categoria)
+    if len(orden) == 0:
+        return {}
+    minimos = np.minimum.reduceat(tabla.peso_neto[orden], inicios)
+    return {tabla.categorias[c]: minimo.item() for c, minimo in zip(grupos, minimos)}
+
+
+def estandarizar_jugos_a_200ml(tabla):
+    """
+    Version vectorizada de utils.estandarizar_jugos_a_200ml
+
+    Args:
+        tabla (TablaProductos)
+
+    Returns:
+        list: lista de diccionarios con el mismo formato que utils.estandarizar_jugos_a_200ml
+    """
+    codigo = tabla.codigo_categoria('jugos')
+    filas = np.flatnonzero(tabla.categoria == codigo)
+
+    precios = tabla.precio_cup[filas]
+    pesos = tabla.peso_neto[filas]
+    precios_200ml = (precios / pesos) * 200
+
+    jugos_estandarizados = []
+    for i, precio, peso, precio_200ml in zip(filas, precios.tolist(), pesos.tolist(), precios_200ml.tolist()):
+        jugos_estandarizados.append({
+            'tienda': tabla.tienda_nombres[tabla.tienda[i]],
+            'distancia_km': tabla.distancia[i].item(),
+            'producto': tabla.nombres[tabla.nombre[i]],
+            'marca': tabla.marcas[tabla.marca[i]],
+            'origen': tabla.origenes[tabla.origen[i]],
+            'precio_original': precio,
+            'peso_neto_original': peso,
+            'precio_200ml': round(precio_200ml, 2)
+        })
+    return jugos_estandarizados
+
+
+#======================Estandarizacion de precios y medianas por categoria==========================================================
+
+def contenido_neto_por_categoria(tabla, canasta):
+    """
+    Vector con el 'contenido_neto' de la canasta para cada codigo de categoria de la tabla
+
+    Args:
+        tabla (TablaProductos)
+        canasta (dict): canasta definida para el proyecto
+
+    Returns:
+        np.ndarray[float64]: posicion c = contenido neto de tabla.categorias[c]
+        (genera KeyError si una categoria de la tabla no esta en la canasta, igual que utils.estandarizar_precios_unidad_modal)
+    """
+    return np.asarray([canasta[categoria]['contenido_neto'] for categoria in tabla.categorias], dtype=np.float64)
+
+
+def estandarizar_precios_unidad_modal(tabla, canasta):
+    """
+    Version vectorizada de utils.estandarizar_precios_unidad_modal: estandariza todos los productos de la tabla
+    en una sola operacion de arreglos
+
+    Fórmula matemática:
+    precio_estandarizado = precio_original / (peso_original / contenido_neto[categoria])
+
+    Args:
+        tabla (TablaProductos)
+        canasta (dict): canasta definida para el proyecto
+
+    Returns:
+        np.ndarray[float64]: precio estandarizado de cada producto, alineado con las filas de la tabla
+    """
+    unidades = contenido_neto_por_categoria(tabla, canasta)
+    factor_conversion = tabla.peso_neto / unidades[tabla.categoria]
+    return tabla.precio_cup / factor_conversion
+
+
+def medianas_por_grupo(valores, codigos):
+    """
+    Calcula la mediana de los valores de cada grupo en una sola pasada agrupada
+
+    Los valores se copian ordenados por grupo (no se modifica la entrada) y en cada grupo se usa
+    np.partition (seleccion en tiempo lineal) para ubicar los elementos centrales, sin ordenar el grupo completo
+
+    Args:
+        valores (np.ndarray): valor de cada fila
+        codigos (np.ndarray[int]): codigo de grupo de cada fila
+
+    Returns:
+        tuple: (grupos, medianas) con los codigos presentes (ascendentes) y la mediana de cada uno
+    """
+    orden, grupos, inicios = indices_por_grupo(codigos)
+    finales = np.append(inicios[1:], len(orden))
+    agrupados = np.asarray(valores, dtype=np.float64)[orden]
+
+    medianas = np.empty(len(grupos), dtype=np.float64)
+    for k, (inicio, final) in enumerate(zip(inicios, finales)):
+        segmento = agrupados[inicio:final]
+        mitad = (final - inicio) // 2
+        if (final - inicio) % 2 == 1:
+            segmento.partition(mitad)
+            medianas[k] = segmento[mitad]
+        else:
+            segmento.partition((mitad - 1, mitad))
+            medianas[k] = (segmento[mitad] + segmento[mitad - 1]) / 2
+    return grupos, medianas
+
+
+def calcular_precio_mediano_por_categoria(tabla, precios_estandarizados):
+    """
+    Version vectorizada de utils.calcular_precio_mediano_por_categoria sobre los precios de la tabla
+
+    Args:
+        tabla (TablaProductos)
+        precios_estandarizados (np.ndarray): salida de estandarizar_precios_unidad_modal
+
+    Returns:
+        dict: {categoria: precio mediano}
+    """
+    grupos, medianas = medianas_por_grupo(precios_estandarizados, tabla.categoria)
+    return {tabla.categorias[c]: mediana for c, mediana in zip(grupos.tolist(), medianas.tolist())}
+
+
+def precios_estandarizados_por_categoria(tabla, canasta):
+    """
+    Estandariza todos los precios de la tabla y los separa por categoria con el mismo formato
+    de utils.estandarizar_precios_unidad_modal (los valores son arreglos de NumPy en lugar de listas)
+
+    Args:
+        tabla (TablaProductos)
+        canasta (dict): canasta definida para el proyecto
+
+    Returns:
+        dict: {categoria: np.ndarray de precios estandarizados}
+    """
+    precios = estandarizar_precios_unidad_modal(tabla, canasta)
+    orden, grupos, inicios = indices_por_grupo(tabla.categoria)
+    agrupados = np.split(precios[orden], inicios[1:])
+    return {tabla.categorias[c]: precios_categoria for c, precios_categoria in zip(grupos, agrupados)}
@@ -0,0 +1,132 @@
+import numpy as np
+
+import tabla_productos
+from tabla_productos import TablaProductos
+
+
+#======================Serie de tasas de cambio informales==========================================================
+
+_COLUMNAS_MONEDA = {'usd': 'tasa_usd_cup', 'mlc': 'tasa_mlc_cup'}
+
+
+def a_fecha(fechas):
+    """
+    Convierte fechas en texto ('2025-12-03' o sin ceros '2025-12-3', como en 'collection_date') a np.datetime64[D]
+
+    Args:
+        fechas (str | list | np.ndarray): una fecha o varias
+
+    Returns:
+        np.datetime64 | np.ndarray[datetime64[D]]
+    """
+    if isinstance(fechas, str):
+        anio, mes, dia = fechas.split('-')
+        return np.datetime64(f"{int(anio):04d}-{int(mes):02d}-{int(dia):02d}", 'D')
+    fechas = np.asarray(fechas)
+    if np.issubdtype(fechas.dtype, np.datetime64):
+        return fechas.astype('datetime64[D]')
+    return np.array([a_fecha(str(fecha)) for fecha in fechas], dtype='datetime64[D]')
+
+
+class SerieTasas:
+    """
+    Serie temporal de las tasas de cambio informales (USD->CUP y MLC->CUP) de 'tasa_informal.json'
+    indexada por fecha, para consultar la tasa vigente en muchas fechas a la vez
+
+    Metodos de consulta:
+        'asof': la ultima tasa publicada en o antes de la fecha (NaN si la fecha es anterior a la serie)
+        'interpolar': interpolacion lineal entre las dos publicaciones vecinas (fuera del rango se usa
+                      la tasa del extremo mas cercano)
+    """
+
+    def __init__(self, tasa_informal):
+        """
+        Args:
+            tasa_informal (list): lista de registros {'fecha', 'tasa_usd_cup', 'tasa_mlc_cup'}
+        """
+        fechas = a_fecha([registro['fecha'] for registro in tasa_informal])
+        orden = np.argsort(fechas, kind='stable')
+        self.fechas = fechas[orden]
+        self.tasas = {
+            moneda: np.asarray([registro.get(columna, np.nan) for registro in tasa_informal], dtype=np.float64)[orden]
+            for moneda, columna in _COLUMNAS_MONEDA.items()
+        }
+
+    def __len__(self):
+        return len(self.fechas)
+
+    def tasa(self, fechas, moneda='usd', metodo='asof'):
+        """
+        Tasa de cambio a CUP en cada una de las fechas pedidas
+
+        Args:
+            fechas (str | list | np.ndarray): fechas de consulta
+            moneda (str): 'usd' o 'mlc'
+            metodo (str): 'asof' o 'interpolar'
+
+        Returns:
+            float | np.ndarray[float64]: una tasa por fecha
+        """
+        escalar = isinstance(fechas, str)
+        consulta = np.atleast_1d(a_fecha(fechas))
+        tasas = self.tasas[moneda]
+
+        if metodo == 'asof':
+            posiciones = np.searchsorted(self.fechas, consulta, side='right') - 1
+            resultado = np.where(posiciones >= 0, tasas[np.maximum(posiciones, 0)], np.nan)
+        elif metodo == 'interpolar':
+            dias = self.fechas.astype(np.int64)
+            resultado = np.interp(consulta.astype(np.int64), dias, tasas)
+        else:
+            raise ValueError(f"Metodo de consulta desconocido: {metodo}")
+
+        return resultado[0].item() if escalar else resultado
+
+    def convertir(self, precios, fechas, moneda='usd', metodo='asof'):
+        """
+        Convierte un arreglo de precios a CUP en muchas fechas a la vez, sin modificar los precios de entrada
+
+        Args:
+            precios (np.ndarray): precios en la moneda indicada (por ejemplo TablaProductos.precio_usd)
+            fechas (list | np.ndarray): fechas de conversion
+
+        Returns:
+            np.ndarray: matriz de forma (len(fechas), len(precios)); la fila i son los precios en CUP en la fecha i
+        """
+        tasas = np.atleast_1d(self.tasa(fechas, moneda, metodo))
+        return tasas[:, np.newaxis] * np.asarray(precios, dtype=np.float64)[np.newaxis, :]
+
+
+def costo_canasta_por_fecha(catalogo, canasta, serie, fechas, moneda='usd', metodo='asof'):
+    """
+    Costo total de la canasta en la tienda online (precios en USD o MLC) para cada una de las fechas pedidas
+
+    Como todos los precios del catalogo se multiplican por la misma tasa en una fecha dada, la mediana
+    estandarizada de cada categoria en CUP es la mediana en la moneda original por la tasa. Por eso las
+    medianas se calculan una sola vez y el costo para todas las fechas es un producto vectorizado
+    (el resultado coincide con convertir_usd_a_cup + la cadena de medianas salvo redondeo de punto flotante)
+
+    Args:
+        catalogo (dict | TablaProductos): datos de la tienda online o su tabla (construir_tabla_catalogo)
+        canasta (dict): canasta definida para el proyecto
+        serie (SerieTasas): serie de tasas de cambio
+        fechas (list | np.ndarray): fechas a evaluar
+        moneda (str): moneda de los precios del catalogo ('usd' o 'mlc')
+        metodo (str): 'asof' o 'interpolar'
+
+    Returns:
+        np.ndarray[float64]: costo total semanal en CUP para cada fecha
+    """
+    if not isinstance(catalogo, TablaProductos):
+        catalogo = tabla_productos.construir_tabla_catalogo(catalogo)
+
+    # Las medianas se calculan en la moneda original usando la columna de precios en divisa
+    en_divisa = catalogo.con_columnas(precio_cup=catalogo.precio_usd)
+    precios = tabla_productos.estandarizar_precios_unidad_modal(en_divisa, canasta)
+    medianas = tabla_productos.calcular_precio_mediano_por_categoria(en_divisa, precios)
+
+    costo_en_divisa = 0
+    for categoria, precio_mediano in medianas.items():
+        costo_en_divisa += canasta[categoria]['cantidad_semanal'] * precio_mediano
+
+    return np.atleast_1d(serie.tasa(fechas, moneda, metodo)) * costo_en_divisa
@@ -1,29 +1,108 @@
 import json
-import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-import plotly.express as px
+import sys
 
+import numpy as np
 
+import normalizador
+import producto_compacto
+import sketch_cuantiles
+import tabla_productos
+from instrumentacion import etapa
+from tabla_productos import TablaProductos
 
-def cargar_datos(path):
+
+#======================Conteo de filas para la instrumentacion (instrumentacion.py)==========================================================
+# Solo se evaluan cuando la instrumentacion esta activa
+
+def _es_consulta_sqlite(datos):
+    # almacen_sqlite es opcional y no se importa aqui: si nadie lo importo, ningun objeto puede ser una
+    # ConsultaSQLite, de modo que 'import utils' no carga sqlite3
+    almacen = sys.modules.get('almacen_sqlite')
+    return almacen is not None and isinstance(datos, almacen.ConsultaSQLite)
+
+
+def _filas_por_categoria(datos):
+    if isinstance(datos, TablaProductos) or _es_consulta_sqlite(datos):
+        return len(datos)
+    return sum(len(valores) for valores in datos.values())
+
+
+def _filas_de_tiendas(tiendas):
+    if isinstance(tiendas, TablaProductos) or _es_consulta_sqlite(tiendas):
+        return len(tiendas)
+    if isinstance(tiendas, (list, tuple)):
+        return sum(len(tienda['products']) for tienda in tiendas)
+    return None # un generador no se puede recorrer dos veces
+
+
+def _filas_resultado(resultado, *args, **kwargs):
+    return len(resultado)
+
+
+def _filas_resultado_por_categoria(resultado, *args, **kwargs):
+    return _filas_por_categoria(resultado)
+
+
+def _filas_entrada_por_categoria(resultado, datos, *args, **kwargs):
+    return _filas_por_categoria(datos)
+
+
+def _filas_entrada_tiendas(resultado, tiendas, *args, **kwargs):
+    return _filas_de_tiendas(tiendas)
+
+
+@etapa(filas=_filas_resultado)
+def cargar_datos(path, compacto=False):
+    """
+    Args:
+        path (str): ruta del archivo JSON
+        compacto (bool): crear cada producto como producto_compacto.Producto (un registro con __slots__) en lugar de
+            un diccionario. Todas las funciones de este modulo lo aceptan y ocupa varias veces menos memoria
+    """
     with open(path, 'r' ,encoding='utf-8') as file:
+        if compacto:
+            return json.load(file, object_hook=producto_compacto.objeto_compacto)
         return json.load(file)
+
+
+@etapa(filas=_filas_resultado)
+def cargar_tabla_productos(path):
+    """
+    Carga las tiendas (MIPYMES) de un archivo JSON y las aplana una sola vez en una tabla columnar
+    
+    Args:
+        path (str): ruta al archivo con la lista de tiendas (por ejemplo 'fuentes/tiendas_privadas.json')
+    
+    Returns:
+        TablaProductos
+        Tabla que aceptan directamente conteo_disponibilidad_categorias, agrupar_productos_por_categoria,
+        conteo_origen, peso_minimo_por_categoria y estandarizar_jugos_a_200ml
+    """
+    return tabla_productos.construir_tabla_productos(cargar_datos(path))
     
 #======================Funciones para procesar los datos==========================================================
 
+@etapa(filas=_filas_resultado_por_categoria)
 def convertir_usd_a_cup (datos, usd_to_cup):
     """
        Agrega la 'key' price_cup al diccionario de categorias por producto de la tienda online
 
     Args:
-        datos (dict): datos recopilados de la tienda online
+        datos (dict | TablaProductos): datos recopilados de la tienda online
     
     Returns:
         dict
         Un diccionario con estructura similar a datos solo que agregando el price_cup en todos los productos
-        para cada categoria
+        para cada categoria.
+        Si datos es una TablaProductos (por ejemplo la de cache_fuentes.cargar_tabla_catalogo_en_cache) se devuelve
+        una tabla nueva con la columna precio_cup calculada en una sola operacion, sin modificar la original
     
     """
+    if isinstance(datos, TablaProductos):
+        con_precio_usd = ~np.isnan(datos.precio_usd)
+        precio_cup = np.where(con_precio_usd, datos.precio_usd * usd_to_cup, datos.precio_cup)
+        return datos.con_columnas(precio_cup=precio_cup)
+    
     
     for categoria, productos in datos.items():
         for producto in productos:
@@ -34,6 +113,7 @@ def convertir_usd_a_cup (datos, usd_to_cup):
 
     
 
+@etapa(filas=_filas_entrada_tiendas)
 def conteo_disponibilidad_categorias(tiendas):
     """
     Verifica y cuenta la disponibilidad de categorías de la canasta en la muestra de tiendas(MIPYMES)
@@ -43,82 +123,71 @@ def conteo_disponibilidad_categorias(tiendas):
     tipos de productos son más comunes en el comercio minorista muestreado
     
     Parameters:
-        tiendas : (list)
-            Lista de diccionarios, donde cada diccionario representa una tienda (MIPYME).
+        tiendas : (list | TablaProductos | ConsultaSQLite)
+            Lista de diccionarios, donde cada diccionario representa una tienda (MIPYME),
+            o la tabla columnar construida con cargar_tabla_productos, o una consulta
+            filtrada de almacen_sqlite (el conteo se resuelve en SQL).
     Returns:
         dict
             Diccionario donde las keys son nombres de categorías y los values son el número
             de MIPYMES donde esa categoría está disponible (al menos un producto)
     """
-    #diccionario temporal para encontrar categorias unicas
-    categorias_descubiertas = {}
-    
-    #Esta primera parte es para agregar todas las categorias como keys del diccionario categorias_descubiertas
-    for tienda in tiendas:
-        for producto in tienda['products']:
-            categoria = producto['category']
-            #si la categoria no esta en el diccionario: agrega
-            if categoria not in categorias_descubiertas:
-                categorias_descubiertas[categoria] = True # valor True como marcador
-        
-               
-    categoria_a_verificar = list(categorias_descubiertas.keys())
-    
-    #contadores para cada categoria
+    if isinstance(tiendas, TablaProductos):
+        return tabla_productos.conteo_disponibilidad_categorias(tiendas)
+    if _es_consulta_sqlite(tiendas):
+        return tiendas.conteo_disponibilidad_categorias()
+
+    #contadores para cada categoria. Se recorre una sola vez la muestra, por lo que tiendas puede ser
+    #un generador (por ejemplo lectura_streaming.iterar_tiendas). Las categorias se agregan como keys
+    #en el orden en que aparecen por primera vez
     contadores = {}
-    for categoria in categoria_a_verificar:
-        contadores[categoria] = 0
-    
-    #Recorrer cada tienda y contar disponibilidad
     
     for tienda in tiendas:
-        # Para cada tienda, crear un diccionario que registra
-        # que categorias encontro
-        
-        categorias_encontradas_en_esta_tienda = {}
+        # Para cada tienda, crear un conjunto que registra que categorias encontro
+        categorias_encontradas_en_esta_tienda = set()
         
         for producto in tienda['products']:
             categoria = producto['category']
-            # marcar que esta categoria esta en la tienda
-            categorias_encontradas_en_esta_tienda[categoria] = True
-        #Actualizar contadores globales
-        for categoria in categoria_a_verificar:
-            #si la categoria estaba en esta tienda aumenta en 1 el contador de la categoria
-            if categoria in categorias_encontradas_en_esta_tienda:
-                contadores[categoria] += 1
+            if categoria not in contadores:
+                contadores[categoria] = 0
+            categorias_encontradas_en_esta_tienda.add(categoria)
+        
+        #Actualizar contadores globales: cada categoria de esta tienda aumenta en 1
+        for categoria in categorias_encontradas_en_esta_tienda:
+            contadores[categoria] += 1
     
     return contadores 
 
 
+@etapa(filas=_filas_resultado_por_categoria)
 def agrupar_productos_por_categoria(tiendas):
     """Esta función busca reordenar la lista de tiendas a un diccionario donde las keys son las categorias de los
     productos y los values son listas donde los elementos son diccionarios que represetan productos de esa categoria
     de todas la muestra  de mipymes
 
     Args:
-        tiendas (dict): lista de tiendas, donde cada tienda es un diccionario
+        tiendas (dict): lista de tiendas, donde cada tienda es un diccionario, o TablaProductos
 
     Returns:
         dict : diccionario de la forma {...categoria : [{...},...{...}]...}
     """
+    if isinstance(tiendas, TablaProductos):
+        return tabla_productos.agrupar_productos_por_categoria(tiendas)
+
     dic_productos_por_categoria = {}
     
+    #una sola pasada sobre la muestra (tiendas puede ser un generador)
     for tienda in tiendas:
         for producto in tienda['products']:
             categoria = producto['category']
-            if producto['category'] not in dic_productos_por_categoria:
+            if categoria not in dic_productos_por_categoria:
                 dic_productos_por_categoria[categoria] = []
-                
-            
-    
-    for tienda in tiendas:
-        for producto in tienda['products']:
-            categoria = producto['category']
             dic_productos_por_categoria[categoria].append(producto)  
             
     return dic_productos_por_categoria 
     
 
+@etapa(filas=_filas_entrada_tiendas)
 def conteo_origen(tiendas):
     """
     Cuenta la cantidad de productos nacionales e importados por categoría en una muestra de tiendas.
@@ -126,13 +195,20 @@ def conteo_origen(tiendas):
     Esta función es fundamental para analizar la composicion del mercado minorista según el origen de los productos permitiendo
     identificar patrones de dependencia importadora o fortaleza productiva nacional por categoria de productos de la canasta definida
     Args:
-        tiendas : (list)
-            Lista de diccionarios, donde cada diccionario representa una tienda (MIPYME).
+        tiendas : (list | TablaProductos | ConsultaSQLite)
+            Lista de diccionarios, donde cada diccionario representa una tienda (MIPYME),
+            o la tabla columnar construida con cargar_tabla_productos, o una consulta
+            filtrada de almacen_sqlite (el conteo se resuelve en SQL).
 
     Returns:
         dict :   Diccionario anidado con el conteo estructurado por categoría y origen.
         Formato: {categoria: {'nacional': X, 'importado': Y}, ...}
     """
+    if isinstance(tiendas, TablaProductos):
+        return tabla_productos.conteo_origen(tiendas)
+    if _es_consulta_sqlite(tiendas):
+        return tiendas.conteo_origen()
+
     conteo_por_categoria = {}
     
     for tienda in tiendas: 
@@ -150,6 +226,7 @@ def conteo_origen(tiendas):
     return conteo_por_categoria
 
 
+@etapa(filas=_filas_entrada_por_categoria)
 def peso_minimo_por_categoria(productos_por_categoria):
     
     """Encuentra el peso mínimo(volumen)  (tamaño del envase) para cada categoría de productos en  un conjunto de datos estructurados
@@ -157,10 +234,16 @@ def peso_minimo_por_categoria(productos_por_categoria):
     Args:
         productos_por_categoria : dict
         Diccionario donde las claves son nombres de categorias (strings) y los valores son listas de diccionarios que representan productos
+        (tambien se acepta una TablaProductos o una ConsultaSQLite de almacen_sqlite)
           
     Returns:
         dict: Diccionario donde las claves son las mismas categorias de la entrada y los valores son el peso neto mínimo encontrado en cada categoria (float/int) 
     """
+    if isinstance(productos_por_categoria, TablaProductos):
+        return tabla_productos.peso_minimo_por_categoria(productos_por_categoria)
+    if _es_consulta_sqlite(productos_por_categoria):
+        return productos_por_categoria.peso_minimo_por_categoria()
+
     pesos_por_categoria = {}
     
     for categoria, productos in productos_por_categoria.items():
@@ -198,6 +281,7 @@ def nombre_categorias(cansta):
     
 
 
+@etapa(filas=_filas_resultado_por_categoria)
 def estandarizar_precios_unidad_modal (productos_por_categoria, canasta):
     """
     Esta funcion estandariza los precios de diferentes productos para que sean comparables
@@ -205,8 +289,11 @@ def estandarizar_precios_unidad_modal (productos_por_categoria, canasta):
     que tendría si se vendiera en la presentación que más se repite de su categoría
     
     Parameters:
-    productos_por_categoria: dict
-        Diccionario donde las claves son nombres de categorias (strings) y los valores son listas de diccionarios que representan productos
+    productos_por_categoria: dict | TablaProductos
+        Diccionario donde las claves son nombres de categorias (strings) y los valores son listas de diccionarios que representan productos.
+        Si se pasa una TablaProductos se estandarizan todos los productos en una sola operacion de arreglos y los valores
+        del diccionario devuelto son arreglos de NumPy
+        Si se pasa una ConsultaSQLite (almacen_sqlite) el filtro y la formula se resuelven en SQL
     unidad_minima: dict:
         Diccionario donde las claves son categorias(strings) y los valores son pesos/volúmenes min encontrados para esa  cateogria (int)
     
@@ -219,10 +306,16 @@ def estandarizar_precios_unidad_modal (productos_por_categoria, canasta):
     
     Notas:
         1-La funcion asume que 'net_weight y unidad_minima[categoria] estan en las mismas unidades de medida (ambos en ml, o ambos en g)
-        2-Se espera que net_weight sea distino de cero, pues no se controla un error de división por cero 
+        2-Se espera que net_weight sea distino de cero, pues no se controla un error de división por cero
+          (calidad_datos.revisar_tabla detecta y aparta esos productos al cargar los datos)
         3-Si una categoria en productos por categoria no existe una unidad minima se generará un KeyError
         
     """
+    if isinstance(productos_por_categoria, TablaProductos):
+        return tabla_productos.precios_estandarizados_por_categoria(productos_por_categoria, canasta)
+    if _es_consulta_sqlite(productos_por_categoria):
+        return productos_por_categoria.precios_estandarizados_por_categoria(canasta)
+
     precios_estandarizados_categoria = {}
     
     
@@ -246,30 +339,52 @@ def estandarizar_precios_unidad_modal (productos_por_categoria, canasta):
     
     return precios_estandarizados_categoria
     
+@etapa(filas=_filas_entrada_por_categoria)
 def calcular_precio_mediano_por_categoria(precios_estandarizados):
     """Calcula la mediana de los productos de cada categoria
 
+    Todas las categorias se procesan en una sola pasada agrupada: los precios se copian a un arreglo y en cada
+    categoria se seleccionan los elementos centrales con np.partition, sin ordenar la lista completa.
+    El diccionario de entrada no se modifica
+
         precios_estandarizados (dict): los precios llevados a unidad minima observada en la muestra
+            (los valores pueden ser listas o arreglos de NumPy). Las categorias cuyo valor es un sketch
+            (sketch_cuantiles.SketchKLL) dan su mediana aproximada, sin tener los precios en memoria; se pueden
+            mezclar con categorias de precios exactos
 
     Returns:
-        _type_: _
+        dict: {categoria: precio mediano}
     """
+    #cada valor se trata segun su tipo: los sketches dan su mediana aproximada y los precios van a la pasada agrupada
+    sketches = {categoria: precios for categoria, precios in precios_estandarizados.items()
+                if isinstance(precios, sketch_cuantiles.SketchKLL)}
+    medianas_sketches = sketch_cuantiles.medianas_aproximadas(sketches)
+
+    categorias = [categoria for categoria in precios_estandarizados if categoria not in sketches]
+    tamanos = [len(precios_estandarizados[categoria]) for categoria in categorias]
+    medianas_exactas = {}
+    if sum(tamanos) > 0:
+        #se juntan los precios de todas las categorias en un solo arreglo, con el codigo de su categoria al lado
+        valores = np.concatenate([np.asarray(precios_estandarizados[categoria], dtype=np.float64) for categoria in categorias])
+        codigos = np.repeat(np.arange(len(categorias)), tamanos)
+
+        grupos, medianas = tabla_productos.medianas_por_grupo(valores, codigos)
+        for codigo, mediana in zip(grupos.tolist(), medianas.tolist()):
+            medianas_exactas[categorias[codigo]] = mediana
+
+    #las categorias conservan el orden del diccionario de entrada
     dic_medianas_catagorias = {}
-    #se recorre el dicciario  de precios estandarizados y se ordena todos los precios estandarizados en cada categoria
-    #para hallar la mediana
-    for categoria, precios in precios_estandarizados.items():
-        precios.sort()
-        if len(precios) % 2 == 1:
-            dic_medianas_catagorias[categoria] = precios[len(precios)// 2]
-        elif len(precios) % 2 == 0:
-            el1= precios[len(precios)// 2]
-            el2 = precios[len(precios) // 2 -1]
-            dic_medianas_catagorias[categoria] = (el1 + el2) / 2
-    
+    for categoria in precios_estandarizados:
+        if categoria in medianas_sketches:
+            dic_medianas_catagorias[categoria] = medianas_sketches[categoria]
+        elif categoria in medianas_exactas:
+            dic_medianas_catagorias[categoria] = medianas_exactas[categoria]
+
     return dic_medianas_catagorias
 
 
 
+@etapa(filas=_filas_resultado)
 def estandarizar_jugos_a_200ml(tiendas):
     """
     Estandariza todos los precios de los productos de la 'categoria de 'jugos' a un precio comparable
@@ -277,7 +392,8 @@ def estandarizar_jugos_a_200ml(tiendas):
     Esta funcion  es esencial para establecer comparaciones justas entre jugos de diferentes marcas, tamaños, presentaciones
     
     Parameters:
-    tiendas (list) : Lista de diccionarios donde cada diccionario representa una tienda (mipyme)
+    tiendas (list | TablaProductos) : Lista de diccionarios donde cada diccionario representa una tienda (mipyme)
+        o la tabla columnar construida con cargar_tabla_productos
     
     Returns:
     list
@@ -293,7 +409,11 @@ def estandarizar_jugos_a_200ml(tiendas):
         - peso_neto_original : peso (volumen) original 
         - precio_200ml(float): Precio estandarizado a 200ml (redondeado a 2 decimales)  
     
+    Para cualquier categoria, presentacion o unidad ver normalizar_precios
     """
+    if isinstance(tiendas, TablaProductos):
+        return tabla_productos.estandarizar_jugos_a_200ml(tiendas)
+
     jugos_estandarizados = []
     
     for tienda in tiendas:
@@ -316,6 +436,27 @@ def estandarizar_jugos_a_200ml(tiendas):
     
     return jugos_estandarizados
 
+@etapa(filas=_filas_entrada_tiendas)
+def normalizar_precios(tiendas, canasta, referencias=None, categorias=None):
+    """
+    Lleva el precio de todos los productos a la presentacion de referencia de su categoria en la canasta,
+    convirtiendo entre g/kg y ml/L, en una sola pasada vectorizada (ver normalizador.normalizar_precios)
+
+    Args:
+        tiendas (list | TablaProductos): lista de tiendas (MIPYMES) o tabla columnar
+        canasta (dict): canasta definida para el proyecto
+        referencias (dict): presentaciones que reemplazan a las de la canasta, por ejemplo {'jugos': '200 ml'}
+        categorias (list): normalizar solo estas categorias
+
+    Returns:
+        normalizador.TablaNormalizada
+        Columnas alineadas con los productos: precio normalizado (NaN si no se puede calcular) y una columna
+        'alertas' que marca peso cero o ausente, unidad desconocida o incompatible, etc. en lugar de generar error
+    """
+    return normalizador.normalizar_tiendas(tiendas, canasta, referencias, categorias)
+
+
+@etapa()
 def calcular_costos_totales_por_categoria_canasta(canasta, precio_mediano_por_categoria):
     """
     Calcula el costo total por categoria para la canasta semanal
@@ -334,6 +475,7 @@ def calcular_costos_totales_por_categoria_canasta(canasta, precio_mediano_por_ca
     
     return costos_totales
 
+@etapa()
 def costo_total_canasta(canasta,precio_mediano_categoria):
     """
     Suma todos los precios medianos de todas la categoria multiplicados respectivamente por la cantidad
@@ -355,283 +497,24 @@ def costo_total_canasta(canasta,precio_mediano_categoria):
 
 #=====================Funciones para vizualizaciones=============================================
 
+# Las funciones de graficos viven en visualizaciones.py, que importa plotly y matplotlib. Se cargan de forma
+# perezosa la primera vez que se pide una de ellas (utils.visualizar_disponibilidad, etc.), de modo que
+# importar utils para procesar datos solo carga la biblioteca estandar y NumPy
+_VISUALIZACIONES = (
+    'visuzalizar_canastas_vs_salario',
+    'vizualizar_origen_de_productos_por_categoria',
+    'visualizar_distancia_vs_precios_jugos',
+    'visualizar_costo_total_canasta',
+    'visualizar_disponibilidad',
+)
 
-def visuzalizar_canastas_vs_salario(costo_canasta_mipymes, costo_canasta_tienda_estatal ,salario_estatal):
-    """ 
-    Gráfico  de barras  que compara el salario estatal mensual con el costo semanal de la canasta
-    infantil hospitalaria
-    Parameters:
-    -costo_canasta_mipymes (int): costo total semanal de la canasta infantil en la muestra de mipymes
-    -costo_canasta_tienda_estatal (int): costo total de la canasta infantil en una tienda de Cimex (tienda estatal en dólar) 
-    -salario_estatal (float): salario mensual de referencia
-    """
-    etiquetas = ["Canasta en mipymes", "Canasta en SuperMarket23"]
-    valores= [costo_canasta_mipymes, costo_canasta_tienda_estatal]
-    colores = ["#3CABEB", "#ECF3CC"] 
-    
-    plt.figure(figsize=(8,6))
-    barras = plt.bar(etiquetas, valores, color=colores)
-    
-    #Linea Horizontal de referencia: Salario medio estatal
-    plt.axhline(salario_estatal, color = 'red', linestyle=':', linewidth=1)
-    plt.text(1.05, salario_estatal + 100 , "Salario estatal", color = 'red')
-    
-    #Etiqueta encima de cada barra
-    for barra in barras:
-        altura = barra.get_height()
-        plt.text(barra.get_x() + barra.get_width()/2, altura, f"{int(altura)}CUP", ha = "center", fontsize =10)
-
-    # TITULO y ejes
-        plt.title("Costo semanal de la canasta infantil vs salario estatal")
-        plt.ylabel("CUP")
-        plt.ylim(0, max(valores) + 1500)
-        
-
-def vizualizar_origen_de_productos_por_categoria(origen_por_categoria):
-    """
-    Crea un gráfico interactivo de tipo pastel  con menú desplegable que muestra ka 
-    proporción de productos nacionales vs. importados para diferentes categorías
-    
-
-    Parameters:
-        origen_por_categoria : dict
-            Diccionario anidado con la estructura:
-            { 
-                ... categoria_i : {'nacional: X, 'importado': Y} ...
-            }
-            donde 'nacional' e 'importados' son conteos enteros de productos
-            
-    Returns: None
-        Muestra directamente el grafico interactivo
-    """
-    # Una lista para almacenar botones intercativos 
-    botones = []
-    
-    for categoria in origen_por_categoria:
-        nacional = origen_por_categoria[categoria]['nacional']
-        importado = origen_por_categoria[categoria]['importado']
-        
-        
-        #Crear boton  para esta categoria
-        
-        boton = {
-            'label': f"{categoria}",      
-            'method': 'update',                   
-            'args': [{                              
-            'values': [[nacional, importado]],   
-            'title': f'Origen: {categoria}'     
-        }]
-    }
-        
-        botones.append(boton)
-        
-    #creacion del grafico inicial
-    # Se inicializa con datos de la categoria 'yogurt' (aqui se asume que la categoria yogurt siempre existe)
-    fig = go.Figure()
-    fig.add_trace(go.Pie(
-        labels= ['Nacional', 'Importado'],
-        values= [origen_por_categoria['yogurt']['nacional'], origen_por_categoria['yogurt']['importado'] ],
-        hole=0.5,
-        marker=dict(colors=["#7df3ae", "#2297e6"]),
-        textinfo='percent+label',
-        hovertemplate='<b>%{label}</b><br>Productos: %{value}<br>Porcentaje: %{percent}'
-    ))
-    
-    
-    
-    #Aqui se configura el layout interactivo
-    fig.update_layout(
-    title={
-        'text': 'Origen de Productos por Categoría de la Canasta',
-        'x': 0.5,
-        'xanchor': 'center',
-        'font': {'size': 20}
-    },
-    
-    #Menu desplegable que permite cambiar entre categorias
-    updatemenus=[dict(
-        type="dropdown",
-        direction="down",
-        x=0.3, 
-        y=1.15,
-        buttons=botones
-    )],
-    
-    # Texto de intruccion (seleccionar categoría)
-    annotations=[
-        dict(
-            text="Selecciona categoría:",
-            x=0.1,
-            y=1.25,
-            xref="paper", # aqui las coordenadas son relativas al lienzo
-            yref="paper", 
-            showarrow=False,
-            font=dict(size=14, color='#2c3e50')
-        )
-    ],
-    height=500, # Altura fija del gráfico
-    showlegend=True
-    )
-    
-    fig.show()
-    
-
-
-def visualizar_distancia_vs_precios_jugos(jugos_estandarizados):
-    """
-    Crea un gráfico de dispersión que analiza la relación entre la distancia
-    al  hospital de referencia y el precio de los jugos estandarizados a 200ml
-
-    Parameters
-        jugos_estandarizados : list
-        Lista de diccionarios con la información estandarizada. Cada diccionario contiene:
-            - tienda (str): Nombre de la tienda de origen
-            - distancia_km (float): distancia de la tienda al hospital
-            - producto (str): nombre del producto
-            - marca (str): marca del producto
-            - origen (str): origen/procedencia del producto (nacional/ importado)
-            - precio_original(float) : precio original en CUP
-            - peso_neto_original : peso (volumen) original 
-            - precio_200ml(float): Precio estandarizado a 200ml (redondeado a 2 decimales)
-    Returns : None
-    Muestra directamente el scatter plot
-    """
-    
-    # Extraer datos para el análisis
-    # listas paralelas de distancias y precios correspondientes
-    distancias = [dato['distancia_km'] for dato in jugos_estandarizados]
-    precios = [dato['precio_200ml'] for dato in jugos_estandarizados]
-    
-    # Crear el gráfico de dispersión:
-    
-    plt.figure(figsize=(10, 6))
-    # -alpha= 0.7 : transparencia para ver superposiciones
-    # -s = 60: tamaño de los puntos
-    plt.scatter(distancias, precios, alpha=0.7, s=60, color='blue')
-    
-    # Personalizar
-    plt.xlabel('Distancia al Hospital (km)')
-    plt.ylabel('Precio (CUP/200ml)')
-    plt.title('Precio de Jugos vs Distancia al Hospital')
-    plt.grid(True, alpha=0.3) # grid semitransparente
-    
-    # Mostrar
-    plt.tight_layout() # ajustar automáticamente los márgenes
-    plt.show()
-
-
-def visualizar_costo_total_canasta(canasta, costos_totales):
-    """
-    Crea un gráfico de treemap interactivo que muestra la composición 
-    del costo semanal de una canasta para una de hospitalización (durante una semana) de un niño en condiciones estables
-    
 
-    Parameters:
-        canasta: dict
-            Diccionario que define la canasta
-        costos_totales : dict
-            Diccionario con los costos totales por categoría
-    
-    Returns: None
-        Muestra directamente el Treemap interactivo
-            
-        
-    """
-    # Preparacion del grafico (etiquetas informativas que se colocan en cada rectangulo)
-    #Las etiquetas combinan informacion de canasta y costo
-    etiquetas = []
-    for categoria, costo in costos_totales.items():
-        cantidad = canasta[categoria]['cantidad_semanal']
-        etiqueta = f"{categoria}<br>{cantidad} unidades<br>{costo} CUP"
-        etiquetas.append(etiqueta)
-    
-    # Usando Plotly Express para crear treemap jerarquico
-    fig = px.treemap(
-        names=etiquetas, # aqui las etiquetas para cada rectangulo
-        parents=[""] * len(costos_totales), # todas son raices 
-        values=list(costos_totales.values()), # valores que determinan el tamanno del rectagulo
-        title="Costo Total Semanal por Categoría - Canasta Hospitalaria",
-        color=list(costos_totales.values()), # color por valor (escala continua de colores)
-        color_continuous_scale='RdYlBu_r', # escala rojo-amarillo-azul ... rojo= costo alto, azul = costo bajo
-        labels={'value': 'Costo Total Semanal (CUP)', 'color': 'Costo (CUP)'}
-    )
-    
-    # Personalizar el layout
-    fig.update_layout(
-        margin=dict(t=50, l=25, r=25, b=25), #margenes , tpo, lef, rightm bottom
-        title_x=0.5, # Centra el titulo horizontalmente
-        title_font_size=14
-    )
-    
-    fig.show()
-
-def visualizar_disponibilidad(productos_disponibilidad, total_tiendas):
-    """
-        Crea un gráfico de barras horizontales que muestra el pociento de disponibilidad de cada producto de la
-        canasta de hospitalización
+def __getattr__(nombre):
+    if nombre in _VISUALIZACIONES:
+        import visualizaciones
+        return getattr(visualizaciones, nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
 
-    Parameters:
-        productos_disponibilidad: dict
-            diccionario cuyas claves son las categorias de productos de la canasta (str) y cuyos valores son el conteo (int)
-            en la muestgra de esas cateogrías
-        total_tiendas: int
-            Total de la muestra de mipymes 
-        
-        Returns: None
-            Muestra directamente el gráfico de barras horizontales
-    """
-    #Tener por separado las categorias y el conteo de disponibilidad y hallar el porciento con
-    categorias = list(productos_disponibilidad.keys())
-    disponibles = list(productos_disponibilidad.values())
-    porcentajes = [(d/total_tiendas)*100 for d in disponibles]
-    
-    #Queremos Ordenar los datos para mostrar las barras de menor porciento a mayor
-    #Para ello primero empaquetemos las 3 listas creadas en una lista de triplos ordenados
-    empaquetado = []
-    for i in range(len(categorias)):
-        paquete = (
-            categorias[i],
-            disponibles[i],
-            porcentajes[i]
-        )
-        empaquetado.append(paquete)
-    
-    #Ahora ordenamos la lista empaquetado por el tercer elemento del triplo (por porciento) de manera ascendente (con ordenacion por minimos sucesivos)
-    n = len(empaquetado)
-    for i in range(n):
-        min_actual = i
-        for j in range(i+1, n):
-            if empaquetado[j][2] < empaquetado[min_actual][2]:
-                min_actual = j
-        empaquetado[i],empaquetado[min_actual] = empaquetado[min_actual], empaquetado[i]
-        
-    datos_ordenados = empaquetado # Ya estan ordenados los datos
-    
-    #Finalmente, desempaquetamos en listas ordenadas
-    categorias_ordenadas = []
-    disponibles_ordenados = []
-    porcentajes_ordenados = []
-    
-    for cat, disp, porc in datos_ordenados:
-        categorias_ordenadas.append(cat)
-        disponibles_ordenados.append(disp)
-        porcentajes_ordenados.append(porc)
-    
-        
-    fig, ax = plt.subplots(figsize=(10, 6))
-    bars = ax.barh(categorias_ordenadas, porcentajes_ordenados, color='skyblue', height=0.6)
-    
-    plt.xlim(right=100) # Fijar el limite del grafico a 100 (ya que es %)
-    # titulos
-    ax.set_xlabel('Disponibilidad (%)')
-    ax.set_title('Disponibilidad de Productos en Muestra de 30 MIPYMES')
-    
-    # Añadir porcentajes al final de cada barra
-    for bar, porcentaje in zip(bars, porcentajes_ordenados):
-        width = bar.get_width()
-        ax.text(width + 1, bar.get_y() + bar.get_height()/2,
-               f'{porcentaje:.1f}%', va='center')
-    
-    plt.tight_layout()
-    plt.show()
 
+def __dir__():
+    return sorted(list(globals()) + list(_VISUALIZACIONES))
@@ -0,0 +1,322 @@
+import plotly.graph_objects as go
+import matplotlib.pyplot as plt
+
+
+
+#=====================Funciones para vizualizaciones=============================================
+
+
+def visuzalizar_canastas_vs_salario(costo_canasta_mipymes, costo_canasta_tienda_estatal ,salario_estatal):
+    """ 
+    Gráfico  de barras  que compara el salario estatal mensual con el costo semanal de la canasta
+    infantil hospitalaria
+    Parameters:
+    -costo_canasta_mipymes (int): costo total semanal de la canasta infantil en la muestra de mipymes
+    -costo_canasta_tienda_estatal (int): costo total de la canasta infantil en una tienda de Cimex (tienda estatal en dólar) 
+    -salario_estatal (float): salario mensual de referencia
+    """
+    dibujar_canastas_vs_salario(plt.figure(figsize=(8,6)), costo_canasta_mipymes, costo_canasta_tienda_estatal, salario_estatal)
+
+
+def dibujar_canastas_vs_salario(fig, costo_canasta_mipymes, costo_canasta_tienda_estatal ,salario_estatal):
+    """
+    Dibuja en 'fig' (matplotlib.figure.Figure) el gráfico de visuzalizar_canastas_vs_salario. Borra lo que
+    tuviera la figura, de modo que una misma figura se puede reutilizar como plantilla para varios gráficos
+    """
+    etiquetas = ["Canasta en mipymes", "Canasta en SuperMarket23"]
+    valores= [costo_canasta_mipymes, costo_canasta_tienda_estatal]
+    colores = ["#3CABEB", "#ECF3CC"] 
+    
+    fig.clear()
+    ax = fig.add_subplot()
+    barras = ax.bar(etiquetas, valores, color=colores)
+    
+    #Linea Horizontal de referencia: Salario medio estatal
+    ax.axhline(salario_estatal, color = 'red', linestyle=':', linewidth=1)
+    ax.text(1.05, salario_estatal + 100 , "Salario estatal", color = 'red')
+    
+    #Etiqueta encima de cada barra
+    for barra in barras:
+        altura = barra.get_height()
+        ax.text(barra.get_x() + barra.get_width()/2, altura, f"{int(altura)}CUP", ha = "center", fontsize =10)
+
+    # TITULO y ejes
+    ax.set_title("Costo semanal de la canasta infantil vs salario estatal")
+    ax.set_ylabel("CUP")
+    ax.set_ylim(0, max(valores) + 1500)
+    return fig
+        
+
+def vizualizar_origen_de_productos_por_categoria(origen_por_categoria):
+    """
+    Crea un gráfico interactivo de tipo pastel  con menú desplegable que muestra ka 
+    proporción de productos nacionales vs. importados para diferentes categorías
+    
+
+    Parameters:
+        origen_por_categoria : dict
+            Diccionario anidado con la estructura:
+            { 
+                ... categoria_i : {'nacional: X, 'importado': Y} ...
+            }
+            donde 'nacional' e 'importados' son conteos enteros de productos
+            
+    Returns: None
+        Muestra directamente el grafico interactivo
+    """
+    figura_origen_de_productos_por_categoria(origen_por_categoria).show()
+
+
+def _plantilla_origen_de_productos():
+    """Figura de vizualizar_origen_de_productos_por_categoria sin datos (traza, titulo, menu y anotacion)"""
+    fig = go.Figure()
+    fig.add_trace(go.Pie(
+        labels= ['Nacional', 'Importado'],
+        hole=0.5,
+        marker=dict(colors=["#7df3ae", "#2297e6"]),
+        textinfo='percent+label',
+        hovertemplate='<b>%{label}</b><br>Productos: %{value}<br>Porcentaje: %{percent}'
+    ))
+    
+    #Aqui se configura el layout interactivo
+    fig.update_layout(
+    title={
+        'text': 'Origen de Productos por Categoría de la Canasta',
+        'x': 0.5,
+        'xanchor': 'center',
+        'font': {'size': 20}
+    },
+    
+    #Menu desplegable que permite cambiar entre categorias
+    updatemenus=[dict(
+        type="dropdown",
+        direction="down",
+        x=0.3, 
+        y=1.15,
+    )],
+    
+    # Texto de intruccion (seleccionar categoría)
+    annotations=[
+        dict(
+            text="Selecciona categoría:",
+            x=0.1,
+            y=1.25,
+            xref="paper", # aqui las coordenadas son relativas al lienzo
+            yref="paper", 
+            showarrow=False,
+            font=dict(size=14, color='#2c3e50')
+        )
+    ],
+    height=500, # Altura fija del gráfico
+    showlegend=True
+    )
+    return fig
+
+
+def figura_origen_de_productos_por_categoria(origen_por_categoria, fig=None):
+    """
+    Figura (plotly) de vizualizar_origen_de_productos_por_categoria, sin mostrarla
+
+    Parameters:
+        origen_por_categoria : dict
+            {categoria: {'nacional': X, 'importado': Y}}
+        fig : go.Figure
+            figura devuelta por una llamada anterior para reutilizarla como plantilla: solo se reemplazan los
+            datos y los botones (por defecto se crea una figura nueva)
+
+    Returns: go.Figure
+    """
+    # Una lista para almacenar botones intercativos 
+    botones = []
+    
+    for categoria in origen_por_categoria:
+        nacional = origen_por_categoria[categoria]['nacional']
+        importado = origen_por_categoria[categoria]['importado']
+        
+        #Crear boton  para esta categoria
+        boton = {
+            'label': f"{categoria}",      
+            'method': 'update',                   
+            'args': [{                              
+            'values': [[nacional, importado]],   
+            'title': f'Origen: {categoria}'     
+        }]
+    }
+        
+        botones.append(boton)
+        
+    # Se inicializa con datos de la categoria 'yogurt' (o la primera si la muestra no tiene yogurt).
+    # Una muestra sin productos da la figura vacia, sin sectores ni botones
+    inicial = 'yogurt' if 'yogurt' in origen_por_categoria else next(iter(origen_por_categoria), None)
+    valores = [] if inicial is None else [origen_por_categoria[inicial]['nacional'], origen_por_categoria[inicial]['importado']]
+    if fig is None:
+        fig = _plantilla_origen_de_productos()
+    with fig.batch_update():
+        fig.data[0].values = valores
+        fig.layout.updatemenus[0].buttons = botones
+    return fig
+
+
+def visualizar_distancia_vs_precios_jugos(jugos_estandarizados):
+    """
+    Crea un gráfico de dispersión que analiza la relación entre la distancia
+    al  hospital de referencia y el precio de los jugos estandarizados a 200ml
+
+    Parameters
+        jugos_estandarizados : list
+        Lista de diccionarios con la información estandarizada. Cada diccionario contiene:
+            - tienda (str): Nombre de la tienda de origen
+            - distancia_km (float): distancia de la tienda al hospital
+            - producto (str): nombre del producto
+            - marca (str): marca del producto
+            - origen (str): origen/procedencia del producto (nacional/ importado)
+            - precio_original(float) : precio original en CUP
+            - peso_neto_original : peso (volumen) original 
+            - precio_200ml(float): Precio estandarizado a 200ml (redondeado a 2 decimales)
+    Returns : None
+    Muestra directamente el scatter plot
+    """
+    
+    dibujar_distancia_vs_precios_jugos(plt.figure(figsize=(10, 6)), jugos_estandarizados)
+    plt.show()
+
+
+def dibujar_distancia_vs_precios_jugos(fig, jugos_estandarizados):
+    """Dibuja en 'fig' (matplotlib.figure.Figure) el gráfico de visualizar_distancia_vs_precios_jugos, borrando lo que tuviera"""
+    # Extraer datos para el análisis
+    # listas paralelas de distancias y precios correspondientes
+    distancias = [dato['distancia_km'] for dato in jugos_estandarizados]
+    precios = [dato['precio_200ml'] for dato in jugos_estandarizados]
+    
+    # Crear el gráfico de dispersión:
+    fig.clear()
+    ax = fig.add_subplot()
+    # -alpha= 0.7 : transparencia para ver superposiciones
+    # -s = 60: tamaño de los puntos
+    ax.scatter(distancias, precios, alpha=0.7, s=60, color='blue')
+    
+    # Personalizar
+    ax.set_xlabel('Distancia al Hospital (km)')
+    ax.set_ylabel('Precio (CUP/200ml)')
+    ax.set_title('Precio de Jugos vs Distancia al Hospital')
+    ax.grid(True, alpha=0.3) # grid semitransparente
+    
+    fig.tight_layout() # ajustar automáticamente los márgenes
+    return fig
+
+
+def visualizar_costo_total_canasta(canasta, costos_totales):
+    """
+    Crea un gráfico de treemap interactivo que muestra la composición 
+    del costo semanal de una canasta para una de hospitalización (durante una semana) de un niño en condiciones estables
+    
+
+    Parameters:
+        canasta: dict
+            Diccionario que define la canasta
+        costos_totales : dict
+            Diccionario con los costos totales por categoría
+    
+    Returns: None
+        Muestra directamente el Treemap interactivo
+            
+        
+    """
+    figura_costo_total_canasta(canasta, costos_totales).show()
+
+
+def _plantilla_costo_total_canasta():
+    """Figura de visualizar_costo_total_canasta sin datos"""
+    # Treemap con todas las categorias como raiz; el color sigue al costo (escala continua de colores)
+    fig = go.Figure(go.Treemap(
+        marker=dict(coloraxis='coloraxis'),
+        hovertemplate='%{label}<br>Costo Total Semanal (CUP)=%{value}<br>Costo (CUP)=%{color}<extra></extra>'
+    ))
+    
+    # Personalizar el layout
+    fig.update_layout(
+        title_text="Costo Total Semanal por Categoría - Canasta Hospitalaria",
+        coloraxis=dict(colorscale='RdYlBu_r', colorbar_title_text='Costo (CUP)'), # rojo= costo alto, azul = costo bajo
+        margin=dict(t=50, l=25, r=25, b=25), #margenes , tpo, lef, rightm bottom
+        title_x=0.5, # Centra el titulo horizontalmente
+        title_font_size=14
+    )
+    return fig
+
+
+def figura_costo_total_canasta(canasta, costos_totales, fig=None):
+    """
+    Figura (plotly) de visualizar_costo_total_canasta, sin mostrarla
+
+    Parameters:
+        canasta: dict
+        costos_totales : dict
+        fig : go.Figure
+            figura devuelta por una llamada anterior para reutilizarla como plantilla (solo se reemplazan los datos)
+
+    Returns: go.Figure
+    """
+    # Preparacion del grafico (etiquetas informativas que se colocan en cada rectangulo)
+    #Las etiquetas combinan informacion de canasta y costo
+    etiquetas = []
+    for categoria, costo in costos_totales.items():
+        cantidad = canasta[categoria]['cantidad_semanal']
+        etiqueta = f"{categoria}<br>{cantidad} unidades<br>{costo} CUP"
+        etiquetas.append(etiqueta)
+    
+    if fig is None:
+        fig = _plantilla_costo_total_canasta()
+    with fig.batch_update():
+        fig.data[0].labels = etiquetas # aqui las etiquetas para cada rectangulo
+        fig.data[0].parents = [""] * len(costos_totales) # todas son raices
+        fig.data[0].values = list(costos_totales.values()) # valores que determinan el tamanno del rectagulo
+        fig.data[0].marker.colors = list(costos_totales.values())
+    return fig
+
+def visualizar_disponibilidad(productos_disponibilidad, total_tiendas):
+    """
+        Crea un gráfico de barras horizontales que muestra el pociento de disponibilidad de cada producto de la
+        canasta de hospitalización
+
+    Parameters:
+        productos_disponibilidad: dict
+            diccionario cuyas claves son las categorias de productos de la canasta (str) y cuyos valores son el conteo (int)
+            en la muestgra de esas cateogrías
+        total_tiendas: int
+            Total de la muestra de mipymes 
+        
+        Returns: None
+            Muestra directamente el gráfico de barras horizontales
+    """
+    dibujar_disponibilidad(plt.figure(figsize=(10, 6)), productos_disponibilidad, total_tiendas)
+    plt.show()
+
+
+def dibujar_disponibilidad(fig, productos_disponibilidad, total_tiendas):
+    """Dibuja en 'fig' (matplotlib.figure.Figure) el gráfico de visualizar_disponibilidad, borrando lo que tuviera"""
+    # Ordenamos las categorias por porciento de manera ascendente para mostrar las barras de menor porciento a
+    # mayor. sorted es estable: las categorias con el mismo porciento quedan en el orden del diccionario
+    datos_ordenados = sorted(
+        ((categoria, (disponibles/total_tiendas)*100) for categoria, disponibles in productos_disponibilidad.items()),
+        key=lambda dato: dato[1]
+    )
+    categorias_ordenadas = [categoria for categoria, _ in datos_ordenados]
+    porcentajes_ordenados = [porcentaje for _, porcentaje in datos_ordenados]
+        
+    fig.clear()
+    ax = fig.add_subplot()
+    bars = ax.barh(categorias_ordenadas, porcentajes_ordenados, color='skyblue', height=0.6)
+    
+    ax.set_xlim(right=100) # Fijar el limite del grafico a 100 (ya que es %)
+    # titulos
+    ax.set_xlabel('Disponibilidad (%)')
+    ax.set_title(f'Disponibilidad de Productos en Muestra de {total_tiendas} MIPYMES')
+    
+    # Añadir porcentajes al final de cada barra
+    for bar, porcentaje in zip(bars, porcentajes_ordenados):
+        width = bar.get_width()
+        ax.text(width + 1, bar.get_y() + bar.get_height()/2,
+               f'{porcentaje:.1f}%', va='center')
+    
+    fig.tight_layout()
+    return fig